@@ -0,0 +1,127 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+Checks of the packages of a repository as a whole.
+
+With namcap --repo, all the packages of a directory are checked in one run,
+sharing what is loaded once per run (databases, libraries, license data),
+and then checked together, for what can only be seen across packages.
+Repository directories often keep older builds, and packages of several
+architectures: only the newest version of each package and architecture
+is checked across packages, and only against packages of its architecture
+(architecture-independent packages going with all of them).
+"""
+
+import os
+from collections.abc import Iterator
+from typing import TYPE_CHECKING
+
+import pyalpm
+
+import Namcap.package
+
+if TYPE_CHECKING:
+    from .types import Diagnostic
+
+PACKAGE_SUFFIXES = (".pkg.tar", ".pkg.tar.gz", ".pkg.tar.bz2", ".pkg.tar.xz", ".pkg.tar.zst", ".pkg.tar.lz4")
+
+
+def find_packages(directory: str) -> list[str]:
+    "The package files of a directory, sorted"
+    return [os.path.join(directory, name) for name in sorted(os.listdir(directory)) if name.endswith(PACKAGE_SUFFIXES)]
+
+
+def package_arch(pkg: Namcap.package.PacmanPackage) -> str:
+    return pkg["arch"][0] if pkg.get("arch") else "any"
+
+
+def arch_groups(pkgs: list[Namcap.package.PacmanPackage]) -> dict[str, list[Namcap.package.PacmanPackage]]:
+    "Groups packages by architecture, architecture-independent packages joining every group"
+    arches = sorted({package_arch(pkg) for pkg in pkgs} - {"any"}) or ["any"]
+    return {arch: [pkg for pkg in pkgs if package_arch(pkg) in (arch, "any")] for arch in arches}
+
+
+def is_soname_provision(provision: str) -> bool:
+    "Whether a depends or provides entry is a versioned soname, such as libfoo.so=1-64"
+    name, sep, _ = provision.partition("=")
+    return bool(sep) and name.endswith(".so")
+
+
+class Batch:
+    "The packages checked in a run, for the checks across packages"
+
+    def __init__(self) -> None:
+        self.packages: list[Namcap.package.PacmanPackage] = []
+
+    def add(self, pkginfo: Namcap.package.PacmanPackage) -> None:
+        self.packages.append(pkginfo)
+
+    def latest(self) -> list[Namcap.package.PacmanPackage]:
+        "The newest version of each package and architecture, in the order they were added"
+        newest: dict[tuple[str, str], Namcap.package.PacmanPackage] = {}
+        for pkg in self.packages:
+            key = (pkg["name"], package_arch(pkg))
+            if key not in newest or pyalpm.vercmp(pkg["version"], newest[key]["version"]) > 0:
+                newest[key] = pkg
+        kept = {id(pkg) for pkg in newest.values()}
+        return [pkg for pkg in self.packages if id(pkg) in kept]
+
+    def check(self) -> Iterator[tuple[str, str, "Diagnostic"]]:
+        "Yields (package name, severity, diagnostic) for all the packages"
+        packages = self.latest()
+        yield from self.check_split_packages(packages)
+        yield from self.check_sonames(packages)
+
+    def check_split_packages(
+        self, packages: list[Namcap.package.PacmanPackage]
+    ) -> Iterator[tuple[str, str, "Diagnostic"]]:
+        "The packages built from the same PKGBUILD for an architecture must have the same version"
+        bases: dict[str, list[Namcap.package.PacmanPackage]] = {}
+        for pkg in packages:
+            bases.setdefault(pkg.get("base") or pkg["name"], []).append(pkg)
+        for base, pkgs in bases.items():
+            # { package => the versions of the other packages of the base, for its architectures }
+            others: dict[int, set[str]] = {}
+            for group in arch_groups(pkgs).values():
+                versions = {pkg["version"] for pkg in group}
+                if len(versions) < 2:
+                    continue
+                for pkg in group:
+                    others.setdefault(id(pkg), set()).update(versions - {pkg["version"]})
+            for pkg in pkgs:
+                if id(pkg) in others:
+                    yield pkg["name"], "E", (
+                        "split-package-version-mismatch %s %s %s",
+                        (base, pkg["version"], ", ".join(sorted(others[id(pkg)]))),
+                    )
+
+    def check_sonames(self, packages: list[Namcap.package.PacmanPackage]) -> Iterator[tuple[str, str, "Diagnostic"]]:
+        "Sonames are provided once per architecture, soname dependencies by the batch or the packages checked against"
+        groups = arch_groups(packages)
+        # { (provision, name) => the other providers, for the architectures of the package }
+        twice: dict[tuple[str, str], set[str]] = {}
+        # { architecture => sonames provided by the packages of the architecture }
+        provided: dict[str, set[str]] = {}
+        for arch, group in groups.items():
+            providers: dict[str, list[str]] = {}
+            for pkg in group:
+                for provision in pkg["provides"]:
+                    if is_soname_provision(provision):
+                        providers.setdefault(provision, []).append(pkg["name"])
+            provided[arch] = set(providers)
+            for provision, names in providers.items():
+                for name in names if len(names) > 1 else []:
+                    twice.setdefault((provision, name), set()).update(n for n in names if n != name)
+        for (provision, name), others in twice.items():
+            yield name, "W", ("soname-provided-twice %s %s", (provision, str(sorted(others))))
+        for pkg in packages:
+            arch = package_arch(pkg)
+            # an architecture-independent package may go with any of them
+            sonames = provided.get(arch) or set().union(*provided.values())
+            for depend in pkg["depends"]:
+                if not is_soname_provision(depend) or depend in sonames:
+                    continue
+                provider = Namcap.package.load_from_db(Namcap.package.strip_depend_info(depend))
+                if provider is None or depend not in provider["provides"]:
+                    yield pkg["name"], "W", ("soname-dependency-not-provided %s", (depend,))
@@ -0,0 +1,111 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+A persistent on-disk cache for results that are expensive to compute.
+
+Entries are stored below $NAMCAP_CACHE_DIR (default: $XDG_CACHE_HOME/namcap),
+grouped by namespace and addressed by a key which must capture everything
+the cached value depends on.
+"""
+
+import contextlib
+import functools
+import hashlib
+import mmap
+import os
+import tempfile
+
+import Namcap.version
+
+# Disabled by namcap --no-cache
+enabled = True
+
+
+def cache_dir() -> str:
+    "Returns the directory holding the cache"
+    path = os.environ.get("NAMCAP_CACHE_DIR")
+    if not path:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        path = os.path.join(base, "namcap")
+    return path
+
+
+def make_key(*parts: bytes | str) -> str:
+    "Hashes all the parts a cached value depends on (and the namcap version) into a key"
+    h = hashlib.sha256(Namcap.version.get_version().encode())
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8", "surrogateescape")
+        h.update(b"%d:" % len(part))
+        h.update(part)
+    return h.hexdigest()
+
+
+def file_digest(path: str) -> str:
+    "Returns the sha256 of a file, or an empty string if it can not be read"
+    try:
+        with open(path, "rb") as f:
+            return hashlib.file_digest(f, "sha256").hexdigest()
+    except OSError:
+        return ""
+
+
+@functools.cache
+def code_digest() -> str:
+    "The digest of the sources of namcap, for values its code computes, hashed once per run"
+    h = hashlib.sha256()
+    package = os.path.dirname(os.path.abspath(__file__))
+    for directory, dirnames, filenames in os.walk(package):
+        dirnames[:] = sorted(name for name in dirnames if name not in ("tests", "__pycache__"))
+        for name in sorted(filenames):
+            if name.endswith(".py"):
+                path = os.path.join(directory, name)
+                h.update(b"%s:%s\n" % (os.path.relpath(path, package).encode(), file_digest(path).encode()))
+    return h.hexdigest()
+
+
+def entry_path(namespace: str, key: str) -> str:
+    return os.path.join(cache_dir(), namespace, key)
+
+
+def load(namespace: str, key: str) -> bytes | None:
+    "Returns a cached value, None if there is none"
+    if not enabled:
+        return None
+    try:
+        with open(entry_path(namespace, key), "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def load_mmap(namespace: str, key: str) -> mmap.mmap | None:
+    "Returns a cached value mapped in memory rather than read, None if there is none"
+    if not enabled:
+        return None
+    try:
+        with open(entry_path(namespace, key), "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        # ValueError: empty files can not be mapped
+        return None
+
+
+def store(namespace: str, key: str, data: bytes) -> None:
+    "Stores a value in the cache, silently giving up if the cache is not writable"
+    if not enabled:
+        return
+    directory = os.path.join(cache_dir(), namespace)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmpname = tempfile.mkstemp(dir=directory, prefix=".tmp")
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmpname, os.path.join(directory, key))
+    except OSError:
+        with contextlib.suppress(OSError):
+            os.unlink(tmpname)
@@ -0,0 +1,79 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+Decompression of packages by external, multithreaded tools.
+
+Decompressing a large package on one thread in the Python process is the
+floor on the time needed to check it. zstd and xz compressed packages are
+decompressed by the zstd and xz tools instead, into an unlinked temporary
+file which the rules read as a plain tar archive: xz -T0 decompresses the
+blocks of multithreaded xz archives (as made by makepkg) in parallel, and
+pzstd, when installed, the frames of multi-frame zstd archives. Other
+formats, or packages for which no tool is installed, are read by tarfile.
+"""
+
+import os
+import shutil
+import subprocess
+import tarfile
+import tempfile
+from tarfile import TarFile
+
+# { compression => (magic bytes, decompression commands, the first installed wins) }
+DECOMPRESSORS: dict[str, tuple[bytes, list[list[str]]]] = {
+    "zstd": (b"\x28\xb5\x2f\xfd", [["pzstd", "-d", "-c", "-q"], ["zstd", "-d", "-c", "-q"]]),
+    "xz": (b"\xfd7zXZ\x00", [["xz", "-d", "-c", "-q", "-T0"]]),
+}
+MAGIC_LENGTH = max(len(magic) for magic, _ in DECOMPRESSORS.values())
+
+
+def compression(path: str) -> str | None:
+    "The compression of a file, among those of DECOMPRESSORS, from its first bytes"
+    try:
+        with open(path, "rb") as f:
+            head = f.read(MAGIC_LENGTH)
+    except OSError:
+        return None
+    for name, (magic, _) in DECOMPRESSORS.items():
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def decompressor(name: str) -> list[str] | None:
+    "The command decompressing a compression to stdout, None if no tool is installed"
+    for command in DECOMPRESSORS[name][1]:
+        if shutil.which(command[0]) is not None:
+            return command
+    return None
+
+
+def is_tarball(path: str) -> bool:
+    "Whether path is a tar archive, possibly compressed in a way tarfile can not read"
+    if not os.path.isfile(path):
+        return False
+    return compression(path) is not None or tarfile.is_tarfile(path)
+
+
+def open_tarball(path: str) -> TarFile:
+    """
+    Opens a package for reading, decompressing it with an external tool when
+    there is one for its compression. Raises tarfile.ReadError when it can not
+    be decompressed.
+    """
+    name = compression(path)
+    command = None if name is None else decompressor(name)
+    if command is None:
+        return tarfile.open(path, "r")
+    with tempfile.NamedTemporaryFile(prefix="namcap.", suffix=".tar", delete=False) as tmp:
+        try:
+            with open(path, "rb") as f:
+                p = subprocess.run(command, stdin=f, stdout=tmp, stderr=subprocess.PIPE)
+            if p.returncode != 0:
+                message = p.stderr.decode("utf-8", "replace").strip()
+                raise tarfile.ReadError("%s failed on %s: %s" % (command[0], path, message))
+            return tarfile.open(tmp.name, "r:")
+        finally:
+            # the archive stays readable until it is closed
+            os.unlink(tmp.name)
@@ -5,7 +5,6 @@
 
 from typing import TYPE_CHECKING
 
-import Namcap.tags
 from Namcap import package
 
 if TYPE_CHECKING:
@@ -52,7 +51,13 @@ def getprovides(depends):
     return provides
 
 
-def analyze_depends(pkginfo):
+def analyze_depends(
+    pkginfo: package.PacmanPackage, report_infos: bool = True
+) -> tuple[list["Diagnostic"], list["Diagnostic"], list["Diagnostic"]]:
+    """
+    Compares the detected dependencies to the declared ones. Information
+    tags, and the work only needed for them, are skipped unless report_infos is true.
+    """
     errors: list[Diagnostic] = []
     warnings: list[Diagnostic] = []
     infos: list[Diagnostic] = []
@@ -82,23 +87,19 @@ def analyze_depends(pkginfo):
     # Common deps
     for duplicated_optdepend in explicitdepend & optdepend:
         errors.append(("dependency-duplicated-optdepend %s", (duplicated_optdepend,)))
-    for satisfied_optdepend in implicitdepend & optdepend:
-        infos.append(("dependency-satisfied-optdepend %s", (satisfied_optdepend,)))
+    if report_infos:
+        for satisfied_optdepend in implicitdepend & optdepend:
+            infos.append(("dependency-satisfied-optdepend %s", (satisfied_optdepend,)))
 
     # Do the actual message outputting stuff
     for i in dependlist:
-        # compute dependency reason
-        reasons = pkginfo.detected_deps[i]
-        reason_strings = [Namcap.tags.format_message(reason) for reason in reasons]
-        reason = ", ".join(reason_strings)
-        # if the needed package is itself:
-        if i == pkginfo["name"]:
-            infos.append(("dependency-detected-satisfied %s (%s)", (i, reason)))
-            continue
-        # if the dependency is satisfied
-        if i in explicitdepend or smartprovides[i] & explicitdepend:
-            infos.append(("dependency-detected-satisfied %s (%s)", (i, reason)))
+        # if the needed package is itself, or if the dependency is satisfied
+        if i == pkginfo["name"] or i in explicitdepend or smartprovides[i] & explicitdepend:
+            if report_infos:
+                infos.append(("dependency-detected-satisfied %s (%s)", (i, list(pkginfo.detected_deps[i]))))
             continue
+        # the reasons are nested diagnostics, only formatted when the message is shown
+        reason = list(pkginfo.detected_deps[i])
         # still not found, maybe it is specified as optional
         if i in optdepend or smartprovides[i] & optdepend:
             warnings.append(("dependency-detected-but-optional %s (%s)", (i, reason)))
@@ -123,6 +124,7 @@ def analyze_depends(pkginfo):
         #   it does not pull some needed dependency which provides it
         if i not in dependlist and i not in allprovides:
             warnings.append(("dependency-not-needed %s", (i,)))
-    infos.append(("depends-by-namcap-sight depends=(%s)", (" ".join(dependlist),)))
+    if report_infos:
+        infos.append(("depends-by-namcap-sight depends=(%s)", (" ".join(dependlist),)))
 
     return errors, warnings, infos
@@ -0,0 +1,144 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+Facts about the files of packages, kept across runs by content.
+
+What the dynamic section and the dynamic symbols of an ELF file say is
+stored in the persistent cache, keyed by the sha256 of the file as
+recorded in the .MTREE of its package, and by the digest of the modules
+reading the facts. Only ELF files have entries, and the .MTREE is not
+trusted: an entry is only stored once the member was found to have the
+digest recorded for it. A new release of a package, where most files did
+not change, only has its changed files read again; the package-level
+checks (sodepends, unusedsodepends and through them the dependency
+analysis) aggregate the facts of all files.
+"""
+
+import functools
+import hashlib
+import json
+import weakref
+from tarfile import TarFile, TarInfo
+from typing import IO, NamedTuple
+
+import Namcap.cache
+import Namcap.ldso
+import Namcap.mtree
+import Namcap.symbols
+import Namcap.util
+
+CHUNK_SIZE = 1 << 20
+
+
+class ElfFacts(NamedTuple):
+    "What is known of an ELF file"
+
+    dynamic: Namcap.ldso.DynamicInfo
+    symbols: Namcap.symbols.DynamicSymbols
+
+
+_digests: "weakref.WeakKeyDictionary[TarFile, dict[str, tuple[int | None, str]]]" = weakref.WeakKeyDictionary()
+
+
+def member_digests(tar: TarFile) -> dict[str, tuple[int | None, str]]:
+    "The size and sha256 of the regular files of a package, from its .MTREE, { member name => (size, digest) }"
+    if (digests := _digests.get(tar)) is None:
+        digests = _digests[tar] = {}
+        for entry in Namcap.mtree.tar_mtree(tar):
+            if entry.sha256digest is not None:
+                digests[entry.path.removeprefix("./")] = (entry.size, entry.sha256digest)
+    return digests
+
+
+@functools.cache
+def readers_digest() -> str:
+    "The digest of the modules reading and encoding the facts, cached facts being stale once they change"
+    modules = [__file__, Namcap.ldso.__file__, Namcap.symbols.__file__, Namcap.util.__file__]
+    return Namcap.cache.make_key(*(Namcap.cache.file_digest(path) for path in modules if path is not None))
+
+
+def facts_key(tar: TarFile, member: TarInfo) -> str | None:
+    "The key of the facts of a member, None if its package has no .MTREE entry matching it"
+    recorded = member_digests(tar).get(member.name)
+    if recorded is None or recorded[0] != member.size:
+        return None
+    return Namcap.cache.make_key(recorded[1], readers_digest())
+
+
+def read_facts(f: IO[bytes]) -> ElfFacts:
+    "Reads the facts of an ELF file"
+    dynamic = Namcap.ldso.read_dynamic(f)
+    f.seek(0)
+    symbols = Namcap.symbols.read_dynamic_symbols(f)
+    return ElfFacts(dynamic, symbols)
+
+
+def read_elf_facts(tar: TarFile, member: TarInfo) -> ElfFacts | None:
+    "Reads the facts of a member, None if it is not an ELF file"
+    f = tar.extractfile(member)
+    if f is None:
+        return None
+    with f:
+        return read_facts(f) if Namcap.util.is_elf(f) else None
+
+
+def encode(facts: ElfFacts) -> bytes:
+    dynamic, symbols = facts
+    return json.dumps(
+        {
+            "dynamic": [list(dynamic.machine), dynamic.soname, dynamic.needed, dynamic.rpath, dynamic.runpath],
+            "symbols": [sorted(symbols.exported), sorted(symbols.undefined), sorted(symbols.verneed)],
+        }
+    ).encode()
+
+
+def decode(data: bytes) -> ElfFacts:
+    value = json.loads(data)
+    (machine, elfclass), soname, needed, rpath, runpath = value["dynamic"]
+    exported, undefined, verneed = value["symbols"]
+    return ElfFacts(
+        Namcap.ldso.DynamicInfo((machine, elfclass), soname, needed, rpath, runpath),
+        Namcap.symbols.DynamicSymbols(set(exported), set(undefined), set(verneed)),
+    )
+
+
+_facts: "weakref.WeakKeyDictionary[TarFile, dict[str, ElfFacts | None]]" = weakref.WeakKeyDictionary()
+
+
+def elf_facts(tar: TarFile, member: TarInfo) -> ElfFacts | None:
+    """
+    The facts of a regular file of a package, None if it is not an ELF file. They
+    are read once per package, and once for all packages holding the same file
+    when the package has a .MTREE.
+    """
+    known = _facts.setdefault(tar, {})
+    if member.name in known:
+        return known[member.name]
+    f = tar.extractfile(member)
+    if f is None:
+        return None
+    with f:
+        # only the facts of ELF files are worth a cache entry
+        known[member.name] = facts = cached_facts(tar, member, f) if Namcap.util.is_elf(f) else None
+    return facts
+
+
+def cached_facts(tar: TarFile, member: TarInfo, f: IO[bytes]) -> ElfFacts:
+    "The facts of an ELF member, through the persistent cache when the .MTREE of its package records it"
+    if (key := facts_key(tar, member)) is not None and (cached := Namcap.cache.load("facts", key)) is not None:
+        try:
+            return decode(cached)
+        except (ValueError, KeyError, TypeError):
+            # not an entry these modules wrote, read the member again
+            pass
+    facts = read_facts(f)
+    if key is not None:
+        # the .MTREE could be wrong about the member, which would poison the entry for other packages
+        f.seek(0)
+        h = hashlib.sha256()
+        while chunk := f.read(CHUNK_SIZE):
+            h.update(chunk)
+        if h.hexdigest() == member_digests(tar)[member.name][1]:
+            Namcap.cache.store("facts", key, encode(facts))
+    return facts
@@ -0,0 +1,80 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+Path existence lookups over a package and the packages it relies on.
+
+The file lists of packages from the pacman databases are loaded once per
+run, with the packages (see Namcap.package.load_from_db), and shared by all
+the packages and rules that need them.
+"""
+
+import os
+from tarfile import TarFile
+
+from .package import load_from_db
+
+# Number of symlinks followed before giving up, like Linux does
+MAX_SYMLINK_HOPS = 40
+
+
+def package_files(pkgname: str) -> frozenset[str] | None:
+    "Returns the paths of a package from the databases, None if there is no such package"
+    p = load_from_db(pkgname)
+    return None if p is None else p.file_paths
+
+
+class FileIndex:
+    """
+    The paths of a package and of other packages from the databases (usually
+    its dependencies), with the symlinks of the package resolved
+    """
+
+    def __init__(self, tar: TarFile, pkgnames: list[str]) -> None:
+        self.paths: set[str] = set()
+        self.symlinks: dict[str, str] = {}
+        for member in tar:
+            name = member.name.rstrip("/")
+            self.paths.add(name)
+            if member.issym():
+                self.symlinks[name] = member.linkname
+        self.pkgnames = pkgnames
+
+    def __contains__(self, path: object) -> bool:
+        if path in self.paths:
+            return True
+        for pkgname in self.pkgnames:
+            files = package_files(pkgname)
+            if files is not None and path in files:
+                return True
+        return False
+
+    def resolve(self, path: str) -> str | None:
+        """
+        Resolves the symlinks of the package found in any component of a path,
+        including symlinks to other symlinks. Returns None if they loop.
+        """
+        parts = path.split("/")
+        parts.reverse()
+        resolved: list[str] = []
+        hops = 0
+        while parts:
+            part = parts.pop()
+            if part in ("", "."):
+                continue
+            if part == "..":
+                if resolved:
+                    resolved.pop()
+                continue
+            candidate = "/".join(resolved + [part])
+            target = self.symlinks.get(candidate)
+            if target is None:
+                resolved.append(part)
+                continue
+            hops += 1
+            if hops > MAX_SYMLINK_HOPS:
+                return None
+            if os.path.isabs(target):
+                resolved = []
+            parts.extend(reversed(target.split("/")))
+        return "/".join(resolved)
@@ -0,0 +1,159 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+Resolution of the shared libraries needed by the ELF files of a package.
+
+Libraries are searched like the dynamic loader does: in the DT_RPATH of the
+object (unless it has a DT_RUNPATH), then in its DT_RUNPATH, then in the
+system library directories. In each directory, the libraries of the package
+itself are looked up first, then those installed in the checked root.
+"""
+
+import os
+from collections.abc import Iterable
+from typing import IO, NamedTuple
+
+from elftools.elf.dynamic import DynamicSection
+from elftools.elf.elffile import ELFFile
+
+import Namcap.libcache
+import Namcap.package
+from Namcap.libcache import Machine
+
+# What $LIB expands to, by ELF class
+LIB_DIRS = {32: "lib32", 64: "lib"}
+
+
+class DynamicInfo(NamedTuple):
+    "What the dynamic section of an ELF file says about the libraries it provides and needs"
+
+    machine: Machine
+    soname: str | None
+    needed: list[str]
+    rpath: list[str]
+    runpath: list[str]
+
+
+class Resolution(NamedTuple):
+    "Where a needed library was found, as an absolute path"
+
+    path: str
+    in_package: bool
+
+
+def read_dynamic(fileobj: IO[bytes]) -> DynamicInfo:
+    "Reads the dynamic section of an ELF file, once"
+    elffile = ELFFile(fileobj)
+    soname = None
+    needed = []
+    rpath: list[str] = []
+    runpath: list[str] = []
+    for section in elffile.iter_sections():
+        if not isinstance(section, DynamicSection):
+            continue
+        for tag in section.iter_tags():
+            d_tag = tag.entry.d_tag
+            if d_tag not in ("DT_SONAME", "DT_NEEDED", "DT_RPATH", "DT_RUNPATH"):
+                continue
+            # the string values are set by pyelftools as .soname, .needed, .rpath and .runpath
+            value: str = getattr(tag, d_tag[3:].lower())
+            match d_tag:
+                case "DT_SONAME":
+                    soname = value
+                case "DT_NEEDED":
+                    needed.append(value)
+                case "DT_RPATH":
+                    rpath.extend(value.split(":"))
+                case "DT_RUNPATH":
+                    runpath.extend(value.split(":"))
+    return DynamicInfo((elffile["e_machine"], elffile.elfclass), soname, needed, rpath, runpath)
+
+
+def expand(path: str, origin: str, elfclass: int) -> str | None:
+    """
+    Expands the $ORIGIN and $LIB tokens of a search path entry, origin being the
+    absolute directory of the object. None if it holds a token that can not be expanded.
+    """
+    for token, value in (("ORIGIN", origin), ("LIB", LIB_DIRS.get(elfclass, "lib"))):
+        path = path.replace("${%s}" % token, value).replace("$" + token, value)
+    if "$" in path or not path.startswith("/"):
+        return None
+    return os.path.normpath(path)
+
+
+class LibraryIndex:
+    "The shared libraries of a package, as { absolute directory => names }"
+
+    def __init__(self, names: Iterable[str]) -> None:
+        self.dirs: dict[str, set[str]] = {}
+        for name in names:
+            dirname, _, basename = name.rpartition("/")
+            if ".so" in basename:
+                self.dirs.setdefault("/" + dirname, set()).add(basename)
+
+    def __contains__(self, path: object) -> bool:
+        if not isinstance(path, str):
+            return False
+        dirname, _, basename = path.rpartition("/")
+        return basename in self.dirs.get(dirname or "/", ())
+
+
+class LibrarySearch:
+    """
+    Resolves the needed libraries of the ELF files of a package, which holds the
+    given member names, against the package itself and the root it is checked against.
+    """
+
+    def __init__(self, names: Iterable[str], root: str | None = None) -> None:
+        self.index = LibraryIndex(names)
+        self.root = root or Namcap.package.alpm_config["root"] or "/"
+        # the package may ship libraries to /lib, even where it is a symbolic link in the root
+        self.system_dirs = list(
+            dict.fromkeys(Namcap.libcache.library_dirs(self.root) + Namcap.libcache.DEFAULT_LIBRARY_DIRS)
+        )
+        self._installed: dict[tuple[Machine, str], str | None] = {}
+
+    def search_path(self, info: DynamicInfo, origin: str) -> list[str]:
+        "The directories searched before the system ones, $ORIGIN being the directory of the object"
+        # DT_RPATH is ignored when there is a DT_RUNPATH
+        paths = info.runpath if info.runpath else info.rpath
+        expanded = (expand(path, origin, info.machine[1]) for path in paths if path)
+        return list(dict.fromkeys(path for path in expanded if path is not None))
+
+    def installed(self, machine: Machine, path: str) -> str | None:
+        "The resolved path of the library installed at path in the root, None if there is none for machine"
+        key = (machine, path)
+        if key not in self._installed:
+            resolved = Namcap.libcache.resolve(self.root, path)
+            try:
+                with open(os.path.join(self.root, resolved.lstrip("/")), "rb") as f:
+                    found = Namcap.libcache.elf_machine(f.read(20)) == machine
+            except OSError:
+                found = False
+            self._installed[key] = resolved if found else None
+        return self._installed[key]
+
+    def find(self, name: str, info: DynamicInfo, origin: str) -> Resolution | None:
+        "Where the library name needed by an object in the directory origin is loaded from"
+        if "/" in name:
+            # not searched; relative paths are relative to the working directory at run time
+            if not name.startswith("/"):
+                return None
+            path = os.path.normpath(name)
+            if path in self.index:
+                return Resolution(path, True)
+            installed = self.installed(info.machine, path)
+            return None if installed is None else Resolution(installed, False)
+        for directory in self.search_path(info, origin):
+            path = os.path.join(directory, name)
+            if path in self.index:
+                return Resolution(path, True)
+            if (installed := self.installed(info.machine, path)) is not None:
+                return Resolution(installed, False)
+        for directory in self.system_dirs:
+            path = os.path.join(directory, name)
+            if path in self.index:
+                return Resolution(path, True)
+        system = Namcap.libcache.find_library(info.machine, name, self.root)
+        return None if system is None else Resolution(system, False)
@@ -0,0 +1,168 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+The shared libraries installed in a root, by machine.
+
+Libraries are found by listing the directories the dynamic loader searches
+(those of ld.so.conf for glibc, of ld-musl-*.path for musl, and the
+default ones) and reading the ELF header of each of them, so that the
+libraries of a root of any architecture can be resolved without running
+its ldconfig. The listing is kept in the persistent cache, keyed by the
+modification times of the directories.
+"""
+
+import glob
+import json
+import os
+import struct
+
+from elftools.elf.enums import ENUM_E_MACHINE
+
+import Namcap.cache
+import Namcap.package
+
+# (e_machine, ELF class), e.g. ("EM_X86_64", 64) or ("EM_RISCV", 64)
+Machine = tuple[str, int]
+
+DEFAULT_LIBRARY_DIRS = ["/usr/lib", "/usr/lib32", "/usr/lib64", "/lib", "/lib64", "/usr/local/lib"]
+
+MACHINE_NAMES = {number: name for name, number in ENUM_E_MACHINE.items() if name.startswith("EM_")}
+
+# The maximum number of symbolic links followed to resolve a path
+MAXSYMLINKS = 40
+
+_caches: dict[str, dict[Machine, dict[str, str]]] = {}
+
+
+def elf_machine(header: bytes) -> Machine | None:
+    "The machine of an ELF file from its first 20 bytes, None if it is not an ELF file"
+    if len(header) < 20 or not header.startswith(b"\x7fELF") or header[4] not in (1, 2) or header[5] not in (1, 2):
+        return None
+    (number,) = struct.unpack_from("<H" if header[5] == 1 else ">H", header, 18)
+    return MACHINE_NAMES.get(number, str(number)), 32 if header[4] == 1 else 64
+
+
+def resolve(root: str, path: str) -> str:
+    "Resolves the symbolic links of path, an absolute path below root, without leaving root"
+    parts = [part for part in path.split("/") if part]
+    resolved = "/"
+    links = 0
+    while parts:
+        part = parts.pop(0)
+        candidate = os.path.normpath(os.path.join(resolved, part))
+        try:
+            target = os.readlink(os.path.join(root, candidate.lstrip("/")))
+        except OSError:
+            resolved = candidate
+            continue
+        links += 1
+        if links > MAXSYMLINKS:
+            return candidate
+        parts[:0] = [p for p in target.split("/") if p]
+        if target.startswith("/"):
+            resolved = "/"
+    return resolved
+
+
+def read_ld_so_conf(root: str, path: str, seen: set[str] | None = None) -> list[str]:
+    "The directories listed in a glibc ld.so.conf, following its include statements"
+    seen = set() if seen is None else seen
+    if path in seen:
+        return []
+    seen.add(path)
+    try:
+        with open(os.path.join(root, path.lstrip("/"))) as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return []
+    dirs = []
+    for line in lines:
+        words = line.partition("#")[0].replace(":", " ").replace(",", " ").split()
+        if not words:
+            continue
+        if words[0] == "include":
+            for pattern in words[1:]:
+                pattern = os.path.join(os.path.dirname(path), pattern)
+                for conf in sorted(glob.glob(os.path.join(root, pattern.lstrip("/")))):
+                    dirs.extend(read_ld_so_conf(root, "/" + os.path.relpath(conf, root), seen))
+        else:
+            dirs.extend(word for word in words if word.startswith("/"))
+    return dirs
+
+
+def library_dirs(root: str) -> list[str]:
+    "The directories the dynamic loaders of root search, symbolic links resolved, in order"
+    dirs = read_ld_so_conf(root, "/etc/ld.so.conf")
+    for path in sorted(glob.glob(os.path.join(root, "etc/ld-musl-*.path"))):
+        try:
+            with open(path) as f:
+                dirs.extend(d for d in f.read().replace(":", "\n").split() if d.startswith("/"))
+        except OSError:
+            pass
+    dirs.extend(DEFAULT_LIBRARY_DIRS)
+    resolved = [resolve(root, d) for d in dirs]
+    return list(dict.fromkeys(d for d in resolved if os.path.isdir(os.path.join(root, d.lstrip("/")))))
+
+
+def scan_libraries(root: str, dirs: list[str]) -> dict[Machine, dict[str, str]]:
+    """
+    Lists the shared libraries of dirs, returns { machine => { name => path } }, where
+    path is the resolved absolute path of the library below root. The first directory wins.
+    """
+    libraries: dict[Machine, dict[str, str]] = {}
+    for directory in dirs:
+        try:
+            names = sorted(os.listdir(os.path.join(root, directory.lstrip("/"))))
+        except OSError:
+            continue
+        for name in names:
+            if ".so" not in name:
+                continue
+            path = resolve(root, os.path.join(directory, name))
+            try:
+                with open(os.path.join(root, path.lstrip("/")), "rb") as f:
+                    machine = elf_machine(f.read(20))
+            except OSError:
+                continue
+            if machine is not None:
+                libraries.setdefault(machine, {}).setdefault(name, path)
+    return libraries
+
+
+def fingerprint(root: str, dirs: list[str] | None = None) -> list[str]:
+    "Describes the library directories of root by their modification times, which change as libraries come and go"
+    parts = [os.path.abspath(root)]
+    for directory in library_dirs(root) if dirs is None else dirs:
+        try:
+            mtime = os.stat(os.path.join(root, directory.lstrip("/"))).st_mtime_ns
+        except OSError:
+            mtime = 0
+        parts.extend((directory, str(mtime)))
+    return parts
+
+
+def load_libraries(root: str) -> dict[Machine, dict[str, str]]:
+    "Lists the shared libraries of root, through the persistent cache"
+    dirs = library_dirs(root)
+    key = Namcap.cache.make_key(*fingerprint(root, dirs))
+    if (cached := Namcap.cache.load("libcache", key)) is not None:
+        return {(machine, elfclass): libs for machine, elfclass, libs in json.loads(cached)}
+    libraries = scan_libraries(root, dirs)
+    entries = [[machine, elfclass, libs] for (machine, elfclass), libs in libraries.items()]
+    Namcap.cache.store("libcache", key, json.dumps(entries).encode())
+    return libraries
+
+
+def get_library_cache(root: str | None = None) -> dict[Machine, dict[str, str]]:
+    "The shared libraries of root (by default, the root namcap checks against), read once per run"
+    if root is None:
+        root = Namcap.package.alpm_config["root"] or "/"
+    if root not in _caches:
+        _caches[root] = load_libraries(root)
+    return _caches[root]
+
+
+def find_library(machine: Machine, name: str, root: str | None = None) -> str | None:
+    "The absolute path of the library name for machine, None if it is not installed"
+    return get_library_cache(root).get(machine, {}).get(name)
@@ -0,0 +1,273 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+The members of a package.
+
+tarfile keeps a TarInfo object, with its own dict and strings, for every
+member of an archive until it is closed, which takes gigabytes for packages
+of a few hundred thousand files. A package is read once into a MemberTable
+instead: interned names and array-backed columns of the member metadata,
+tarfile's TarInfo objects being dropped as the members are read. Rules which
+only look at the metadata scan its columns (see member_table), and a
+PackageArchive builds short-lived TarInfo objects from it for the others.
+
+Rules which only apply to some kinds of files are skipped when the package
+holds none (see has_member_kind). The kinds are found from the member names
+first, and only from the first bytes of the members when a rule needs it.
+"""
+
+import functools
+import os
+import posixpath
+import shutil
+import sys
+import tarfile
+import weakref
+from array import array
+from collections.abc import Iterable, Iterator
+from tarfile import TarFile, TarInfo
+from typing import IO, Any
+
+REGULAR_TYPES = frozenset(t[0] for t in tarfile.REGULAR_TYPES)
+REGTYPE = tarfile.REGTYPE[0]
+LNKTYPE = tarfile.LNKTYPE[0]
+SYMTYPE = tarfile.SYMTYPE[0]
+DIRTYPE = tarfile.DIRTYPE[0]
+
+# Kinds of regular files told apart by their name
+NAME_KINDS = {
+    "py": (".py",),
+    "pyc": (".pyc", ".pyo"),
+    "pc": (".pc",),
+    "qml": (".qml",),
+    "jar": (".jar",),
+}
+# Kinds of regular files told apart by their first bytes
+MAGIC_KINDS = {
+    "elf": b"\x7fELF",
+    "static": b"!<arch>\n",
+    "script": b"#!",
+    "java": b"\xca\xfe\xba\xbe",
+}
+MAGIC_LENGTH = max(len(magic) for magic in MAGIC_KINDS.values())
+
+
+class MemberTable:
+    """
+    The members of a package, in archive order
+
+    names     -- member names, interned
+    types     -- tar type flags, as integers (compare with REGTYPE, DIRTYPE...)
+    modes     -- modes, as stored in the archive
+    uids      -- owner user ids
+    gids      -- owner group ids
+    sizes     -- sizes in bytes
+    mtimes    -- modification times, in seconds
+    offsets   -- offsets of the member data in the archive
+    linknames -- { index => link target } for hard and symbolic links only
+    unames    -- { index => user name } for members not owned by the root user only
+    gnames    -- { index => group name } for members not owned by the root group only
+    sparse    -- { index => sparse map } for sparse files only
+    """
+
+    def __init__(self, members: Iterable[TarInfo] = ()) -> None:
+        self.names: list[str] = []
+        self.types = array("B")
+        self.modes = array("H")
+        self.uids = array("Q")
+        self.gids = array("Q")
+        self.sizes = array("Q")
+        self.mtimes = array("d")
+        self.offsets = array("Q")
+        self.linknames: dict[int, str] = {}
+        self.unames: dict[int, str] = {}
+        self.gnames: dict[int, str] = {}
+        self.sparse: dict[int, Any] = {}
+        for member in members:
+            self.add(member)
+
+    def add(self, member: TarInfo) -> None:
+        index = len(self.names)
+        self.names.append(sys.intern(member.name))
+        self.types.append(member.type[0])
+        self.modes.append(member.mode)
+        self.uids.append(member.uid)
+        self.gids.append(member.gid)
+        self.sizes.append(member.size)
+        self.mtimes.append(member.mtime)
+        self.offsets.append(member.offset_data)
+        if member.islnk() or member.issym():
+            self.linknames[index] = member.linkname
+        if member.uname != "root":
+            self.unames[index] = member.uname
+        if member.gname != "root":
+            self.gnames[index] = member.gname
+        if member.sparse is not None:
+            self.sparse[index] = member.sparse
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def isfile(self, index: int) -> bool:
+        return self.types[index] in REGULAR_TYPES
+
+    def isdir(self, index: int) -> bool:
+        return self.types[index] == DIRTYPE
+
+    def islink(self, index: int) -> bool:
+        "Whether a member is a hard or symbolic link"
+        return index in self.linknames
+
+    def tarinfo(self, index: int) -> TarInfo:
+        "The TarInfo of a member, as tarfile would have read it"
+        info = TarInfo(self.names[index])
+        info.type = bytes((self.types[index],))
+        info.mode = self.modes[index]
+        info.uid = self.uids[index]
+        info.gid = self.gids[index]
+        info.size = self.sizes[index]
+        # only pax headers give fractions of seconds
+        mtime = self.mtimes[index]
+        info.mtime = int(mtime) if mtime.is_integer() else mtime
+        info.linkname = self.linknames.get(index, "")
+        info.uname = self.unames.get(index, "root")
+        info.gname = self.gnames.get(index, "root")
+        info.offset_data = self.offsets[index]
+        info.sparse = self.sparse.get(index)
+        return info
+
+
+class PackageArchive:
+    """
+    A package tarball, offering the part of the TarFile interface used by the
+    rules (iteration, getmembers, getnames, getmember, extractfile, extract)
+    from the MemberTable of its members
+    """
+
+    def __init__(self, tar: TarFile) -> None:
+        self.tar = tar
+        self.name = tar.name
+        self.table = MemberTable()
+        # reading the members one at a time, and dropping the TarInfo tarfile keeps for each
+        while (member := tar.next()) is not None:
+            self.table.add(member)
+            tar.members.clear()  # type: ignore[attr-defined]
+
+    @functools.cached_property
+    def index(self) -> dict[str, int]:
+        "{ member name => index }, the last member of a name winning as in TarFile.getmember"
+        return {name: index for index, name in enumerate(self.table.names)}
+
+    def __iter__(self) -> Iterator[TarInfo]:
+        return map(self.table.tarinfo, range(len(self.table)))
+
+    def getmembers(self) -> list[TarInfo]:
+        return list(self)
+
+    def getnames(self) -> list[str]:
+        return list(self.table.names)
+
+    def getmember(self, name: str) -> TarInfo:
+        try:
+            return self.table.tarinfo(self.index[name.rstrip("/")])
+        except KeyError:
+            raise KeyError("filename %r not found" % name) from None
+
+    def link_target(self, member: TarInfo) -> TarInfo:
+        "The member a hard or symbolic link points to, like TarFile does"
+        if member.issym():
+            linkname = posixpath.normpath(posixpath.join(posixpath.dirname(member.name), member.linkname))
+        else:
+            linkname = member.linkname
+        if (index := self.index.get(linkname)) is None:
+            raise KeyError("linkname %r not found" % linkname)
+        return self.table.tarinfo(index)
+
+    def extractfile(self, member: str | TarInfo) -> IO[bytes] | None:
+        if isinstance(member, str):
+            member = self.getmember(member)
+        if member.islnk() or member.issym():
+            return self.extractfile(self.link_target(member))
+        return self.tar.extractfile(member)
+
+    def extract(self, member: str | TarInfo, path: str = "") -> None:
+        "Writes a member below path"
+        if isinstance(member, str):
+            member = self.getmember(member)
+        target = os.path.join(path, member.name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if member.isdir():
+            os.makedirs(target, exist_ok=True)
+        elif member.issym():
+            os.symlink(member.linkname, target)
+        elif (f := self.extractfile(member)) is not None:
+            with f, open(target, "wb") as out:
+                shutil.copyfileobj(f, out)
+
+    def close(self) -> None:
+        self.tar.close()
+
+
+_tables: "weakref.WeakKeyDictionary[TarFile, MemberTable]" = weakref.WeakKeyDictionary()
+
+
+def member_table(tar: "TarFile | PackageArchive") -> MemberTable:
+    "The member table of a package, built once for all the rules checking it"
+    if isinstance(tar, PackageArchive):
+        return tar.table
+    if (table := _tables.get(tar)) is None:
+        table = _tables[tar] = MemberTable(tar)
+    return table
+
+
+class MemberKinds:
+    """
+    The kinds of regular files found in a package (see NAME_KINDS and MAGIC_KINDS)
+
+    by_name    -- kinds found from the member names
+    by_content -- kinds found from the first bytes of the members, None until sniffed
+    """
+
+    def __init__(self, tar: "TarFile | PackageArchive") -> None:
+        self.by_name: set[str] = set()
+        self.by_content: set[str] | None = None
+        table = member_table(tar)
+        for index, name in enumerate(table.names):
+            if table.isfile(index):
+                self.by_name.update(kind for kind, suffixes in NAME_KINDS.items() if name.endswith(suffixes))
+
+    def sniff(self, tar: "TarFile | PackageArchive") -> set[str]:
+        "Reads the first bytes of the regular files of a package, once"
+        if self.by_content is None:
+            self.by_content = set()
+            for member in tar:
+                if not member.isfile():
+                    continue
+                f = tar.extractfile(member)
+                if f is None:
+                    continue
+                head = f.read(MAGIC_LENGTH)
+                f.close()
+                self.by_content.update(kind for kind, magic in MAGIC_KINDS.items() if head.startswith(magic))
+                if len(self.by_content) == len(MAGIC_KINDS):
+                    break
+        return self.by_content
+
+
+_kinds: "weakref.WeakKeyDictionary[TarFile | PackageArchive, MemberKinds]" = weakref.WeakKeyDictionary()
+
+
+def has_member_kind(tar: "TarFile | PackageArchive", kinds: Iterable[str]) -> bool:
+    """
+    Whether a package holds regular files of any of the given kinds. Member
+    contents are only read when no kind can be found from the names.
+    """
+    if (found := _kinds.get(tar)) is None:
+        found = _kinds[tar] = MemberKinds(tar)
+    kinds = set(kinds)
+    if kinds & found.by_name:
+        return True
+    if kinds.isdisjoint(MAGIC_KINDS):
+        return False
+    return not kinds.isdisjoint(found.sniff(tar))
@@ -0,0 +1,142 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+A streaming parser for the .MTREE file of packages.
+
+The file is decompressed and parsed line by line. Entries only keep their
+own keywords as written, on top of the /set defaults in force, which are
+shared with all the other entries, and are only split into attributes
+when first looked up.
+"""
+
+import gzip
+import re
+from collections.abc import Iterator, Mapping
+from tarfile import TarFile
+from typing import IO
+
+ESCAPE_RE = re.compile(rb"\\([0-7]{3}|\\)")
+
+
+def unescape(name: str) -> str:
+    "Decodes the \\ooo octal escapes (bytes of the UTF-8 name) of an mtree path"
+    if "\\" not in name:
+        return name
+    raw = ESCAPE_RE.sub(
+        lambda m: b"\\" if m.group(1) == b"\\" else bytes([int(m.group(1), 8)]),
+        name.encode("utf-8", "surrogateescape"),
+    )
+    return raw.decode("utf-8", "surrogateescape")
+
+
+def parse_keywords(values: str) -> dict[str, str]:
+    "Splits 'key=value key=value' into {key: value}, keywords without a value map to ''"
+    kvs = {}
+    for kv in values.split():
+        key, _, value = kv.partition("=")
+        kvs[key] = value
+    return kvs
+
+
+class MtreeEntry(Mapping[str, str]):
+    """
+    An entry of an mtree, as a read-only mapping of its attributes
+
+    path     -- the path of the entry, unescaped
+    defaults -- the /set attributes in force for the entry, shared between entries
+    """
+
+    __slots__ = ("path", "defaults", "_values", "_kvs")
+
+    def __init__(self, path: str, values: str, defaults: Mapping[str, str]) -> None:
+        self.path = path
+        self.defaults = defaults
+        self._values = values
+        self._kvs: dict[str, str] | None = None
+
+    @property
+    def keywords(self) -> dict[str, str]:
+        "The attributes written on the entry line itself"
+        if self._kvs is None:
+            self._kvs = parse_keywords(self._values)
+        return self._kvs
+
+    def __getitem__(self, key: str) -> str:
+        kvs = self.keywords
+        if key in kvs:
+            return kvs[key]
+        return self.defaults[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.keywords or key in self.defaults
+
+    def __iter__(self) -> Iterator[str]:
+        kvs = self.keywords
+        yield from kvs
+        yield from (key for key in self.defaults if key not in kvs)
+
+    def __len__(self) -> int:
+        kvs = self.keywords
+        return len(kvs) + sum(1 for key in self.defaults if key not in kvs)
+
+    def __repr__(self) -> str:
+        return "MtreeEntry(%r, %r)" % (self.path, dict(self))
+
+    @property
+    def type(self) -> str | None:
+        return self.get("type")
+
+    @property
+    def sha256digest(self) -> str | None:
+        return self.get("sha256digest")
+
+    @property
+    def size(self) -> int | None:
+        size = self.get("size")
+        return None if size is None else int(size)
+
+    @property
+    def time(self) -> float | None:
+        "Modification time, in seconds"
+        time = self.get("time")
+        return None if time is None else float(time)
+
+    @property
+    def mode(self) -> int | None:
+        mode = self.get("mode")
+        return None if mode is None else int(mode, 8)
+
+
+def parse_mtree(lines: Iterator[str]) -> Iterator[MtreeEntry]:
+    "Parses the lines of an mtree specification into its entries, lazily"
+    defaults: dict[str, str] = {}
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        head, _, values = line.partition(" ")
+        if head == "/set":
+            # copied, as entries seen so far keep referring to the previous defaults
+            defaults = {**defaults, **parse_keywords(values)}
+        elif head == "/unset":
+            keys = values.split()
+            defaults = {} if "all" in keys else {k: v for k, v in defaults.items() if k not in keys}
+        else:
+            yield MtreeEntry(unescape(head), values, defaults)
+
+
+def read_mtree(fileobj: IO[bytes]) -> Iterator[MtreeEntry]:
+    "Parses a gzip compressed mtree file, one line at a time"
+    with gzip.open(fileobj, "rt", encoding="utf-8", errors="surrogateescape") as f:
+        yield from parse_mtree(f)
+
+
+def tar_mtree(tar: TarFile) -> Iterator[MtreeEntry]:
+    "The entries of the .MTREE of a package, none if it has no .MTREE"
+    if ".MTREE" not in tar.getnames():
+        return
+    zfile = tar.extractfile(".MTREE")
+    if zfile is None:
+        raise IOError(".MTREE missing from tar archive")
+    yield from read_mtree(zfile)
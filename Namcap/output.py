@@ -0,0 +1,170 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+Where the results of namcap go.
+
+Results are handed to a sink, which buffers them and writes them out one
+package at a time, either as text for humans or as JSON Lines or SARIF for
+tools to load without parsing the text.
+"""
+
+import json
+import sys
+from abc import ABC, abstractmethod
+from typing import Any, NamedTuple, TextIO, TYPE_CHECKING
+
+import Namcap.tags
+import Namcap.version
+
+if TYPE_CHECKING:
+    from .types import Diagnostic
+
+SEVERITIES = {"E": "error", "W": "warning", "I": "info"}
+SARIF_LEVELS = {"E": "error", "W": "warning", "I": "note"}
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+
+
+class Result(NamedTuple):
+    """
+    A message reported about a package
+
+    package    -- the package name as shown to the user
+    rule       -- the name of the rule which reported it
+    severity   -- "E", "W" or "I"
+    diagnostic -- (tag with format specifiers, format arguments)
+    """
+
+    package: str
+    rule: str
+    severity: str
+    diagnostic: "Diagnostic"
+
+    @property
+    def tag(self) -> str:
+        "The tag name, the first word of the tag"
+        return self.diagnostic[0].split(" ", 1)[0]
+
+    @property
+    def args(self) -> list[Any]:
+        return list(self.diagnostic[1])
+
+    @property
+    def message(self) -> str:
+        return Namcap.tags.format_message(self.diagnostic)
+
+
+class ResultSink(ABC):
+    "The parent class of sinks, buffering the results of the current package"
+
+    def __init__(self, stream: TextIO) -> None:
+        self.stream = stream
+        self.pending: list[Result] = []
+        # the file the pending results are about
+        self.source: str | None = None
+
+    def add(self, result: Result) -> None:
+        self.pending.append(result)
+
+    def flush(self, source: str | None = None) -> None:
+        "Writes out the results of the current package, read from the source file"
+        self.source = source
+        if self.pending:
+            self.stream.write("".join(self.format(result) for result in self.pending))
+            self.pending = []
+        self.stream.flush()
+
+    @abstractmethod
+    def format(self, result: Result) -> str: ...
+
+    def error(self, message: str) -> None:
+        "Reports a problem which is not about a package, away from the results"
+        print(message, file=sys.stderr)
+
+    def close(self) -> None:
+        self.flush()
+
+
+class TextSink(ResultSink):
+    "Lines for humans, 'package E: message'"
+
+    colored = {
+        "E": "\033[91mE\033[00m",
+        "W": "\033[93mW\033[00m",
+        "I": "\033[92mI\033[00m",
+    }
+
+    def __init__(self, stream: TextIO) -> None:
+        super().__init__(stream)
+        self.color = stream.isatty()
+
+    def format(self, result: Result) -> str:
+        key = self.colored[result.severity] if self.color else result.severity
+        return "%s %s: %s\n" % (result.package, key, result.message)
+
+    def error(self, message: str) -> None:
+        self.flush()
+        print(message, file=self.stream)
+
+
+class JsonLinesSink(ResultSink):
+    "One JSON object per result"
+
+    def format(self, result: Result) -> str:
+        record = {
+            "package": result.package,
+            "file": self.source,
+            "rule": result.rule,
+            "severity": SEVERITIES[result.severity],
+            "tag": result.tag,
+            "args": result.args,
+            "message": result.message,
+        }
+        return json.dumps(record, default=str) + "\n"
+
+
+class SarifSink(ResultSink):
+    "A SARIF log with a single run, whose results are written as they come"
+
+    def __init__(self, stream: TextIO) -> None:
+        super().__init__(stream)
+        self.started = False
+        self.count = 0
+
+    def start(self) -> None:
+        tool = {"driver": {"name": "namcap", "version": Namcap.version.get_version()}}
+        # the results array is left open, close() ends the log
+        self.stream.write(
+            '{"version": "2.1.0", "$schema": %s, "runs": [{"tool": %s, "results": [\n'
+            % (json.dumps(SARIF_SCHEMA), json.dumps(tool))
+        )
+        self.started = True
+
+    def format(self, result: Result) -> str:
+        record = {
+            "ruleId": result.rule,
+            "level": SARIF_LEVELS[result.severity],
+            "message": {"text": result.message},
+            "locations": [{"physicalLocation": {"artifactLocation": {"uri": self.source or result.package}}}],
+            "properties": {"package": result.package, "tag": result.tag, "args": result.args},
+        }
+        separator = ",\n" if self.count else ""
+        self.count += 1
+        return separator + json.dumps(record, default=str)
+
+    def flush(self, source: str | None = None) -> None:
+        if not self.started:
+            self.start()
+        super().flush(source)
+
+    def close(self) -> None:
+        self.flush()
+        self.stream.write("\n]}]}\n")
+        self.stream.flush()
+
+
+sinks: dict[str, type[ResultSink]] = {
+    "text": TextSink,
+    "jsonl": JsonLinesSink,
+    "sarif": SarifSink,
+}
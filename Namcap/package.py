@@ -2,9 +2,10 @@
 # SPDX-License-Identifier: GPL-2.0-or-later
 
 import collections
-import gzip
+from collections.abc import Mapping
+import functools
 from tarfile import TarFile
-from typing import Any, TYPE_CHECKING, Generator
+from typing import Any, Callable, TYPE_CHECKING, Generator
 import os
 import re
 import subprocess
@@ -13,11 +14,31 @@ import sys
 import pyalpm
 import pycman.config
 
+import Namcap.cache
+import Namcap.mtree
+import Namcap.refdb
+import Namcap.tree
+from .pkgbuild import PkgbuildModel
 
 if TYPE_CHECKING:
     from .types import FormatArgs
 
-pyalpm_handle = pycman.config.init_with_config("/etc/pacman.conf")
+PACMAN_CONF = "/etc/pacman.conf"
+
+# Created on first use by get_alpm_handle(), according to configure_alpm()
+pyalpm_handle: pyalpm.Handle | None = None
+alpm_config: dict[str, str | None] = {"config": PACMAN_CONF, "root": None, "dbpath": None}
+
+# Repository databases resolved against instead of the local database, see configure_refdb()
+refdb_paths: list[str] = []
+reference_db: "Namcap.refdb.ReferenceDatabase | None" = None
+
+# Packages looked up by load_from_db(), shared by all the packages checked in a run
+loaded_packages: dict[tuple[str, str | None], "PacmanPackage | None"] = {}
+
+MAKEPKG_CONF = "/etc/makepkg.conf"
+# parsepkgbuild runs in restricted bash, which only allows sourcing files without a slash
+SOURCE_RE = re.compile(r"""^\s*(?:source|\.)\s+["']?([^\s/"';]+)""", re.MULTILINE)
 
 DEPENDS_RE = re.compile(r"([^<>=:]+)([<>]?=.*)?(: .*)?")
 SODEPENDS_RE = re.compile(r"([^:]+)(: .*)?")
@@ -63,8 +84,24 @@ class PacmanPackage(collections.abc.MutableMapping[str, Any]):
         "license": "licenses",
     }
 
+    # Variables that only the bash parser can provide; packages loaded from
+    # a .SRCINFO fetch them on first access
+    deferred_vars = ["setvars", "pkgfunction"]
+    # Their values when the PKGBUILD turns out not to parse, reporting nothing
+    deferred_defaults = {"setvars": [], "pkgfunction": "function"}
+
     pkgbuild: list[str]
 
+    @functools.cached_property
+    def pkgbuild_model(self) -> PkgbuildModel:
+        "Tokenized model of the PKGBUILD lines, shared by the rules scanning them"
+        return PkgbuildModel(self.pkgbuild)
+
+    @functools.cached_property
+    def file_paths(self) -> frozenset[str]:
+        "The paths of the files of a package from a database, without trailing slashes"
+        return frozenset(name.rstrip("/") for name, _, _ in self["files"])
+
     @classmethod
     def canonical_varname(cls, varname):
         try:
@@ -85,6 +122,9 @@ class PacmanPackage(collections.abc.MutableMapping[str, Any]):
         # a dictionary { package => [reasons why it is needed] }
         self.detected_deps: dict[str, list[tuple[str, FormatArgs]]] = collections.defaultdict(list)
         self._data = {}
+        self._deferred: Callable[[], None] | None = None
+        # set when the PKGBUILD behind a .SRCINFO does not parse
+        self.unparsable = False
 
         # Init from a dictionary
         if isinstance(data, dict):
@@ -129,14 +169,20 @@ class PacmanPackage(collections.abc.MutableMapping[str, Any]):
         return len(self._data)
 
     def __getitem__(self, key):
-        return self._data[self.canonical_varname(key)]
+        k = self.canonical_varname(key)
+        if k not in self._data and k in self.deferred_vars and self._deferred is not None:
+            self._deferred()
+        return self._data[k]
 
     def __setitem__(self, key, value):
         k = self.canonical_varname(key)
         self._data[k] = value
 
     def __contains__(self, key):
-        return self.canonical_varname(key) in self._data
+        k = self.canonical_varname(key)
+        if k not in self._data and k in self.deferred_vars and self._deferred is not None:
+            self._deferred()
+        return k in self._data
 
     def __delitem__(self, key):
         del self._data[self.canonical_varname(key)]
@@ -185,11 +231,9 @@ class PacmanPackage(collections.abc.MutableMapping[str, Any]):
             return "PacmanPackage(%s,[%s])" % (repr(self._data), children)
 
 
-def load_from_pkgbuild(path):
-    # Load all the data like we normally would
-    workingdir = os.path.dirname(path)
-    if workingdir == "":
-        workingdir = None
+def run_parsepkgbuild(path: str) -> str | None:
+    "Runs parsepkgbuild on a PKGBUILD, returns its output or None if the PKGBUILD is invalid"
+    workingdir = os.path.dirname(path) or None
     filename = os.path.basename(path)
     process = subprocess.Popen(
         ["parsepkgbuild", filename], stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=workingdir
@@ -199,24 +243,194 @@ def load_from_pkgbuild(path):
     err = err_b.decode("utf-8", "ignore")
     # this means parsepkgbuild returned an error, so we are not valid
     if process.returncode > 0:
+        # away from the results, which may be written to stdout as JSON
         if out:
-            print("Error:", out)
+            print("Error:", out, file=sys.stderr)
         if err:
-            print("Error:", err, file=sys.stdout)
+            print("Error:", err, file=sys.stderr)
         return None
-    ret = PacmanPackage(db=out)
+    return out
+
+
+def user_makepkg_conf() -> str:
+    "The makepkg configuration of the user, which overrides MAKEPKG_CONF, as makepkg looks for it"
+    config_home = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+    path = os.path.join(config_home, "pacman", "makepkg.conf")
+    return path if os.access(path, os.R_OK) else os.path.expanduser("~/.makepkg.conf")
+
+
+def parsepkgbuild_cache_key(path: str, content: bytes) -> str:
+    """
+    Computes the cache key of the parsepkgbuild output for a PKGBUILD: its
+    content, the content of the files it sources, the makepkg configuration
+    and the CARCH it is parsed for
+    """
+    directory = os.path.dirname(path)
+    parts: list[bytes | str] = [
+        content,
+        Namcap.cache.file_digest(MAKEPKG_CONF),
+        Namcap.cache.file_digest(user_makepkg_conf()),
+        os.environ.get("CARCH", ""),
+    ]
+    seen = set()
+    todo = [content]
+    while todo:
+        for name in SOURCE_RE.findall(todo.pop().decode("utf-8", "ignore")):
+            if name in seen:
+                continue
+            seen.add(name)
+            try:
+                with open(os.path.join(directory, name), "rb") as f:
+                    sourced = f.read()
+            except OSError:
+                sourced = b""
+            parts += [name, sourced]
+            todo.append(sourced)
+    return Namcap.cache.make_key(*parts)
+
+
+def cached_parsepkgbuild(path: str, content: bytes | None = None) -> str | None:
+    "Like run_parsepkgbuild(), but reuses the output of earlier runs on identical input"
+    if content is None:
+        with open(path, "rb") as f:
+            content = f.read()
+    key = parsepkgbuild_cache_key(path, content)
+    cached = Namcap.cache.load("parsepkgbuild", key)
+    if cached is not None:
+        return cached.decode("utf-8")
+    out = run_parsepkgbuild(path)
+    if out is not None:
+        Namcap.cache.store("parsepkgbuild", key, out.encode("utf-8"))
+    return out
+
+
+def srcinfo_is_fresh(path: str) -> bool:
+    "Checks whether a PKGBUILD has a .SRCINFO next to it which is not older than the PKGBUILD"
+    if os.path.basename(path) != "PKGBUILD":
+        return False
+    srcinfo = os.path.join(os.path.dirname(path), ".SRCINFO")
+    try:
+        return os.stat(srcinfo).st_mtime_ns >= os.stat(path).st_mtime_ns
+    except OSError:
+        return False
+
+
+def _srcinfo_values(fields: dict[str, list[str]]) -> dict[str, list[str]]:
+    "Turns .SRCINFO fields into the variables parsepkgbuild would print"
+    values = {}
+    for key, items in fields.items():
+        if key in ("pkgbase", "pkgver", "pkgrel", "epoch"):
+            continue
+        # an empty value in a package section clears the pkgbase value
+        items = [i for i in items if i]
+        if items:
+            values[key] = items
+    if "pkgver" in fields and "pkgrel" in fields:
+        values["version"] = ["%s-%s" % (fields["pkgver"][0], fields["pkgrel"][0])]
+    return values
+
+
+def load_from_srcinfo(path: str) -> PacmanPackage | None:
+    """
+    Loads a .SRCINFO file into the same structure as the output of parsepkgbuild.
+    The variables which are only known to bash (see PacmanPackage.deferred_vars)
+    are left out; load_from_pkgbuild() arranges for them to be loaded on demand.
+    Returns None if the file is not a usable .SRCINFO.
+    """
+    pkgbase: dict[str, list[str]] = {}
+    sections: list[dict[str, list[str]]] = []
+    current = None
+    with open(path, errors="ignore") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            key, sep, value = line.partition("=")
+            if not sep:
+                return None
+            key = key.strip()
+            value = value.strip()
+            if key == "pkgbase":
+                current = pkgbase
+            elif key == "pkgname":
+                current = {}
+                sections.append(current)
+            elif current is None:
+                return None
+            current.setdefault(key, []).append(value)
+
+    if not sections or "pkgver" not in pkgbase or "pkgrel" not in pkgbase:
+        return None
+
+    # variables set in a package section override the pkgbase ones
+    packages = [PacmanPackage(data=_srcinfo_values(pkgbase | section)) for section in sections]
+    if len(packages) == 1:
+        return packages[0]
+
+    ret = PacmanPackage(data=_srcinfo_values(pkgbase))
+    # like parsepkgbuild, only the subpackages carry a version
+    del ret["version"]
+    ret["split"] = ["1"]
+    ret["base"] = pkgbase["pkgbase"][0]
+    ret["names"] = [p["name"] for p in packages]
+    ret.is_split = True
+    ret.subpackages = packages
+    return ret
+
+
+def _defer_bash_variables(pkginfo: PacmanPackage, path: str) -> None:
+    "Arranges for the variables missing from a .SRCINFO to be loaded from the PKGBUILD on demand"
+    packages = [pkginfo] + (pkginfo.subpackages if pkginfo.is_split else [])
+
+    def load() -> None:
+        for p in packages:
+            p._deferred = None
+        out = cached_parsepkgbuild(path)
+        if out is None:
+            pkginfo.unparsable = True
+            for p in packages:
+                for var, value in PacmanPackage.deferred_defaults.items():
+                    p.setdefault(var, value)
+            return
+        full = PacmanPackage(db=out)
+        by_name = {s["name"]: s for s in full.subpackages} if full.is_split else {}
+        for p in packages:
+            source = full if p is pkginfo else by_name.get(p["name"], full)
+            for var in PacmanPackage.deferred_vars:
+                if var in source:
+                    p[var] = source[var]
+
+    for p in packages:
+        p._deferred = load
+
+
+def load_from_pkgbuild(path):
+    with open(path, "rb") as f:
+        content = f.read()
+
+    ret = None
+    if srcinfo_is_fresh(path):
+        ret = load_from_srcinfo(os.path.join(os.path.dirname(path), ".SRCINFO"))
+        if ret is not None:
+            _defer_bash_variables(ret, path)
+    if ret is None:
+        # Load all the data like we normally would
+        out = cached_parsepkgbuild(path, content)
+        if out is None:
+            return None
+        ret = PacmanPackage(db=out)
 
     # Add a nice little .pkgbuild surprise
-    pkgbuild = open(path, errors="ignore")
-    ret.pkgbuild = pkgbuild.read().replace("\\\n", " ").splitlines()
-    pkgbuild.close()
+    text = content.decode("utf-8", "ignore").replace("\r\n", "\n").replace("\r", "\n")
+    ret.pkgbuild = text.replace("\\\n", " ").splitlines()
 
     return ret
 
 
-def load_from_alpm(pmpkg: pyalpm.Package) -> PacmanPackage:
+def load_from_alpm(pmpkg: "pyalpm.Package | Namcap.refdb.RefPackage | Namcap.tree.TreePackage") -> PacmanPackage:
     variables = [
         "name",
+        "base",
         "version",
         "conflicts",
         "url",
@@ -242,21 +456,109 @@ def load_from_alpm(pmpkg: pyalpm.Package) -> PacmanPackage:
     return PacmanPackage(data=values)
 
 
+def configure_alpm(root: str | None = None, dbpath: str | None = None, config: str | None = None) -> None:
+    """
+    Sets the pacman.conf, installation root and database path used by the pyalpm handle.
+    Like in pacman, the database lives below the root unless dbpath is given.
+    """
+    global pyalpm_handle
+    alpm_config.update(config=config or PACMAN_CONF, root=root, dbpath=dbpath)
+    pyalpm_handle = None
+    loaded_packages.clear()
+
+
+def get_alpm_handle() -> pyalpm.Handle:
+    "Returns the pyalpm handle, creating it on first use"
+    global pyalpm_handle
+    if pyalpm_handle is None:
+        config = pycman.config.PacmanConfig(conf=alpm_config["config"])
+        root = alpm_config["root"]
+        if root is not None:
+            config.options["RootDir"] = root
+            config.options["DBPath"] = os.path.join(root, "var/lib/pacman/")
+        if alpm_config["dbpath"] is not None:
+            config.options["DBPath"] = alpm_config["dbpath"]
+        pyalpm_handle = config.initialize_alpm()
+    return pyalpm_handle
+
+
+def configure_refdb(paths: list[str]) -> None:
+    """
+    Resolves packages against the given repository databases (.db or .files
+    tarballs, or directories holding them) instead of the installed packages
+    """
+    global refdb_paths, reference_db
+    refdb_paths = list(paths)
+    reference_db = None
+    loaded_packages.clear()
+
+
+def get_reference_db() -> "Namcap.refdb.ReferenceDatabase | None":
+    "Returns the reference database, loading it on first use, None if not configured"
+    global reference_db
+    if reference_db is None and refdb_paths:
+        reference_db = Namcap.refdb.load_reference_db(refdb_paths)
+    return reference_db
+
+
+def database_fingerprint() -> list[str]:
+    """
+    Describes the state of the databases packages are resolved against: the paths,
+    sizes and modification times of the reference databases, of the local database
+    directory (which changes as packages are installed, upgraded or removed) and
+    of the sync databases
+    """
+    paths = [db for path in refdb_paths for db in Namcap.refdb.find_sync_dbs(path)]
+    dbpath = get_alpm_handle().dbpath
+    paths.append(os.path.join(dbpath, "local"))
+    syncdir = os.path.join(dbpath, "sync")
+    if os.path.isdir(syncdir):
+        paths.extend(os.path.join(syncdir, name) for name in sorted(os.listdir(syncdir)))
+    parts = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            parts.append(path)
+            continue
+        parts.append("%s:%d:%d" % (os.path.abspath(path), st.st_size, st.st_mtime_ns))
+    return parts
+
+
 def load_from_tarball(path: str) -> PacmanPackage | None:
     try:
-        p = pyalpm_handle.load_pkg(path)
+        p = get_alpm_handle().load_pkg(path)
     except pyalpm.error:
         return None
 
     return load_from_alpm(p)
 
 
+def load_from_tree(tree: Namcap.tree.DirectoryTree) -> PacmanPackage:
+    "Loads the package of an unpacked package, from its .PKGINFO"
+    return load_from_alpm(Namcap.tree.TreePackage(tree))
+
+
 def load_from_db(pkgname, dbname=None):
+    """
+    Loads a package, or the first provider of pkgname, from the database dbname
+    (the local one, or the reference database, by default), once per run
+    """
+    key = (pkgname, dbname)
+    if key not in loaded_packages:
+        loaded_packages[key] = lookup_db(pkgname, dbname)
+    return loaded_packages[key]
+
+
+def lookup_db(pkgname, dbname):
+    if dbname is None and (refdb := get_reference_db()) is not None:
+        ref = refdb.get_pkg(pkgname) or refdb.find_provider(pkgname)
+        return None if ref is None else load_from_alpm(ref)
     if dbname is None:
         # default is loading local database
-        db = pyalpm_handle.get_localdb()
+        db = get_alpm_handle().get_localdb()
     else:
-        db = pyalpm_handle.register_syncdb(dbname, 0)
+        db = get_alpm_handle().register_syncdb(dbname, 0)
     p = db.get_pkg(pkgname)
 
     if p is None:
@@ -269,7 +571,7 @@ def load_from_db(pkgname, dbname=None):
 def load_testing_package(pkgname: str) -> PacmanPackage | None:
     "Loads the testing version of a package, None if not found."
     testing_dbs = [
-        db for db in pyalpm_handle.get_syncdbs() if db.name in ("core-testing", "multilib-testing", "extra-testing")
+        db for db in get_alpm_handle().get_syncdbs() if db.name in ("core-testing", "multilib-testing", "extra-testing")
     ]
     for db in testing_dbs:
         p = db.get_pkg(pkgname)
@@ -280,7 +582,17 @@ def load_testing_package(pkgname: str) -> PacmanPackage | None:
 
 
 def get_installed_packages():
-    return pyalpm_handle.get_localdb().pkgcache
+    "The packages dependencies are resolved against, installed ones unless there is a reference database"
+    if (refdb := get_reference_db()) is not None:
+        return refdb.pkgcache
+    return get_alpm_handle().get_localdb().pkgcache
+
+
+def get_file_owners(path: str) -> list[str]:
+    "Names of the packages holding a path (without leading slash)"
+    if (refdb := get_reference_db()) is not None:
+        return refdb.owners.get(path, [])
+    return [pkg.name for pkg in get_installed_packages() if any(name == path for name, _, _ in pkg.files)]
 
 
 def lookup_provider(pkgname, db):
@@ -292,30 +604,11 @@ def lookup_provider(pkgname, db):
 
 def mtree_line(line: str) -> tuple[str, dict[str, str]]:
     "returns head, {key:value}"
-    # todo, un-hex the escaped chars
     head, _, values = line.partition(" ")
-    kvs = dict(kv.split("=") for kv in values.split(" "))
-    return head, kvs
+    return Namcap.mtree.unescape(head), Namcap.mtree.parse_keywords(values)
 
 
-def load_mtree(tar: TarFile) -> Generator[tuple[str, dict[str, str]]]:
+def load_mtree(tar: TarFile) -> Generator[tuple[str, Mapping[str, str]]]:
     "takes a tar object, returns (path, {attributes})"
-    if ".MTREE" not in tar.getnames():
-        raise StopIteration
-    zfile = tar.extractfile(".MTREE")
-    if zfile is None:
-        raise IOError(".MTREE missing from tar archive")
-    text = gzip.open(zfile).read().decode("utf-8")
-    defaults = {}
-    for line in text.split("\n"):
-        if not line:
-            continue
-        if line.startswith("#"):
-            continue
-        head, kvs = mtree_line(line)
-        if head == "/set":
-            defaults = kvs
-        attr: dict[str, str] = {}
-        attr.update(defaults)
-        attr.update(kvs)
-        yield head, attr
+    for entry in Namcap.mtree.tar_mtree(tar):
+        yield entry.path, entry
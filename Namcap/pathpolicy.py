@@ -0,0 +1,253 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+The path policies checked by the path-based rules, in a single table.
+
+All the prefixes of the table are compiled into one trie and all the
+patterns into one regular expression, so that classifying the members of
+a package takes a single walk over their names, whose result is shared by
+all the rules of the run. Rules then only look at the members carrying the
+labels they are interested in.
+"""
+
+import os
+import re
+import weakref
+from tarfile import TarFile
+from typing import NamedTuple
+
+from Namcap.members import member_table
+
+
+class PathPolicy(NamedTuple):
+    """
+    A path policy, matched either by prefix or by pattern
+
+    label     -- what rules look the matching members up by, "<group>:<name>" if a rule
+                 iterates over a group of policies
+    prefix    -- matches names starting with it (directory names end with "/")
+    ancestors -- also match the parent directories of the prefix
+    pattern   -- matches names (without trailing "/") in which the regex is found
+    dep       -- the dependency implied by a matching member
+    reason    -- the tag explaining the dependency
+    """
+
+    label: str
+    prefix: str | None = None
+    ancestors: bool = False
+    pattern: str | None = None
+    dep: str | None = None
+    reason: str | None = None
+
+
+policies = [
+    # directoryname
+    *(
+        PathPolicy("fhs-valid", prefix=prefix, ancestors=True)
+        for prefix in [
+            "etc/",
+            "opt/",
+            "lib/modules",
+            "usr/bin/",
+            "usr/include/",
+            "usr/lib/",
+            "usr/lib32/",
+            "usr/sbin/",
+            "usr/share/",
+            "usr/src/",
+            "var/cache/",
+            "var/lib/",
+            "var/log/",
+            "var/opt/",
+            "var/spool/",
+            "var/state/",
+            ".PKGINFO",
+            ".INSTALL",
+            ".CHANGELOG",
+            ".MTREE",
+            ".BUILDINFO",
+        ]
+    ),
+    *(
+        PathPolicy("fhs-valid-mingw", prefix=prefix, ancestors=True)
+        for prefix in [
+            "usr/x86_64-w64-mingw32/lib/",
+            "usr/x86_64-w64-mingw32/bin/",
+            "usr/x86_64-w64-mingw32/include/",
+            "usr/i686-w64-mingw32/lib/",
+            "usr/i686-w64-mingw32/bin/",
+            "usr/i686-w64-mingw32/include/",
+        ]
+    ),
+    *(PathPolicy("fhs-forbidden", prefix=prefix) for prefix in ["tmp/", "var/tmp/", "run/", "var/run/", "var/lock/"]),
+    # fhs-manpages and fhs-infopages
+    PathPolicy("man-fhs", prefix="usr/share/man"),
+    PathPolicy("man-non-fhs", prefix="usr/man"),
+    PathPolicy("man-component", pattern=r"(?:^|/)man(?:/|$)"),
+    PathPolicy("info-fhs", prefix="usr/share/info"),
+    PathPolicy("info-non-fhs", prefix="usr/info"),
+    PathPolicy("info-component", pattern=r"(?:^|/)info(?:/|$)"),
+    # rubypaths
+    PathPolicy("site-ruby", prefix="usr/lib/ruby/site_ruby"),
+    # elfpaths
+    *(
+        PathPolicy("elf-valid", prefix=prefix)
+        for prefix in ["bin/", "sbin/", "usr/bin/", "usr/sbin/", "lib/", "usr/lib/", "usr/lib32/"]
+    ),
+    PathPolicy("elf-questionable", prefix="opt/"),
+    # dbus1location and systemdlocation
+    PathPolicy("dbus-1-location", prefix="etc/dbus-1/system.d/"),
+    PathPolicy("systemd-location", prefix="etc/systemd/system/"),
+    # scrollkeeper
+    PathPolicy("scrollkeeper", pattern=r"var.*/scrollkeeper/?$"),
+    # pathdepends
+    PathPolicy(
+        "pathdepends:dconf",
+        pattern=r"^usr/share/glib-2\.0/schemas$",
+        dep="dconf",
+        reason="dconf-needed-for-glib-schemas",
+    ),
+    PathPolicy(
+        "pathdepends:glib2",
+        pattern=r"^usr/lib/gio/modules/.*\.so$",
+        dep="glib2",
+        reason="glib2-needed-for-gio-modules",
+    ),
+    PathPolicy(
+        "pathdepends:hicolor-icon-theme",
+        pattern=r"^usr/share/icons/hicolor$",
+        dep="hicolor-icon-theme",
+        reason="hicolor-icon-theme-needed-for-hicolor-dir",
+    ),
+    # hookdepends
+    PathPolicy(
+        "hookdepends:desktop-file-utils", pattern=r"^usr/share/applications/.*\.desktop$", dep="desktop-file-utils"
+    ),
+    PathPolicy("hookdepends:shared-mime-info", pattern=r"^usr/share/mime$", dep="shared-mime-info"),
+]
+
+
+def policy_prefixes(label: str) -> list[str]:
+    "The prefixes of the policies with a label"
+    return [policy.prefix for policy in policies if policy.label == label and policy.prefix is not None]
+
+
+def policy_group(group: str) -> list[PathPolicy]:
+    "The policies whose label is <group>:<name>"
+    return [policy for policy in policies if policy.label.startswith(group + ":")]
+
+
+class _TrieNode:
+    __slots__ = ("children", "labels", "ancestor_labels")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _TrieNode] = {}
+        # policies whose prefix ends here
+        self.labels: tuple[str, ...] = ()
+        # ancestors policies whose prefix ends here or below
+        self.ancestor_labels: tuple[str, ...] = ()
+
+
+class PathClassifier:
+    "The policies compiled into a prefix trie and a combined regular expression"
+
+    def __init__(self, policies: list[PathPolicy]) -> None:
+        self.root = _TrieNode()
+        patterns: list[str] = []
+        self.groups: dict[str, PathPolicy] = {}
+        for policy in policies:
+            if policy.prefix is not None:
+                node = self.root
+                path = [node]
+                for c in policy.prefix:
+                    node = node.children.setdefault(c, _TrieNode())
+                    path.append(node)
+                node.labels += (policy.label,)
+                if policy.ancestors:
+                    for node in path:
+                        if policy.label not in node.ancestor_labels:
+                            node.ancestor_labels += (policy.label,)
+            if policy.pattern is not None:
+                group = "p%d" % len(self.groups)
+                self.groups[group] = policy
+                pattern = policy.pattern if policy.pattern.startswith("^") else ".*?" + policy.pattern
+                # every policy pattern is an optional lookahead, so they are all tried at once
+                patterns.append("(?:(?=(?P<%s>%s))|)" % (group, pattern))
+        self.regex = re.compile("^" + "".join(patterns))
+        self._interned: dict[tuple[str, ...], frozenset[str]] = {}
+
+    def prefix_labels(self, path: str) -> list[str]:
+        "The labels of the prefixes path starts with, and of the ancestors prefixes starting with path"
+        labels: list[str] = []
+        node = self.root
+        for c in path:
+            child = node.children.get(c)
+            if child is None:
+                return labels
+            node = child
+            labels.extend(node.labels)
+        labels.extend(node.ancestor_labels)
+        return labels
+
+    def matched_policies(self, name: str) -> list[PathPolicy]:
+        "The pattern policies matching a name"
+        m = self.regex.match(name)
+        if m is None:
+            return []
+        return [self.groups[group] for group, value in m.groupdict().items() if value is not None]
+
+    def classify(self, name: str, isdir: bool) -> frozenset[str]:
+        "The labels of all policies matching a member name"
+        labels = self.prefix_labels(name + "/" if isdir else name)
+        labels.extend(policy.label for policy in self.matched_policies(name))
+        key = tuple(sorted(labels))
+        if (interned := self._interned.get(key)) is None:
+            interned = self._interned[key] = frozenset(key)
+        return interned
+
+
+class PathMatches:
+    """
+    The members of a package with the labels of the policies they match
+
+    table    -- the member table of the package
+    names    -- the normalized names of the members, in archive order
+    labels   -- the labels matched by each member
+    by_label -- { label => indexes of the members matching it }
+    """
+
+    def __init__(self, tar: TarFile, classifier: PathClassifier) -> None:
+        self.table = member_table(tar)
+        self.names: list[str] = []
+        self.labels: list[frozenset[str]] = []
+        self.by_label: dict[str, list[int]] = {}
+        for index, name in enumerate(self.table.names):
+            name = os.path.normpath(name)
+            labels = classifier.classify(name, self.table.isdir(index))
+            self.names.append(name)
+            self.labels.append(labels)
+            for label in labels:
+                self.by_label.setdefault(label, []).append(index)
+
+    def with_label(self, label: str) -> list[int]:
+        "Indexes of the members matching a label, in archive order"
+        return self.by_label.get(label, [])
+
+
+_classifier: PathClassifier | None = None
+_matches: "weakref.WeakKeyDictionary[TarFile, PathMatches]" = weakref.WeakKeyDictionary()
+
+
+def get_classifier() -> PathClassifier:
+    global _classifier
+    if _classifier is None:
+        _classifier = PathClassifier(policies)
+    return _classifier
+
+
+def path_matches(tar: TarFile) -> PathMatches:
+    "Classifies the members of a package, once for all the rules checking it"
+    if (matches := _matches.get(tar)) is None:
+        matches = _matches[tar] = PathMatches(tar, get_classifier())
+    return matches
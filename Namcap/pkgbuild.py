@@ -0,0 +1,112 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+A tokenized model of the PKGBUILD text, built once per PKGBUILD and shared
+by all the rules that scan it line by line.
+"""
+
+import re
+
+ASSIGNMENT_RE = re.compile(r"\s*([A-Za-z_][A-Za-z0-9_]*)\+?=(.*)$")
+FUNCTION_RE = re.compile(r"\s*(?:function\s+)?([^\s()=$'\"]+)\s*\(\s*\)")
+VARIABLE_RE = re.compile(r"\$(?:([A-Za-z_][A-Za-z0-9_]*)|\{([A-Za-z_][A-Za-z0-9_]*)\}?)")
+
+
+def split_comment(text: str) -> tuple[str, str | None]:
+    """
+    Splits a line into code and comment (None if there is no comment).
+    Like bash, a '#' only starts a comment at the beginning of a word and outside of quotes.
+    """
+    if "#" not in text:
+        return text, None
+    quote = None
+    escaped = False
+    for i, c in enumerate(text):
+        if escaped:
+            escaped = False
+        elif c == "\\" and quote != "'":
+            escaped = True
+        elif quote is not None:
+            if c == quote:
+                quote = None
+        elif c in "'\"":
+            quote = c
+        elif c == "#" and (i == 0 or text[i - 1].isspace()):
+            return text[:i], text[i + 1 :]
+    return text, None
+
+
+class PkgbuildLine:
+    """
+    A line of a PKGBUILD (with continuation lines already joined)
+
+    text        -- the line as written
+    code        -- the line without its comment
+    comment     -- the comment text after '#', or None
+    assignment  -- (name, value) if the line assigns a variable, else None
+    function    -- name of the function the line belongs to, or None
+    references  -- list of (variable name, offset in code right after the reference)
+    """
+
+    __slots__ = ("text", "code", "comment", "assignment", "function", "references")
+
+    def __init__(self, text: str, function: str | None) -> None:
+        self.text = text
+        self.code, self.comment = split_comment(text)
+        m = ASSIGNMENT_RE.match(self.code)
+        self.assignment = (m.group(1), m.group(2)) if m else None
+        self.function = function
+        self.references = [(m.group(1) or m.group(2), m.end()) for m in VARIABLE_RE.finditer(self.code)]
+
+    def references_variable(self, name: str) -> bool:
+        return any(ref == name for ref, _ in self.references)
+
+
+class PkgbuildModel:
+    """
+    All the lines of a PKGBUILD, with indexes over them
+
+    lines       -- list of PkgbuildLine
+    functions   -- { function name => range of line indexes }
+    """
+
+    def __init__(self, lines: list[str]) -> None:
+        self.lines: list[PkgbuildLine] = []
+        self.functions: dict[str, range] = {}
+        self._references: dict[str, list[tuple[PkgbuildLine, int]]] = {}
+
+        function = None
+        start = 0
+        depth = 0
+        for index, text in enumerate(lines):
+            if depth == 0 and function is None:
+                code, _ = split_comment(text)
+                if m := FUNCTION_RE.match(code):
+                    function = m.group(1)
+                    start = index
+            line = PkgbuildLine(text, function)
+            self.lines.append(line)
+            for name, end in line.references:
+                self._references.setdefault(name, []).append((line, end))
+
+            # braces of ${var} and {a,b} are balanced within a line
+            depth += line.code.count("{") - line.code.count("}")
+            if function is not None and depth <= 0 and "}" in line.code:
+                self.functions[function] = range(start, index + 1)
+                function = None
+                depth = 0
+
+    @property
+    def assignments(self) -> list[tuple[PkgbuildLine, str, str]]:
+        "All variable assignments, as (line, name, value)"
+        return [(line, *line.assignment) for line in self.lines if line.assignment is not None]
+
+    @property
+    def comments(self) -> list[str]:
+        "Text of the lines which only hold a comment"
+        return [line.comment for line in self.lines if line.comment is not None and not line.code.strip()]
+
+    def references(self, name: str) -> list[tuple[PkgbuildLine, int]]:
+        "All references to a variable, as (line, offset in code right after the reference)"
+        return self._references.get(name, [])
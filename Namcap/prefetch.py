@@ -0,0 +1,94 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+Reading package files ahead, while the current one is checked.
+
+On networked storage, checking packages one after the other leaves the CPU
+waiting for reads, then the storage waiting for the checks. A background
+thread reads the next few package files into the page cache instead, so
+that they are local by the time they are checked. How far it reads ahead
+is bounded both in files and in bytes, the page cache being memory too.
+"""
+
+import os
+import threading
+from collections.abc import Iterator
+
+CHUNK_SIZE = 1 << 20
+DEFAULT_BUDGET = 512 << 20
+
+
+def readahead(path: str, stop: threading.Event | None = None) -> None:
+    "Brings a file into the page cache, reading it through when the kernel can not be asked to"
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        # network filesystems do not always act on the advice, reading does
+        buf = bytearray(CHUNK_SIZE)
+        while (stop is None or not stop.is_set()) and os.readv(fd, [buf]) > 0:
+            pass
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class Prefetcher:
+    """
+    Iterates over file paths, reading up to depth files after the current one
+    ahead, as long as they add up to no more than budget bytes
+    """
+
+    def __init__(self, paths: list[str], depth: int = 2, budget: int = DEFAULT_BUDGET) -> None:
+        self.paths = paths
+        self.depth = depth
+        self.budget = budget
+        self.sizes = []
+        for path in paths:
+            try:
+                self.sizes.append(os.stat(path).st_size if os.path.isfile(path) else 0)
+            except OSError:
+                self.sizes.append(0)
+        # the index of the file being checked
+        self.current = -1
+        self.condition = threading.Condition()
+        self.stop = threading.Event()
+
+    def may_read(self, index: int) -> bool:
+        "Whether the file at index may be read ahead now"
+        if index <= self.current:
+            # already being checked, or done with
+            return True
+        return index <= self.current + self.depth and sum(self.sizes[self.current + 1 : index + 1]) <= self.budget
+
+    def run(self) -> None:
+        for index, path in enumerate(self.paths):
+            with self.condition:
+                self.condition.wait_for(lambda: self.stop.is_set() or self.may_read(index))
+                if self.stop.is_set():
+                    return
+                if index <= self.current or not self.sizes[index]:
+                    continue
+            readahead(path, self.stop)
+
+    def __iter__(self) -> Iterator[str]:
+        # the first file is read by its check right away
+        self.current = 0
+        thread = threading.Thread(target=self.run, name="namcap-prefetch", daemon=True)
+        thread.start()
+        try:
+            for index, path in enumerate(self.paths):
+                with self.condition:
+                    self.current = index
+                    self.condition.notify_all()
+                yield path
+        finally:
+            self.stop.set()
+            with self.condition:
+                self.condition.notify_all()
+            thread.join()
@@ -0,0 +1,165 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+A reference database built from local copies of repository databases.
+
+namcap can resolve dependencies against the packages of repository
+databases (the .db and .files tarballs of pacman repositories) instead of
+the packages installed on the host, so that a whole distribution snapshot
+can be checked against from a minimal container. The parsed databases are
+kept in the persistent cache, keyed by the files they were read from.
+"""
+
+import functools
+import json
+import os
+from collections.abc import Iterable
+
+import Namcap.cache
+import Namcap.decompress
+import Namcap.package
+
+DB_SUFFIXES = (".files", ".db")
+
+
+def parse_desc(text: str) -> dict[str, list[str]]:
+    "Parses the %FIELD% sections of a desc or files entry into { FIELD => lines }"
+    fields: dict[str, list[str]] = {}
+    current: list[str] | None = None
+    for line in text.splitlines():
+        if len(line) > 2 and line.startswith("%") and line.endswith("%"):
+            current = fields.setdefault(line[1:-1], [])
+        elif line and current is not None:
+            current.append(line)
+    return fields
+
+
+class RefPackage:
+    "A package of a repository database, with the attributes of pyalpm.Package used by namcap"
+
+    def __init__(self, fields: dict[str, list[str]]) -> None:
+        def first(field: str, default: str = "") -> str:
+            return fields.get(field, [default])[0]
+
+        self.name = first("NAME")
+        self.base = first("BASE", self.name)
+        self.version = first("VERSION")
+        self.desc = first("DESC")
+        self.url = first("URL")
+        self.arch = first("ARCH")
+        self.packager = first("PACKAGER")
+        self.builddate = int(first("BUILDDATE", "0"))
+        self.size = int(first("ISIZE", "0"))
+        self.groups = fields.get("GROUPS", [])
+        self.licenses = fields.get("LICENSE", [])
+        self.replaces = fields.get("REPLACES", [])
+        self.conflicts = fields.get("CONFLICTS", [])
+        self.provides = fields.get("PROVIDES", [])
+        self.depends = fields.get("DEPENDS", [])
+        self.optdepends = fields.get("OPTDEPENDS", [])
+        self.makedepends = fields.get("MAKEDEPENDS", [])
+        self.checkdepends = fields.get("CHECKDEPENDS", [])
+        # sizes and modes are not recorded in .files databases
+        self.files = [(path, 0, 0) for path in fields.get("FILES", [])]
+        self.backup: list[tuple[str, str]] = []
+        self.has_scriptlet = False
+
+    def __repr__(self) -> str:
+        return "RefPackage(%s %s)" % (self.name, self.version)
+
+
+def read_sync_db(path: str) -> list[dict[str, list[str]]]:
+    "Reads the entries of a repository database, merging the desc and files of each package"
+    entries: dict[str, dict[str, list[str]]] = {}
+    with Namcap.decompress.open_tarball(path) as tar:
+        for member in tar:
+            dirname, _, kind = member.name.rpartition("/")
+            if not member.isfile() or kind not in ("desc", "files"):
+                continue
+            f = tar.extractfile(member)
+            if f is None:
+                continue
+            entries.setdefault(dirname, {}).update(parse_desc(f.read().decode("utf-8", "replace")))
+            f.close()
+    return [fields for fields in entries.values() if "NAME" in fields]
+
+
+def load_sync_db(path: str) -> list[dict[str, list[str]]]:
+    "Reads a repository database, through the persistent cache"
+    st = os.stat(path)
+    key = Namcap.cache.make_key(os.path.abspath(path), str(st.st_mtime_ns), str(st.st_size))
+    if (cached := Namcap.cache.load("refdb", key)) is not None:
+        entries: list[dict[str, list[str]]] = json.loads(cached)
+        return entries
+    entries = read_sync_db(path)
+    Namcap.cache.store("refdb", key, json.dumps(entries).encode())
+    return entries
+
+
+def find_sync_dbs(path: str) -> list[str]:
+    """
+    Expands a directory into the repository databases it holds, preferring the
+    .files database of a repository to its .db, which lacks the file lists
+    """
+    if not os.path.isdir(path):
+        return [path]
+    repos: dict[str, str] = {}
+    for name in sorted(os.listdir(path)):
+        for suffix in DB_SUFFIXES:
+            if name.endswith(suffix):
+                repo = name[: -len(suffix)]
+                if repo not in repos or suffix == ".files":
+                    repos[repo] = os.path.join(path, name)
+    return list(repos.values())
+
+
+class ReferenceDatabase:
+    """
+    The packages of a set of repository databases, indexed. It also offers the
+    get_pkg() and pkgcache of a pyalpm database.
+
+    packages -- { package name => RefPackage }, the first repository wins, like in pacman
+    """
+
+    def __init__(self, packages: Iterable[RefPackage]) -> None:
+        self.packages: dict[str, RefPackage] = {}
+        for pkg in packages:
+            self.packages.setdefault(pkg.name, pkg)
+
+    @property
+    def pkgcache(self) -> list[RefPackage]:
+        return list(self.packages.values())
+
+    def get_pkg(self, name: str) -> RefPackage | None:
+        return self.packages.get(name)
+
+    @functools.cached_property
+    def owners(self) -> dict[str, list[str]]:
+        "{ path => names of the packages holding it }"
+        owners: dict[str, list[str]] = {}
+        for pkg in self.packages.values():
+            for path, _, _ in pkg.files:
+                owners.setdefault(path, []).append(pkg.name)
+        return owners
+
+    @functools.cached_property
+    def providers(self) -> dict[str, list[str]]:
+        "{ provision without version => names of the packages providing it }"
+        providers: dict[str, list[str]] = {}
+        for pkg in self.packages.values():
+            for provision in pkg.provides:
+                providers.setdefault(Namcap.package.strip_depend_info(provision), []).append(pkg.name)
+        return providers
+
+    def find_provider(self, name: str) -> RefPackage | None:
+        "The first package providing name"
+        names = self.providers.get(name)
+        return self.packages[names[0]] if names else None
+
+
+def load_reference_db(paths: list[str]) -> ReferenceDatabase:
+    "Builds the reference database of repository databases, or of the directories holding them"
+    return ReferenceDatabase(
+        RefPackage(fields) for path in paths for db in find_sync_dbs(path) for fields in load_sync_db(db)
+    )
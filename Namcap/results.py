@@ -0,0 +1,71 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+A cache of the results of whole packages.
+
+The same package files are often checked again (retried CI jobs, mirrors
+validating what they sync), so the results of a package are kept in the
+persistent cache, keyed by the sha256 of the package file, the rules run,
+the digest of the namcap sources (the rules and all the modules they rely
+on), the options changing what is reported, and the state of what the
+package was checked against (the pacman and reference databases and the
+library directories). A hit replays the results without opening the
+package.
+
+Results are stored as diagnostics, including the diagnostics nested in
+their arguments (the reasons of detected dependencies), the tags being
+formatted when shown: neither the tags file in use nor -m matter.
+"""
+
+import json
+from collections.abc import Iterable
+from typing import Any, TYPE_CHECKING
+
+import Namcap.cache
+import Namcap.libcache
+import Namcap.package
+from Namcap.output import Result
+
+if TYPE_CHECKING:
+    from .types import Diagnostic
+
+
+def make_key(filename: str, rules: Iterable[str], *options: str) -> str | None:
+    "The key of the results of a package file, None if it can not be read or the cache is disabled"
+    if not Namcap.cache.enabled:
+        return None
+    digest = Namcap.cache.file_digest(filename)
+    if not digest:
+        return None
+    root = Namcap.package.alpm_config["root"] or "/"
+    return Namcap.cache.make_key(
+        digest,
+        *sorted(rules),
+        Namcap.cache.code_digest(),
+        *options,
+        *Namcap.package.database_fingerprint(),
+        *Namcap.libcache.fingerprint(root),
+    )
+
+
+def diagnostic(tag: str, args: list[Any]) -> "Diagnostic":
+    "A diagnostic read back from JSON, with the diagnostics nested in its arguments"
+    return (tag, tuple([diagnostic(*nested) for nested in arg] if isinstance(arg, list) else arg for arg in args))
+
+
+def load(key: str) -> list[Result] | None:
+    "The results stored for a package, None if there are none"
+    cached = Namcap.cache.load("results", key)
+    if cached is None:
+        return None
+    return [
+        Result(package, rule, severity, diagnostic(tag, args))
+        for package, rule, severity, tag, args in json.loads(cached)
+    ]
+
+
+def store(key: str, results: list[Result]) -> None:
+    "Stores the results of a package"
+    entries = [[r.package, r.rule, r.severity, r.diagnostic[0], r.args] for r in results]
+    Namcap.cache.store("results", key, json.dumps(entries, default=str).encode())
@@ -7,24 +7,90 @@ and how they are meant to be used.
 """
 
 from abc import ABC, abstractmethod
+from collections.abc import Iterable
 from tarfile import TarFile
 from typing import TYPE_CHECKING
 
+from .members import has_member_kind, member_table
 from .package import PacmanPackage
+from .util import is_debug
 
 if TYPE_CHECKING:
     from .types import Diagnostic
 
 
+class DiagnosticList(list["Diagnostic"]):
+    """
+    A list of diagnostics which, given a limit, only keeps the first `limit`
+    diagnostics of each tag and counts the others
+    """
+
+    def __init__(self, limit: int | None = None) -> None:
+        super().__init__()
+        self.limit = limit
+        self.counts: dict[str, int] = {}
+
+    def append(self, diagnostic: "Diagnostic") -> None:
+        if self.limit is not None:
+            tag = diagnostic[0]
+            self.counts[tag] = self.counts.get(tag, 0) + 1
+            if self.counts[tag] > self.limit:
+                return
+        super().append(diagnostic)
+
+    def extend(self, diagnostics: Iterable["Diagnostic"]) -> None:
+        for diagnostic in diagnostics:
+            self.append(diagnostic)
+
+    def __iadd__(self, diagnostics: Iterable["Diagnostic"]) -> "DiagnosticList":  # type: ignore[override, misc]
+        self.extend(diagnostics)
+        return self
+
+    @property
+    def omitted(self) -> dict[str, int]:
+        "{ tag => number of diagnostics which were not kept }"
+        if self.limit is None:
+            return {}
+        return {tag: count - self.limit for tag, count in self.counts.items() if count > self.limit}
+
+
 class AbstractRule(ABC):
     "The parent class of all rules"
 
     enable: bool = True
 
-    def __init__(self) -> None:
-        self.errors: list[Diagnostic] = []
-        self.warnings: list[Diagnostic] = []
-        self.infos: list[Diagnostic] = []
+    # What a rule needs to have anything to check, so that it is not run at all otherwise:
+    # regular files of one of these kinds (see Namcap.members.NAME_KINDS and MAGIC_KINDS)
+    member_kinds: frozenset[str] | None = None
+    # members whose path starts with one of these prefixes
+    member_prefixes: tuple[str, ...] | None = None
+    # non-empty values for all these metadata fields
+    required_fields: tuple[str, ...] = ()
+    # a package which is not a debug package
+    skip_debug: bool = False
+
+    def __init__(self, report_infos: bool = True, limit: int | None = None) -> None:
+        # with a limit, only the first diagnostics of each tag are kept
+        self.errors: list[Diagnostic] = DiagnosticList(limit)
+        self.warnings: list[Diagnostic] = DiagnosticList(limit)
+        self.infos: list[Diagnostic] = DiagnosticList(limit)
+        # whether information tags will be shown, rules can skip the work only needed for them otherwise
+        self.report_infos = report_infos
+
+    @classmethod
+    def applies(cls, pkginfo: PacmanPackage, tar: TarFile | None = None) -> bool:
+        "Whether the inputs the rule needs are there, members are only looked at with a tarball"
+        if cls.skip_debug and is_debug(pkginfo):
+            return False
+        if not all(pkginfo.get(field) for field in cls.required_fields):
+            return False
+        if tar is not None:
+            if cls.member_prefixes is not None:
+                if not any(name.startswith(cls.member_prefixes) for name in member_table(tar).names):
+                    return False
+            if cls.member_kinds is not None and not has_member_kind(tar, cls.member_kinds):
+                return False
+        return True
 
 
 class PkgInfoRule(AbstractRule):
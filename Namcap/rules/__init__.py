@@ -1,66 +1,296 @@
 # Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
 # SPDX-License-Identifier: GPL-2.0-or-later
 
-from types import ModuleType
-
-import Namcap.ruleclass
-
-# Tarball rules
-# PKGBUILD and metadata rules
-from . import (  # noqa: F401
-    anyelf,
-    arrays,
-    badbackups,
-    carch,
-    dbus1location,
-    elffiles,
-    emptydir,
-    externalhooks,
-    extravars,
-    fhs,
-    filenames,
-    fileownership,
-    gnomemime,
-    hardlinks,
-    hookdepends,
-    infodirectory,
-    invalidstartdir,
-    javafiles,
-    libtool,
-    licensepkg,
-    lotsofdocs,
-    makedepends,
-    makepkgfunctions,
-    missingbackups,
-    missingvars,
-    pathdepends,
-    pcdepends,
-    perllocal,
-    permissions,
-    pkginfo,
-    pkgnameindesc,
-    py_mtime,
-    pydepends,
-    qmldepends,
-    rpath,
-    runpath,
-    scrollkeeper,
-    sfurl,
-    shebangdepends,
-    sodepends,
-    sphinxbuildcachefiles,
-    splitpkgbuild,
-    symlink,
-    systemdlocation,
-    unusedsodepends,
-)
-
-all_rules = {}
-for name, value in dict(locals()).items():
-    if not isinstance(value, ModuleType):
-        continue
-    if name == "Namcap.ruleclass":
-        continue
-    for n, v in value.__dict__.items():
-        if isinstance(v, type) and issubclass(v, Namcap.ruleclass.AbstractRule) and hasattr(v, "name"):
-            all_rules[v.name] = v
+"""
+The registry of all Namcap rules.
+
+Rule modules are only imported once one of their rules is used, so that
+listing or selecting rules does not pay for the dependencies of all the
+others (pyelftools, license-expression, pyalpm...).
+"""
+
+import importlib
+from collections.abc import Iterator, Mapping
+from typing import NamedTuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from Namcap.ruleclass import AbstractRule
+
+
+class RuleMetadata(NamedTuple):
+    "What is known about a rule without importing it"
+
+    name: str
+    module: str
+    classname: str
+    # name of the base class in Namcap.ruleclass
+    kind: str
+    description: str
+    enable: bool = True
+
+
+# New rules must be registered here, with the same attributes as their class
+rule_metadata: dict[str, RuleMetadata] = {
+    meta.name: meta
+    for meta in [
+        RuleMetadata(
+            "anyelf",
+            "anyelf",
+            "package",
+            "TarballRule",
+            "Check for ELF files to see if a package should be 'any' architecture",
+        ),
+        RuleMetadata("array", "arrays", "package", "PkgbuildRule", "Verifies that array variables are actually arrays"),
+        RuleMetadata("badbackups", "badbackups", "package", "PkgbuildRule", "Checks for bad backup entries"),
+        RuleMetadata("carch", "carch", "package", "PkgbuildRule", "Verifies that no specific host type is used"),
+        RuleMetadata(
+            "dbus1location",
+            "dbus1location",
+            "dbus1locationRule",
+            "TarballRule",
+            "Checks for dbus files in /etc/dbus1/system.d/",
+        ),
+        RuleMetadata(
+            "elfexecstack", "elffiles", "ELFExecStackRule", "TarballRule", "Check for executable stacks in ELF files."
+        ),
+        RuleMetadata("elfgnurelro", "elffiles", "ELFGnuRelroRule", "TarballRule", "Check for FULL RELRO in ELF files."),
+        RuleMetadata("elfnopie", "elffiles", "NoPIERule", "TarballRule", "Check for no PIE ELF files."),
+        RuleMetadata(
+            "elfnoshstk",
+            "elffiles",
+            "ELFSHSTKRule",
+            "TarballRule",
+            "Check for shadow stack support in ELF files.",
+            enable=False,
+        ),
+        RuleMetadata(
+            "elfpaths", "elffiles", "ELFPaths", "TarballRule", "Check about ELF files outside some standard paths."
+        ),
+        RuleMetadata(
+            "elftextrel", "elffiles", "ELFTextRelocationRule", "TarballRule", "Check for text relocations in ELF files."
+        ),
+        RuleMetadata(
+            "elfunstripped", "elffiles", "ELFUnstrippedRule", "TarballRule", "Check for unstripped ELF files."
+        ),
+        RuleMetadata("emptydir", "emptydir", "package", "TarballRule", "Warns about empty directories in a package"),
+        RuleMetadata(
+            "externalhooks",
+            "externalhooks",
+            "ExternalHooksRule",
+            "TarballRule",
+            "Check the .INSTALL for commands covered by hooks",
+        ),
+        RuleMetadata(
+            "extravars",
+            "extravars",
+            "package",
+            "PkgbuildRule",
+            "Verifies that extra variables start with an underscore",
+        ),
+        RuleMetadata("directoryname", "fhs", "FHSRule", "TarballRule", "Checks for standard directories."),
+        RuleMetadata(
+            "fhs-infopages", "fhs", "FHSInfoPagesRule", "TarballRule", "Verifies correct installation of info pages"
+        ),
+        RuleMetadata(
+            "fhs-manpages", "fhs", "FHSManpagesRule", "TarballRule", "Verifies correct installation of man pages"
+        ),
+        RuleMetadata(
+            "rubypaths", "fhs", "RubyPathsRule", "TarballRule", "Verifies correct usage of folders by ruby packages"
+        ),
+        RuleMetadata("filenames", "filenames", "package", "TarballRule", "Checks for invalid filenames."),
+        RuleMetadata("fileownership", "fileownership", "package", "TarballRule", "Checks file ownership."),
+        RuleMetadata("gnomemime", "gnomemime", "package", "TarballRule", "Checks for generated GNOME mime files"),
+        RuleMetadata(
+            "hardlinks", "hardlinks", "package", "TarballRule", "Look for cross-directory/partition hard links"
+        ),
+        RuleMetadata(
+            "hookdepends", "hookdepends", "HookDependsRule", "TarballRule", "Check for redundant hook dependencies"
+        ),
+        RuleMetadata("infodirectory", "infodirectory", "InfodirRule", "TarballRule", "Checks for info directory file."),
+        RuleMetadata(
+            "invalidstartdir", "invalidstartdir", "package", "PkgbuildRule", "Looks for references to $startdir"
+        ),
+        RuleMetadata(
+            "javafiles", "javafiles", "JavaFiles", "TarballRule", "Check for existence of Java classes or JARs"
+        ),
+        RuleMetadata("libtool", "libtool", "package", "TarballRule", "Checks for libtool (*.la) files."),
+        RuleMetadata(
+            "licensepkg", "licensepkg", "package", "TarballRule", "Verifies license is included in a package file"
+        ),
+        RuleMetadata(
+            "lots-of-docs",
+            "lotsofdocs",
+            "package",
+            "TarballRule",
+            "See if a package is carrying more documentation than it should",
+        ),
+        RuleMetadata(
+            "redundant_makedepends",
+            "makedepends",
+            "RedundantMakedepends",
+            "PkgbuildRule",
+            "Check for redundant make dependencies",
+        ),
+        RuleMetadata(
+            "vcs_makedepends",
+            "makedepends",
+            "VCSMakedepends",
+            "PkgbuildRule",
+            "Verify make dependencies for VCS sources",
+        ),
+        RuleMetadata(
+            "makepkgfunctions",
+            "makepkgfunctions",
+            "package",
+            "PkgbuildRule",
+            "Looks for calls to makepkg functionality",
+        ),
+        RuleMetadata(
+            "missingbackups", "missingbackups", "package", "TarballRule", "Backup files listed in package should exist"
+        ),
+        RuleMetadata(
+            "checksums", "missingvars", "ChecksumsRule", "PkgbuildRule", "Verifies checksums are included in a PKGBUILD"
+        ),
+        RuleMetadata(
+            "description",
+            "missingvars",
+            "DescriptionRule",
+            "PkgbuildRule",
+            "Verifies that the description is set in a PKGBUILD",
+        ),
+        RuleMetadata(
+            "tags", "missingvars", "TagsRule", "PkgbuildRule", "Looks for Maintainer and Contributor comments"
+        ),
+        RuleMetadata(
+            "pathdepends",
+            "pathdepends",
+            "PathDependsRule",
+            "TarballRule",
+            "Check for simple implicit path dependencies",
+        ),
+        RuleMetadata(
+            "pcdepends",
+            "pcdepends",
+            "PkgConfigDependenciesRule",
+            "TarballRule",
+            "Checks dependencies caused by pkg-config files",
+        ),
+        RuleMetadata("perllocal", "perllocal", "package", "TarballRule", "Verifies the absence of perllocal.pod."),
+        RuleMetadata("permissions", "permissions", "package", "TarballRule", "Checks file permissions."),
+        RuleMetadata(
+            "capsnamespkg",
+            "pkginfo",
+            "CapsPkgnameRule",
+            "PkgInfoRule",
+            "Verifies package name in package does not include upper case letters",
+        ),
+        RuleMetadata("license", "pkginfo", "LicenseRule", "PkgInfoRule", "Verifies license is included in a PKGBUILD"),
+        RuleMetadata(
+            "non-unique-source",
+            "pkginfo",
+            "NonUniqueSourcesRule",
+            "PkgbuildRule",
+            "Verifies the downloaded sources have a unique filename",
+        ),
+        RuleMetadata("urlpkg", "pkginfo", "UrlRule", "PkgInfoRule", "Verifies url is included in a package file"),
+        RuleMetadata(
+            "pkgnameindesc",
+            "pkgnameindesc",
+            "package",
+            "PkgInfoRule",
+            "Verifies if the package name is included on package description",
+        ),
+        RuleMetadata(
+            "py_mtime",
+            "py_mtime",
+            "package",
+            "TarballRule",
+            "Check for py timestamps that are ahead of pyc/pyo timestamps",
+        ),
+        RuleMetadata("pydepends", "pydepends", "PythonDependencyRule", "TarballRule", "Checks python dependencies"),
+        RuleMetadata("qmldepends", "qmldepends", "QmlDependencyRule", "TarballRule", "Checks QML dependencies"),
+        RuleMetadata("rpath", "rpath", "package", "TarballRule", "Verifies correct and secure RPATH for files."),
+        RuleMetadata("runpath", "runpath", "package", "TarballRule", "Verifies if RUNPATH is secure"),
+        RuleMetadata(
+            "scrollkeeper",
+            "scrollkeeper",
+            "package",
+            "TarballRule",
+            "Verifies that there aren't any scrollkeeper directories.",
+        ),
+        RuleMetadata("sfurl", "sfurl", "package", "PkgbuildRule", "Checks for proper sourceforge URLs"),
+        RuleMetadata(
+            "shebangdepends", "shebangdepends", "ShebangDependsRule", "TarballRule", "Checks dependencies semi-smartly."
+        ),
+        RuleMetadata(
+            "sodepends",
+            "sodepends",
+            "SharedLibsRule",
+            "TarballRule",
+            "Checks dependencies caused by linked shared libraries",
+        ),
+        RuleMetadata(
+            "sphinxbuildcachefiles",
+            "sphinxbuildcachefiles",
+            "sphinxbuildcachefilesRule",
+            "TarballRule",
+            "Checks for leftover sphinx-build cached environment files",
+        ),
+        RuleMetadata(
+            "splitpkgfunctions",
+            "splitpkgbuild",
+            "PackageFunctionsRule",
+            "PkgbuildRule",
+            "Checks that all package_* functions exist.",
+        ),
+        RuleMetadata(
+            "splitpkgmakedeps",
+            "splitpkgbuild",
+            "SplitPkgMakedepsRule",
+            "PkgbuildRule",
+            "Checks that a split PKGBUILD has enough makedeps.",
+        ),
+        RuleMetadata("symlink", "symlink", "package", "TarballRule", "Checks that symlinks point to the right place"),
+        RuleMetadata(
+            "systemdlocation",
+            "systemdlocation",
+            "systemdlocationRule",
+            "TarballRule",
+            "Checks for systemd files in /etc/systemd/system/",
+        ),
+        RuleMetadata(
+            "unusedsodepends",
+            "unusedsodepends",
+            "package",
+            "TarballRule",
+            "Checks for unused dependencies caused by linked shared libraries",
+        ),
+    ]
+}
+
+
+def load_rule(name: str) -> type["AbstractRule"]:
+    "Imports the module of a rule and returns the rule class"
+    meta = rule_metadata[name]
+    module = importlib.import_module("." + meta.module, __name__)
+    rule: type[AbstractRule] = getattr(module, meta.classname)
+    return rule
+
+
+class RuleRegistry(Mapping[str, type["AbstractRule"]]):
+    "A mapping of rule names to rule classes, importing rules on access"
+
+    def __getitem__(self, name: str) -> type["AbstractRule"]:
+        return load_rule(name)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(rule_metadata)
+
+    def __len__(self) -> int:
+        return len(rule_metadata)
+
+    def __contains__(self, name: object) -> bool:
+        return name in rule_metadata
+
+
+all_rules = RuleRegistry()
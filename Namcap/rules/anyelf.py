@@ -31,7 +31,7 @@ class package(TarballRule):
             f.close()
 
         if pkginfo["arch"] and pkginfo["arch"][0] == "any":
-            self.errors = [("elffile-in-any-package %s", i) for i in found_elffiles]
+            self.errors.extend(("elffile-in-any-package %s", (i,)) for i in found_elffiles)
         else:
             if len(found_elffiles) == 0:
                 self.warnings.append(("no-elffiles-not-any-package", ()))
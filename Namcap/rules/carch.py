@@ -7,26 +7,22 @@ import re
 
 from Namcap.ruleclass import PkgbuildRule
 
+arches = ["arm", "i586", "i686", "ppc", "x86_64"]
+archmatch = re.compile(r"\b(%s)\b" % "|".join(arches))
+
 
 class package(PkgbuildRule):
     name = "carch"
     description = "Verifies that no specific host type is used"
 
     def analyze(self, pkginfo, tar):
-        arches = ["arm", "i586", "i686", "ppc", "x86_64"]
-        archmatch = re.compile(r"\b(%s)\b" % "|".join(arches))
-        # Match an arch=(i686) line
-        archline = re.compile(r"\w*arch=")
-        for line in pkginfo.pkgbuild:
-            # strip any comments
-            line = line.split("#")[0]
-            match = archmatch.search(line)
+        for line in pkginfo.pkgbuild_model.lines:
+            match = archmatch.search(line.code)
             if not match:
                 continue
-            if archline.match(line):
-                continue
-            if "$CARCH" in line:
+            # Match an arch=(i686) line
+            if line.assignment and line.assignment[0].endswith("arch"):
                 continue
-            if "${CARCH}" in line:
+            if line.references_variable("CARCH"):
                 continue
             self.warnings.append(("specific-host-type-used %s", (match.group(1),)))
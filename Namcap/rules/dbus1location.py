@@ -1,7 +1,7 @@
 # Copyright (C) 2024 Namcap contributors, see AUTHORS for details.
 # SPDX-License-Identifier: GPL-2.0-or-later
 
-import os
+from Namcap.pathpolicy import path_matches
 from Namcap.ruleclass import TarballRule
 
 
@@ -10,13 +10,11 @@ class dbus1locationRule(TarballRule):
     description = "Checks for dbus files in /etc/dbus1/system.d/"
 
     def analyze(self, _, tar):
-        for entry in tar:
+        matches = path_matches(tar)
+        for index in matches.with_label("dbus-1-location"):
             # ignore the actual directory, as that's handled by emptydirs
-            if entry.isdir():
+            if matches.table.isdir(index):
                 continue
 
-            name = os.path.normpath(entry.name)
-
             # check for files in /etc/dbus-1/system.d/
-            if name.startswith("etc/dbus-1/system.d/"):
-                self.warnings.append(("dbus-1-location %s", name))
+            self.warnings.append(("dbus-1-location %s", (matches.names[index],)))
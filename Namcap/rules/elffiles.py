@@ -6,14 +6,15 @@ from elftools.elf.elffile import ELFFile
 from elftools.elf.enums import ENUM_GNU_PROPERTY_X86_FEATURE_1_FLAGS
 from elftools.elf.sections import NoteSection, SymbolTableSection
 
+from Namcap.pathpolicy import path_matches, policy_prefixes
 from Namcap.ruleclass import TarballRule
 from Namcap.util import is_elf
 
 # Valid directories for ELF files
-valid_dirs = ["bin/", "sbin/", "usr/bin/", "usr/sbin/", "lib/", "usr/lib/", "usr/lib32/"]
+valid_dirs = policy_prefixes("elf-valid")
 # Questionable directories for ELF files
 # (Suppresses some output spam.)
-questionable_dirs = ["opt/"]
+questionable_dirs = policy_prefixes("elf-questionable")
 
 
 def elf_files_from_tar(tar):
@@ -29,33 +30,32 @@ def elf_files_from_tar(tar):
 class ELFPaths(TarballRule):
     name = "elfpaths"
     description = "Check about ELF files outside some standard paths."
+    member_kinds = frozenset({"elf"})
 
     def analyze(self, pkginfo, tar):
         invalid_elffiles = []
         questionable_elffiles = []
 
-        for entry in tar:
+        matches = path_matches(tar)
+        for index, (name, labels) in enumerate(zip(matches.table.names, matches.labels)):
             # is it a regular file ?
-            if not entry.isfile():
+            if not matches.table.isfile(index):
                 continue
             # is it outside standard binary dirs ?
-            in_std_dirs = any(entry.name.startswith(d) for d in valid_dirs)
-            in_que_dirs = any(entry.name.startswith(d) for d in questionable_dirs)
-
-            if in_std_dirs:
+            if "elf-valid" in labels:
                 continue
             # is it an ELF file ?
-            f = tar.extractfile(entry)
+            f = tar.extractfile(name)
             if is_elf(f):
-                if in_que_dirs:
-                    questionable_elffiles.append(entry.name)
+                if "elf-questionable" in labels:
+                    questionable_elffiles.append(name)
                 else:
-                    invalid_elffiles.append(entry.name)
+                    invalid_elffiles.append(name)
 
         que_elfdirs = [d for d in questionable_dirs if any(f.startswith(d) for f in questionable_elffiles)]
-        self.errors = [("elffile-not-in-allowed-dirs %s", (i,)) for i in invalid_elffiles]
+        self.errors.extend(("elffile-not-in-allowed-dirs %s", (i,)) for i in invalid_elffiles)
         self.errors.extend(("elffile-in-questionable-dirs %s", (i,)) for i in que_elfdirs)
-        self.infos = [("elffile-not-in-allowed-dirs %s", (i,)) for i in questionable_elffiles]
+        self.infos.extend(("elffile-not-in-allowed-dirs %s", (i,)) for i in questionable_elffiles)
 
 
 class ELFTextRelocationRule(TarballRule):
@@ -65,6 +65,7 @@ class ELFTextRelocationRule(TarballRule):
 
     name = "elftextrel"
     description = "Check for text relocations in ELF files."
+    member_kinds = frozenset({"elf"})
 
     def analyze(self, pkginfo, tar):
         files_with_textrel = []
@@ -78,7 +79,7 @@ class ELFTextRelocationRule(TarballRule):
                         files_with_textrel.append(entry_name)
 
         if files_with_textrel:
-            self.warnings = [("elffile-with-textrel %s", (i,)) for i in files_with_textrel]
+            self.warnings.extend(("elffile-with-textrel %s", (i,)) for i in files_with_textrel)
 
 
 class ELFExecStackRule(TarballRule):
@@ -92,6 +93,7 @@ class ELFExecStackRule(TarballRule):
 
     name = "elfexecstack"
     description = "Check for executable stacks in ELF files."
+    member_kinds = frozenset({"elf"})
 
     def analyze(self, pkginfo, tar):
         exec_stacks = []
@@ -106,7 +108,7 @@ class ELFExecStackRule(TarballRule):
                     exec_stacks.append(entry_name)
 
         if exec_stacks:
-            self.warnings = [("elffile-with-execstack %s", (i,)) for i in exec_stacks]
+            self.warnings.extend(("elffile-with-execstack %s", (i,)) for i in exec_stacks)
 
 
 class ELFGnuRelroRule(TarballRule):
@@ -118,6 +120,7 @@ class ELFGnuRelroRule(TarballRule):
 
     name = "elfgnurelro"
     description = "Check for FULL RELRO in ELF files."
+    member_kinds = frozenset({"elf"})
 
     def has_bind_now(self, elffile):
         DF_BIND_NOW = 0x08
@@ -146,7 +149,7 @@ class ELFGnuRelroRule(TarballRule):
             missing_relro.append(entry_name)
 
         if missing_relro:
-            self.warnings = [("elffile-without-relro %s", (i,)) for i in missing_relro]
+            self.warnings.extend(("elffile-without-relro %s", (i,)) for i in missing_relro)
 
 
 class ELFUnstrippedRule(TarballRule):
@@ -159,6 +162,7 @@ class ELFUnstrippedRule(TarballRule):
 
     name = "elfunstripped"
     description = "Check for unstripped ELF files."
+    member_kinds = frozenset({"elf"})
 
     def analyze(self, pkginfo, tar):
         unstripped_binaries = []
@@ -176,7 +180,7 @@ class ELFUnstrippedRule(TarballRule):
                 if section.name == ".symtab":
                     unstripped_binaries.append(entry_name)
         if unstripped_binaries:
-            self.warnings = [("elffile-unstripped %s", (i,)) for i in unstripped_binaries]
+            self.warnings.extend(("elffile-unstripped %s", (i,)) for i in unstripped_binaries)
 
 
 class NoPIERule(TarballRule):
@@ -186,6 +190,7 @@ class NoPIERule(TarballRule):
 
     name = "elfnopie"
     description = "Check for no PIE ELF files."
+    member_kinds = frozenset({"elf"})
 
     def has_dt_debug(self, elffile):
         for section in elffile.iter_sections():
@@ -205,7 +210,7 @@ class NoPIERule(TarballRule):
                 nopie_binaries.append(entry_name)
 
         if nopie_binaries:
-            self.warnings = [("elffile-nopie %s", (i,)) for i in nopie_binaries]
+            self.warnings.extend(("elffile-nopie %s", (i,)) for i in nopie_binaries)
 
 
 def _note_props(elffile, note_type, prop_type):
@@ -233,6 +238,7 @@ class ELFSHSTKRule(TarballRule):
 
     name = "elfnoshstk"
     description = "Check for shadow stack support in ELF files."
+    member_kinds = frozenset({"elf"})
 
     def analyze(self, pkginfo, tar):
         noshstk_binaries = []
@@ -251,4 +257,4 @@ class ELFSHSTKRule(TarballRule):
             else:
                 noshstk_binaries.append(entry_name)
         if noshstk_binaries:
-            self.warnings = [("elffile-noshstk %s", (i,)) for i in noshstk_binaries]
+            self.warnings.extend(("elffile-noshstk %s", (i,)) for i in noshstk_binaries)
@@ -3,6 +3,7 @@
 
 import os
 
+from Namcap.members import DIRTYPE, member_table
 from Namcap.ruleclass import TarballRule
 
 
@@ -11,11 +12,8 @@ class package(TarballRule):
     description = "Warns about empty directories in a package"
 
     def analyze(self, pkginfo, tar):
-        dirs = []
-        entries = []
-        for entry in tar:
-            if entry.isdir():
-                dirs.append(entry.name.rstrip("/"))
-            entries.append(entry.name.rstrip("/"))
-        nonemptydirs = [os.path.dirname(x) for x in entries]
-        self.warnings = [("empty-directory %s", d) for d in (set(dirs) - set(nonemptydirs))]
+        table = member_table(tar)
+        entries = [name.rstrip("/") for name in table.names]
+        dirs = {entries[i] for i, type in enumerate(table.types) if type == DIRTYPE}
+        nonemptydirs = {os.path.dirname(x) for x in entries}
+        self.warnings.extend(("empty-directory %s", (d,)) for d in (dirs - nonemptydirs))
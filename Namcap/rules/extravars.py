@@ -50,4 +50,4 @@ class package(PkgbuildRule):
             stdvars.extend(v + "_" + a for v, a in product(carch_vars, pkginfo["arch"]))
         for varname in pkginfo["setvars"]:
             if varname.islower() and varname not in stdvars and not varname.startswith("_"):
-                self.warnings.append(("extra-var-begins-without-underscore %s", varname))
+                self.warnings.append(("extra-var-begins-without-underscore %s", (varname,)))
@@ -1,9 +1,9 @@
 # Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
 # SPDX-License-Identifier: GPL-2.0-or-later
 
-import os
 import re
 
+from Namcap.pathpolicy import path_matches, policy_prefixes
 from Namcap.ruleclass import TarballRule
 
 
@@ -12,61 +12,25 @@ class FHSRule(TarballRule):
     description = "Checks for standard directories."
 
     def analyze(self, pkginfo, tar):
-        valid_paths = [
-            "etc/",
-            "opt/",
-            "lib/modules",
-            "usr/bin/",
-            "usr/include/",
-            "usr/lib/",
-            "usr/lib32/",
-            "usr/sbin/",
-            "usr/share/",
-            "usr/src/",
-            "var/cache/",
-            "var/lib/",
-            "var/log/",
-            "var/opt/",
-            "var/spool/",
-            "var/state/",
-            ".PKGINFO",
-            ".INSTALL",
-            ".CHANGELOG",
-            ".MTREE",
-            ".BUILDINFO",
-        ]
-        forbidden_paths = ["tmp/", "var/tmp/", "run/", "var/run/", "var/lock/"]
-        custom_valid = {
-            r"^mingw-": [
-                "usr/x86_64-w64-mingw32/lib/",
-                "usr/x86_64-w64-mingw32/bin/",
-                "usr/x86_64-w64-mingw32/include/",
-                "usr/i686-w64-mingw32/lib/",
-                "usr/i686-w64-mingw32/bin/",
-                "usr/i686-w64-mingw32/include/",
-            ],
-        }
-        for pattern in custom_valid:
-            if re.search(pattern, pkginfo["name"]):
-                valid_paths.extend(custom_valid[pattern])
-        for entry in tar.getmembers():
-            name = os.path.normpath(entry.name)
-            if entry.isdir():
+        forbidden_paths = set(policy_prefixes("fhs-forbidden"))
+        valid_labels = {"fhs-valid"}
+        if re.search(r"^mingw-", pkginfo["name"]):
+            valid_labels.add("fhs-valid-mingw")
+        matches = path_matches(tar)
+        for index, (name, labels) in enumerate(zip(matches.names, matches.labels)):
+            if matches.table.isdir(index):
                 name += "/"
 
             # check for files in wrong dirs, directory itself will be
             # caught by emptydirs rule
-            if name in forbidden_paths:
-                continue
-            bad_dirs = (name.startswith(dirname) for dirname in forbidden_paths)
-            if any(bad_dirs):
-                self.errors.append(("file-in-temporary-dir %s", name))
+            if "fhs-forbidden" in labels:
+                if name not in forbidden_paths:
+                    self.errors.append(("file-in-temporary-dir %s", (name,)))
                 continue
 
             # matches directory names or parent directories
-            good_dirs = (name.startswith(dirname) or dirname.startswith(name) for dirname in valid_paths)
-            if not any(good_dirs):
-                self.warnings.append(("file-in-non-standard-dir %s", name))
+            if labels.isdisjoint(valid_labels):
+                self.warnings.append(("file-in-non-standard-dir %s", (name,)))
 
 
 class FHSManpagesRule(TarballRule):
@@ -74,19 +38,18 @@ class FHSManpagesRule(TarballRule):
     description = "Verifies correct installation of man pages"
 
     def analyze(self, pkginfo, tar):
-        gooddir = "usr/share/man"
-        bad_dir = "usr/man"
-        for i in tar.getmembers():
-            if not i.isfile():
+        matches = path_matches(tar)
+        for index, (name, labels) in enumerate(zip(matches.table.names, matches.labels)):
+            if not matches.table.isfile(index):
                 continue
-            if i.name.startswith(gooddir):
+            if "man-fhs" in labels:
                 continue
-            if i.name.startswith(bad_dir):
-                self.errors.append(("non-fhs-man-page %s", i.name))
+            if "man-non-fhs" in labels:
+                self.errors.append(("non-fhs-man-page %s", (name,)))
                 continue
             # Check everything else to see if it has a 'man' path component
-            if "man" in i.name.split(os.sep):
-                self.warnings.append(("potential-non-fhs-man-page %s", i.name))
+            if "man-component" in labels:
+                self.warnings.append(("potential-non-fhs-man-page %s", (name,)))
 
 
 class FHSInfoPagesRule(TarballRule):
@@ -94,16 +57,17 @@ class FHSInfoPagesRule(TarballRule):
     description = "Verifies correct installation of info pages"
 
     def analyze(self, pkginfo, tar):
-        for i in tar.getmembers():
-            if not i.isfile():
+        matches = path_matches(tar)
+        for index, (name, labels) in enumerate(zip(matches.table.names, matches.labels)):
+            if not matches.table.isfile(index):
                 continue
-            if i.name.startswith("usr/share/info"):
+            if "info-fhs" in labels:
                 continue
-            if i.name.startswith("usr/info"):
-                self.errors.append(("non-fhs-info-page %s", i.name))
+            if "info-non-fhs" in labels:
+                self.errors.append(("non-fhs-info-page %s", (name,)))
                 continue
-            if "info" in i.name.split(os.sep):
-                self.warnings.append(("potential-non-fhs-info-page %s", i.name))
+            if "info-component" in labels:
+                self.warnings.append(("potential-non-fhs-info-page %s", (name,)))
 
 
 class RubyPathsRule(TarballRule):
@@ -111,7 +75,5 @@ class RubyPathsRule(TarballRule):
     description = "Verifies correct usage of folders by ruby packages"
 
     def analyze(self, pkginfo, tar):
-        for i in tar.getmembers():
-            if i.name.startswith("usr/lib/ruby/site_ruby"):
-                self.warnings.append(("site-ruby", ()))
-                return
+        if path_matches(tar).with_label("site-ruby"):
+            self.warnings.append(("site-ruby", ()))
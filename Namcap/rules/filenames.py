@@ -17,4 +17,4 @@ class package(TarballRule):
     def analyze(self, pkginfo, tar):
         for i in tar.getnames():
             if not all(c in VALID_CHARS for c in i):
-                self.warnings.append(("invalid-filename", i))
+                self.warnings.append(("invalid-filename", (i,)))
@@ -1,6 +1,7 @@
 # Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
 # SPDX-License-Identifier: GPL-2.0-or-later
 
+from Namcap.members import member_table
 from Namcap.ruleclass import TarballRule
 
 
@@ -9,16 +10,13 @@ class package(TarballRule):
     description = "Checks file ownership."
 
     def analyze(self, pkginfo, tar):
-        for i in tar.getmembers():
-            if i.uname != "root" or i.gname != "root":
-                uname = ""
-                gname = ""
-                if i.uname == "":
-                    uname = str(i.uid)
-                else:
-                    uname = i.uname
-                if i.gname == "":
-                    gname = str(i.gid)
-                else:
-                    gname = i.gname
-                self.errors.append(("incorrect-owner %s (%s:%s)", (i.name, uname, gname)))
+        table = member_table(tar)
+        # only members not owned by root:root have a user or group name in the table
+        for i in sorted(table.unames.keys() | table.gnames.keys()):
+            uname = table.unames.get(i, "root")
+            gname = table.gnames.get(i, "root")
+            if uname == "":
+                uname = str(table.uids[i])
+            if gname == "":
+                gname = str(table.gids[i])
+            self.errors.append(("incorrect-owner %s (%s:%s)", (table.names[i], uname, gname)))
@@ -20,4 +20,4 @@ class package(TarballRule):
 
         for i in tar.getnames():
             if i in mime_files:
-                self.errors.append(("gnome-mime-file %s", i))
+                self.errors.append(("gnome-mime-file %s", (i,)))
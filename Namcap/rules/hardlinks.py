@@ -3,6 +3,7 @@
 
 from os.path import dirname
 
+from Namcap.members import LNKTYPE, member_table
 from Namcap.ruleclass import TarballRule
 
 
@@ -11,7 +12,9 @@ class package(TarballRule):
     description = "Look for cross-directory/partition hard links"
 
     def analyze(self, pkginfo, tar):
-        hardlinks = [i for i in tar.getmembers() if i.islnk() is True]
-        for hardlink in hardlinks:
-            if dirname(hardlink.name) != dirname(hardlink.linkname):
-                self.errors.append(("cross-dir-hardlink %s %s", (hardlink.name, hardlink.linkname)))
+        table = member_table(tar)
+        for i, linkname in table.linknames.items():
+            if table.types[i] != LNKTYPE:
+                continue
+            if dirname(table.names[i]) != dirname(linkname):
+                self.errors.append(("cross-dir-hardlink %s %s", (table.names[i], linkname)))
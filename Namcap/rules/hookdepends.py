@@ -1,31 +1,20 @@
 # Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
 # SPDX-License-Identifier: GPL-2.0-or-later
 
-import re
-
+from Namcap.pathpolicy import path_matches, policy_group
 from Namcap.ruleclass import TarballRule
 
 
 class HookDependsRule(TarballRule):
     name = "hookdepends"
     description = "Check for redundant hook dependencies"
-    subrules = [
-        {
-            "path": r"^usr/share/applications/.*\.desktop$",
-            "dep": "desktop-file-utils",
-        },
-        {
-            "path": r"^usr/share/mime$",
-            "dep": "shared-mime-info",
-        },
-    ]
+    # the path regexes and dep names are in Namcap.pathpolicy
 
     def analyze(self, pkginfo, tar):
-        names = [entry.name for entry in tar]
-        for subrule in self.subrules:
-            dep = subrule["dep"]
+        matches = path_matches(tar)
+        for policy in policy_group("hookdepends"):
+            dep = policy.dep
             if dep not in pkginfo["depends"]:
                 continue
-            pattern = re.compile(subrule["path"])
-            if any(pattern.search(n) for n in names):
+            if matches.with_label(policy.label):
                 self.warnings.append(("external-hooks-unneeded %s", (dep,)))
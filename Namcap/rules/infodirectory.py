@@ -7,8 +7,9 @@ from Namcap.ruleclass import TarballRule
 class InfodirRule(TarballRule):
     name = "infodirectory"
     description = "Checks for info directory file."
+    member_prefixes = ("usr/share/info/dir",)
 
     def analyze(self, pkginfo, tar):
         for i in tar.getnames():
             if i == "usr/share/info/dir":
-                self.errors.append(("info-dir-file-present %s", i))
+                self.errors.append(("info-dir-file-present %s", (i,)))
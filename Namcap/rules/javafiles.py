@@ -8,6 +8,7 @@ from Namcap.util import is_java
 class JavaFiles(TarballRule):
     name = "javafiles"
     description = "Check for existence of Java classes or JARs"
+    member_kinds = frozenset({"jar", "java"})
 
     def analyze(self, pkginfo, tar):
         javas = []
@@ -28,4 +29,4 @@ class JavaFiles(TarballRule):
             f.close()
         if javas:
             reasons = pkginfo.detected_deps.setdefault("java-runtime", [])
-            reasons.append(("java-runtime-needed %s", ", ".join(javas)))
+            reasons.append(("java-runtime-needed %s", (", ".join(javas),)))
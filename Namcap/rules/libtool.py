@@ -13,4 +13,4 @@ class package(TarballRule):
     def analyze(self, pkginfo, tar):
         for i in tar.getnames():
             if re.search(r"\.la$", i) is not None:
-                self.warnings.append(("libtool-file-present %s", i))
+                self.warnings.append(("libtool-file-present %s", (i,)))
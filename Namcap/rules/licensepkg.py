@@ -1,23 +1,96 @@
 # Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
 # SPDX-License-Identifier: GPL-2.0-or-later
 
+import bisect
+import functools
+import importlib.metadata
+import json
+import os
 from pathlib import Path
 from tarfile import TarFile, TarInfo
+from typing import NamedTuple
 
-from license_expression import BaseSymbol, LicenseSymbol, LicenseWithExceptionSymbol, get_spdx_licensing
+from license_expression import BaseSymbol, LicenseSymbol, LicenseWithExceptionSymbol, Licensing, get_spdx_licensing
 
+import Namcap.cache
 from Namcap.package import PacmanPackage, load_from_db
 from Namcap.ruleclass import TarballRule
 from Namcap.util import is_debug
 
+KNOWN_LICENSES_FILE = "/usr/share/licenses/known_spdx_license_identifiers.txt"
+KNOWN_EXCEPTIONS_FILE = "/usr/share/licenses/known_spdx_license_exceptions.txt"
+COMMON_LICENSES_DIR = "/usr/share/licenses/spdx/"
+COMMON_EXCEPTIONS_DIR = "/usr/share/licenses/spdx/exceptions/"
+
+
+class LicenseKnowledgeBase(NamedTuple):
+    "The SPDX license and exception symbols known to the system"
+
+    known_licenses: set[BaseSymbol]
+    known_exceptions: set[BaseSymbol]
+    common_licenses: set[BaseSymbol]
+    common_exceptions: set[BaseSymbol]
+
+
+# A parsed license string: its canonical form and its (license, exception) symbol names,
+# or None if the string could not be parsed
+ParsedLicense = tuple[str | None, list[tuple[str, str | None]] | None]
+
+# { cache key => knowledge base }, only holds the one for the current system files
+_knowledge_bases: dict[str, LicenseKnowledgeBase] = {}
+
+
+@functools.cache
+def spdx_licensing() -> Licensing:
+    "The SPDX licensing object, which is expensive to create"
+    return get_spdx_licensing()
+
+
+@functools.cache
+def license_expression_version() -> str:
+    return importlib.metadata.version("license-expression")
+
+
+def parse_license_uncached(license: str) -> ParsedLicense:
+    licensing = spdx_licensing()
+    try:
+        license_expression = licensing.parse(license, strict=True)
+    except Exception:
+        return (None, None)
+    if license_expression is None:
+        return (str(license_expression), None)
+    symbols: list[tuple[str, str | None]] = []
+    for symbol in license_expression.symbols:
+        if isinstance(symbol, LicenseWithExceptionSymbol):
+            license_symbol, exception = list(symbol.decompose())
+            symbols.append((str(license_symbol), str(exception)))
+        else:
+            symbols.append((str(symbol), None))
+    return (str(license_expression), symbols)
+
+
+@functools.cache
+def parse_license(license: str) -> ParsedLicense:
+    "Parses a license string, reusing the results of earlier runs"
+    key = Namcap.cache.make_key(license_expression_version(), license)
+    cached = Namcap.cache.load("spdx-expressions", key)
+    if cached is not None:
+        canonical, symbols = json.loads(cached)
+        return (canonical, None if symbols is None else [tuple(symbol) for symbol in symbols])
+    parsed = parse_license_uncached(license)
+    Namcap.cache.store("spdx-expressions", key, json.dumps(parsed).encode())
+    return parsed
+
 
 def get_license_canonicalized(license: str) -> str:
     """Get the canonicalized form of a license string
 
     This function may raise an Exception if it's not possible to derive any meaning from the input string
     """
-    licensing = get_spdx_licensing()
-    return str(licensing.parse(license, strict=True))
+    canonical, _ = parse_license(license)
+    if canonical is None:
+        raise ValueError(f"Invalid license string: {license}")
+    return canonical
 
 
 def strip_plus_from_license(license: BaseSymbol) -> BaseSymbol:
@@ -47,24 +120,28 @@ def get_license_symbols(pkg_license: str) -> set[BaseSymbol]:
     This may be due to being unable to parse the string at all or if a license exception in the string is not a valid
     SPDX license exception identifier.
     """
-    licensing = get_spdx_licensing()
-    if (license_expression := licensing.parse(pkg_license, strict=True)) is None:
+    canonical, symbols = parse_license(pkg_license)
+    if canonical is None:
+        raise ValueError(f"Invalid license string: {pkg_license}")
+    if symbols is None:
         raise ValueError("Empty license string")
     license_symbols: set[BaseSymbol] = set()
-    for symbol in license_expression.symbols:
-        if isinstance(symbol, LicenseWithExceptionSymbol):
-            license, exception = list(symbol.decompose())
-            license = strip_plus_from_license(license)
-            license_symbols.add(LicenseWithExceptionSymbol(license, exception))
+    for license, exception in symbols:
+        if exception is not None:
+            license_symbols.add(
+                LicenseWithExceptionSymbol(
+                    strip_plus_from_license(LicenseSymbol(license)), LicenseSymbol(exception, is_exception=True)
+                )
+            )
         else:
-            license_symbols.add(strip_plus_from_license(symbol))
+            license_symbols.add(strip_plus_from_license(LicenseSymbol(license)))
     return license_symbols
 
 
 def get_common_spdx_license_identifiers() -> set[BaseSymbol]:
     """Get all common license identifiers (those that are provided system-wide and can be shared)"""
     common: list[BaseSymbol] = [
-        LicenseSymbol(f"{x.stem}") for x in sorted(Path("/usr/share/licenses/spdx/").glob("*.txt")) if x.is_file()
+        LicenseSymbol(f"{x.stem}") for x in sorted(Path(COMMON_LICENSES_DIR).glob("*.txt")) if x.is_file()
     ]
     return set(common)
 
@@ -73,7 +150,7 @@ def get_common_spdx_license_exceptions() -> set[BaseSymbol]:
     """Get all common license exceptions (those that are provided system-wide and can be shared)"""
     common: list[BaseSymbol] = [
         LicenseSymbol(f"{x.stem}", is_exception=True)
-        for x in sorted(Path("/usr/share/licenses/spdx/exceptions/").glob("*.txt"))
+        for x in sorted(Path(COMMON_EXCEPTIONS_DIR).glob("*.txt"))
         if x.is_file()
     ]
     return set(common)
@@ -83,7 +160,7 @@ def get_known_spdx_license_identifiers() -> set[BaseSymbol]:
     """Get all known SPDX license identifiers"""
     all_spdx_licenses: list[BaseSymbol] = []
 
-    with open("/usr/share/licenses/known_spdx_license_identifiers.txt") as file:
+    with open(KNOWN_LICENSES_FILE) as file:
         while line := file.readline():
             all_spdx_licenses.append(LicenseSymbol(line.rstrip("\n")))
 
@@ -94,13 +171,60 @@ def get_known_spdx_license_exceptions() -> set[BaseSymbol]:
     """Get all known SPDX license exceptions"""
     all_spdx_licenses: list[BaseSymbol] = []
 
-    with open("/usr/share/licenses/known_spdx_license_exceptions.txt") as file:
+    with open(KNOWN_EXCEPTIONS_FILE) as file:
         while line := file.readline():
             all_spdx_licenses.append(LicenseSymbol(line.rstrip("\n"), is_exception=True))
 
     return set(all_spdx_licenses)
 
 
+def license_knowledge_base_key() -> str:
+    "Cache key of the knowledge base, which changes when the SPDX files or directories are modified"
+    parts = []
+    for path in (KNOWN_LICENSES_FILE, KNOWN_EXCEPTIONS_FILE, COMMON_LICENSES_DIR, COMMON_EXCEPTIONS_DIR):
+        try:
+            st = os.stat(path)
+        except OSError:
+            parts.append(f"{path}:-")
+        else:
+            parts.append(f"{path}:{st.st_mtime_ns}:{st.st_size}")
+    return Namcap.cache.make_key(*parts)
+
+
+def get_license_knowledge_base() -> LicenseKnowledgeBase:
+    """Get the known and common SPDX licenses and exceptions
+
+    They are read once per process, and stored on disk until the files they are read from change.
+    """
+    key = license_knowledge_base_key()
+    if (knowledge_base := _knowledge_bases.get(key)) is not None:
+        return knowledge_base
+
+    if (cached := Namcap.cache.load("spdx", key)) is not None:
+        names = json.loads(cached)
+        knowledge_base = LicenseKnowledgeBase(
+            known_licenses={LicenseSymbol(name) for name in names["known_licenses"]},
+            known_exceptions={LicenseSymbol(name, is_exception=True) for name in names["known_exceptions"]},
+            common_licenses={LicenseSymbol(name) for name in names["common_licenses"]},
+            common_exceptions={LicenseSymbol(name, is_exception=True) for name in names["common_exceptions"]},
+        )
+    else:
+        knowledge_base = LicenseKnowledgeBase(
+            known_licenses=get_known_spdx_license_identifiers(),
+            known_exceptions=get_known_spdx_license_exceptions(),
+            common_licenses=get_common_spdx_license_identifiers(),
+            common_exceptions=get_common_spdx_license_exceptions(),
+        )
+        names = {
+            field: sorted(str(symbol) for symbol in symbols) for field, symbols in knowledge_base._asdict().items()
+        }
+        Namcap.cache.store("spdx", key, json.dumps(names).encode())
+
+    _knowledge_bases.clear()
+    _knowledge_bases[key] = knowledge_base
+    return knowledge_base
+
+
 def get_uncommon_license_symbols(
     licenses: set[BaseSymbol],
     known_licenses: set[BaseSymbol],
@@ -182,6 +306,43 @@ def get_symlink_target(member: TarInfo) -> str:
     return symlink_target
 
 
+class MemberIndex:
+    """Regular files and symlinks of a package, indexed by name after one pass over its members"""
+
+    def __init__(self, tar: TarFile) -> None:
+        self.files: set[str] = set()
+        self.symlinks: dict[str, TarInfo] = {}
+        for member in tar.getmembers():
+            if member.issym():
+                self.symlinks[member.name] = member
+            elif member.isfile():
+                self.files.add(member.name)
+        self._sorted_files: list[str] | None = None
+
+    def files_with_prefix(self, prefix: str) -> list[str]:
+        "Return the regular files whose name starts with prefix"
+        if self._sorted_files is None:
+            self._sorted_files = sorted(self.files)
+        start = bisect.bisect_left(self._sorted_files, prefix)
+        end = start
+        while end < len(self._sorted_files) and self._sorted_files[end].startswith(prefix):
+            end += 1
+        return self._sorted_files[start:end]
+
+    def resolve(self, name: str) -> str:
+        """Follow a chain of symlinks inside the package and return the name it ends at
+
+        :raises: ValueError if a link target has an invalid amount of upward change dirs or the links loop.
+        """
+        seen = set()
+        while name in self.symlinks:
+            if name in seen:
+                raise ValueError(f"Symlink loop: {name}")
+            seen.add(name)
+            name = get_symlink_target(self.symlinks[name])
+        return name
+
+
 def package_license_files(tar: TarFile | None, pkgname: str) -> tuple[dict[str, bool], str | None]:
     """Return the license files referenced in a package and whether the license dir is a symlink"""
     license_dir_symlink = None
@@ -190,41 +351,32 @@ def package_license_files(tar: TarFile | None, pkgname: str) -> tuple[dict[str,
     if not tar:
         return (files, license_dir_symlink)
 
-    for member in tar.getmembers():
-        # check if entire /usr/share/license/{pkgname}/ dir is a symlink
-        if member.issym() and member.name == f"usr/share/licenses/{pkgname}":
-            try:
-                license_dir_symlink = get_symlink_target(member)
-            except ValueError:
-                continue
-            else:
-                break
-        # the license is a file
-        if (
-            member.isfile()
-            and not member.issym()
-            and member.name.startswith(f"usr/share/licenses/{pkgname}/")
-            and member.name != f"usr/share/licenses/{pkgname}"
-        ):
-            files[member.name] = True
-        # the license is a symlink, we'll check later
-        if member.issym() and member.name.startswith(f"usr/share/licenses/{pkgname}/"):
-            try:
-                files[get_symlink_target(member)] = False
-            except ValueError:
-                continue
+    index = MemberIndex(tar)
+    license_dir = f"usr/share/licenses/{pkgname}"
 
-    # check existence of all symlinked files
-    for file, exists in [(file, exists) for (file, exists) in files.items() if not exists]:
-        for member in tar.getmembers():
-            if member.isfile() and not member.issym() and member.name == file:
-                files[file] = True
+    # check if entire /usr/share/license/{pkgname}/ dir is a symlink
+    if license_dir in index.symlinks:
+        try:
+            license_dir_symlink = index.resolve(license_dir)
+        except ValueError:
+            pass
 
-    # if license dir is a symlink, add all files below the targeted license dir to files dict
     if license_dir_symlink:
-        for member in tar.getmembers():
-            if member.isfile() and not member.issym() and member.name.startswith(license_dir_symlink):
-                files[member.name] = True
+        # add all files below the targeted license dir to files dict
+        for name in index.files_with_prefix(license_dir_symlink):
+            files[name] = True
+        return (files, license_dir_symlink)
+
+    # the license is a file
+    for name in index.files_with_prefix(f"{license_dir}/"):
+        files[name] = True
+    # the license is a symlink, check whether it ends at a file in the package
+    for name in [name for name in index.symlinks if name.startswith(f"{license_dir}/")]:
+        try:
+            target = index.resolve(name)
+        except ValueError:
+            continue
+        files[target] = target in index.files
 
     return (files, license_dir_symlink)
 
@@ -232,6 +384,7 @@ def package_license_files(tar: TarFile | None, pkgname: str) -> tuple[dict[str,
 class package(TarballRule):
     name = "licensepkg"
     description = "Verifies license is included in a package file"
+    skip_debug = True
 
     def analyze(self, pkginfo: PacmanPackage, tar: TarFile | None) -> None:
         # return early, as we do not check debug packages
@@ -265,8 +418,9 @@ class package(TarballRule):
             else:
                 license_symbols.update(new_license_symbols)
 
-        known_licenses = get_known_spdx_license_identifiers()
-        known_exceptions = get_known_spdx_license_exceptions()
+        knowledge_base = get_license_knowledge_base()
+        known_licenses = knowledge_base.known_licenses
+        known_exceptions = knowledge_base.known_exceptions
 
         # check if any license (ignoring exception) symbols are unknown
         # (and add errors for them, if they are not prefixed with LicenseRef-)
@@ -274,8 +428,8 @@ class package(TarballRule):
             if not str(license).startswith("LicenseRef-"):
                 self.errors.append(("unknown-spdx-license-identifier %s", (str(license),)))
 
-        common_licenses = get_common_spdx_license_identifiers()
-        common_exceptions = get_common_spdx_license_exceptions()
+        common_licenses = knowledge_base.common_licenses
+        common_exceptions = knowledge_base.common_exceptions
 
         # check whether there is a discrepancy between uncommon license symbols and license files found in the package
         uncommon_license_symbols = get_uncommon_license_symbols(
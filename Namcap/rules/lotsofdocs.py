@@ -1,6 +1,7 @@
 # Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
 # SPDX-License-Identifier: GPL-2.0-or-later
 
+from Namcap.members import member_table
 from Namcap.ruleclass import TarballRule
 
 
@@ -13,13 +14,9 @@ class package(TarballRule):
             # Don't do anything if the package is called "*-doc"
             return
         docdir = "usr/share/doc"
-        size = 0
-        docsize = 0
-
-        for i in tar.getmembers():
-            if i.name.startswith(docdir):
-                docsize += i.size
-            size += i.size
+        table = member_table(tar)
+        size = sum(table.sizes)
+        docsize = sum(s for name, s in zip(table.names, table.sizes) if name.startswith(docdir))
 
         if size > 0:
             ratio = docsize / float(size)
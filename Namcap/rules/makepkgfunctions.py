@@ -5,17 +5,18 @@ import re
 
 from Namcap.ruleclass import PkgbuildRule
 
+bad_calls = ["msg", "msg2", "warning", "error", "plain"]
+regex = re.compile(r"^\s+(%s) " % "|".join(bad_calls))
+
 
 class package(PkgbuildRule):
     name = "makepkgfunctions"
     description = "Looks for calls to makepkg functionality"
 
     def analyze(self, pkginfo, pkgbuild):
-        bad_calls = ["msg", "msg2", "warning", "error", "plain"]
-        regex = re.compile(r"^\s+(%s) " % "|".join(bad_calls))
         hits = set()
-        for i in pkginfo.pkgbuild:
-            if match := regex.match(i):
+        for line in pkginfo.pkgbuild_model.lines:
+            if match := regex.match(line.code):
                 call = match.group(1)
                 hits.add(call)
         for i in hits:
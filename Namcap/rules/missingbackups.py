@@ -7,6 +7,7 @@ from Namcap.ruleclass import TarballRule
 class package(TarballRule):
     name = "missingbackups"
     description = "Backup files listed in package should exist"
+    required_fields = ("backup",)
 
     def analyze(self, pkginfo, tar):
         if "backup" not in pkginfo or len(pkginfo["backup"]) == 0:
@@ -15,4 +16,4 @@ class package(TarballRule):
         found_files = set(tar.getnames())
         missing_backups = known_backups - found_files
         for backup in missing_backups:
-            self.errors.append(("missing-backup-file %s", backup))
+            self.errors.append(("missing-backup-file %s", (backup,)))
@@ -8,6 +8,8 @@ import re
 from Namcap.ruleclass import PkgbuildRule
 
 RE_IS_HEXNUMBER = re.compile(r"[0-9a-f]+")
+RE_CONTRIBUTOR = re.compile(r"\s*Contributor\s*:")
+RE_MAINTAINER = re.compile(r"\s*Maintainer\s*:")
 
 
 class ChecksumsRule(PkgbuildRule):
@@ -56,10 +58,10 @@ class TagsRule(PkgbuildRule):
     def analyze(self, pkginfo, tar):
         contributortag = 0
         maintainertag = 0
-        for i in pkginfo.pkgbuild:
-            if re.match(r"#\s*Contributor\s*:", i):
+        for comment in pkginfo.pkgbuild_model.comments:
+            if RE_CONTRIBUTOR.match(comment):
                 contributortag = 1
-            if re.match(r"#\s*Maintainer\s*:", i):
+            if RE_MAINTAINER.match(comment):
                 maintainertag = 1
 
         if contributortag != 1:
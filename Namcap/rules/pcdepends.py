@@ -88,6 +88,7 @@ def finddepends(pclist):
 class PkgConfigDependenciesRule(TarballRule):
     name = "pcdepends"
     description = "Checks dependencies caused by pkg-config files"
+    member_prefixes = ("usr/lib/pkgconfig", "usr/share/pkgconfig", "usr/lib32/pkgconfig")
 
     def analyze(self, pkginfo, tar):
         pclist: dict[str, set[str]] = defaultdict(set)
@@ -109,4 +110,5 @@ class PkgConfigDependenciesRule(TarballRule):
                 needing = set().union(*[pclist[lib] for lib in libraries])
                 reasons = pkginfo.detected_deps.setdefault(pkg, [])
                 reasons.append(("pkgconf-needed %s %s", (str(files), str(list(needing)))))
-                self.infos.append(("pkgconf-dependence %s in %s", (pkg, str(files))))
+                if self.report_infos:
+                    self.infos.append(("pkgconf-dependence %s in %s", (pkg, str(files))))
@@ -11,4 +11,4 @@ class package(TarballRule):
     def analyze(self, pkginfo, tar):
         for i in tar.getnames():
             if i.endswith("perllocal.pod"):
-                self.errors.append(("perllocal-pod-present %s", i))
+                self.errors.append(("perllocal-pod-present %s", (i,)))
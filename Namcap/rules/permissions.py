@@ -3,6 +3,7 @@
 
 import stat
 
+from Namcap.members import member_table
 from Namcap.ruleclass import TarballRule
 
 
@@ -11,15 +12,17 @@ class package(TarballRule):
     description = "Checks file permissions."
 
     def analyze(self, pkginfo, tar):
-        for i in tar.getmembers():
-            if not i.mode & stat.S_IROTH and not (i.issym() or i.islnk()):
-                self.warnings.append(("file-not-world-readable %s", i.name))
-            if i.mode & stat.S_IWOTH and not (i.issym() or i.islnk()):
-                self.warnings.append(("file-world-writable %s", i.name))
-            if not i.mode & stat.S_IXOTH and i.isdir():
-                self.warnings.append(("directory-not-world-executable %s", i.name))
-            if str(i.name).endswith(".a") and not (i.issym() or i.islnk()):
-                if i.mode != 0o644 and i.mode != 0o444:
-                    self.warnings.append(("incorrect-library-permissions %s", i.name))
-            if i.mode & (stat.S_ISUID | stat.S_ISGID):
-                self.warnings.append(("file-setugid %s", i.name))
+        table = member_table(tar)
+        for i, (name, mode) in enumerate(zip(table.names, table.modes)):
+            islink = table.islink(i)
+            if not mode & stat.S_IROTH and not islink:
+                self.warnings.append(("file-not-world-readable %s", (name,)))
+            if mode & stat.S_IWOTH and not islink:
+                self.warnings.append(("file-world-writable %s", (name,)))
+            if not mode & stat.S_IXOTH and table.isdir(i):
+                self.warnings.append(("directory-not-world-executable %s", (name,)))
+            if name.endswith(".a") and not islink:
+                if mode != 0o644 and mode != 0o444:
+                    self.warnings.append(("incorrect-library-permissions %s", (name,)))
+            if mode & (stat.S_ISUID | stat.S_ISGID):
+                self.warnings.append(("file-setugid %s", (name,)))
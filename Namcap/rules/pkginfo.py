@@ -31,6 +31,7 @@ class UrlRule(PkgInfoRule):
 class LicenseRule(PkgInfoRule):
     name = "license"
     description = "Verifies license is included in a PKGBUILD"
+    skip_debug = True
 
     def analyze(self, pkginfo, tar):
         if is_debug(pkginfo):
@@ -49,4 +50,4 @@ class NonUniqueSourcesRule(PkgbuildRule):
             if "::" not in source_file and re.match(
                 r"^[vV]?(([0-9]){8}|([0-9]+\.?)+)\.", os.path.basename(source_file)
             ):
-                self.warnings.append(("non-unique-source-name %s", os.path.basename(source_file)))
+                self.warnings.append(("non-unique-source-name %s", (os.path.basename(source_file),)))
@@ -110,14 +110,16 @@ def _mtime_filter(mtimes):
 class package(TarballRule):
     name = "py_mtime"
     description = "Check for py timestamps that are ahead of pyc/pyo timestamps"
+    member_kinds = frozenset({"pyc"})
 
     def analyze(self, pkginfo, tar):
         mtree_status = _try_mtree(tar)
         tar_status = _try_tar(tar)
         if mtree_status is False and tar_status:
             # mtree only
-            self.warnings = [("py-mtime-mtree-warning", ())]
+            self.warnings.append(("py-mtime-mtree-warning", ()))
         elif not tar_status:
             # tar or both
-            self.errors = [("py-mtime-tar-error", ())]
-        self.infos = [("py-mtime-file-name %s", f[1:]) for f in _mtime_filter(_generic_timestamps(tar))]
+            self.errors.append(("py-mtime-tar-error", ()))
+        if self.report_infos:
+            self.infos.extend(("py-mtime-file-name %s", (f[1:],)) for f in _mtime_filter(_generic_timestamps(tar)))
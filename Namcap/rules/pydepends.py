@@ -132,6 +132,7 @@ def get_imports(fileobj, filename, modules, gir_modules, gir_versions):
 class PythonDependencyRule(TarballRule):
     name = "pydepends"
     description = "Checks python dependencies"
+    member_kinds = frozenset({"py", "script"})
 
     def analyze(self, pkginfo, tar):
         modules: dict[str, set[str]] = defaultdict(set)
@@ -172,4 +173,5 @@ class PythonDependencyRule(TarballRule):
                 needing = set().union(*[liblist[lib] for lib in libraries])
                 reasons = pkginfo.detected_deps.setdefault(pkg, [])
                 reasons.append(("python-modules-needed %s %s", (str(files), str(list(needing)))))
-                self.infos.append(("python-module-dependence %s in %s", (pkg, str(files))))
+                if self.report_infos:
+                    self.infos.append(("python-module-dependence %s in %s", (pkg, str(files))))
@@ -50,6 +50,7 @@ def get_imports(string, filename, modules):
 class QmlDependencyRule(TarballRule):
     name = "qmldepends"
     description = "Checks QML dependencies"
+    member_kinds = frozenset({"qml", "elf"})
 
     def analyze(self, pkginfo, tar):
         modules: dict[str, set[str]] = defaultdict(set)
@@ -90,4 +91,5 @@ class QmlDependencyRule(TarballRule):
                 needing = set().union(*[liblist[lib] for lib in libraries])
                 reasons = pkginfo.detected_deps.setdefault(pkg, [])
                 reasons.append(("qml-modules-needed %s %s", (str(files), str(list(needing)))))
-                self.infos.append(("qml-module-dependence %s in %s", (pkg, str(files))))
+                if self.report_infos:
+                    self.infos.append(("qml-module-dependence %s in %s", (pkg, str(files))))
@@ -27,6 +27,7 @@ def get_rpaths(fileobj):
 class package(TarballRule):
     name = "rpath"
     description = "Verifies correct and secure RPATH for files."
+    member_kinds = frozenset({"elf"})
 
     def analyze(self, pkginfo, tar):
         for entry in tar:
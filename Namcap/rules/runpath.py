@@ -25,6 +25,7 @@ def get_runpaths(fileobj):
 class package(TarballRule):
     name = "runpath"
     description = "Verifies if RUNPATH is secure"
+    member_kinds = frozenset({"elf"})
 
     def analyze(self, pkginfo, tar):
         for entry in tar:
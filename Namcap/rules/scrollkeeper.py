@@ -1,8 +1,7 @@
 # Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
 # SPDX-License-Identifier: GPL-2.0-or-later
 
-import re
-
+from Namcap.pathpolicy import path_matches
 from Namcap.ruleclass import TarballRule
 
 
@@ -11,7 +10,6 @@ class package(TarballRule):
     description = "Verifies that there aren't any scrollkeeper directories."
 
     def analyze(self, pkginfo, tar):
-        scroll = re.compile(r"var.*/scrollkeeper/?$")
-        for i in tar.getnames():
-            if scroll.search(i):
-                self.errors.append(("scrollkeeper-dir-exists %s", i))
+        matches = path_matches(tar)
+        for index in matches.with_label("scrollkeeper"):
+            self.errors.append(("scrollkeeper-dir-exists %s", (matches.table.names[index],)))
@@ -47,11 +47,9 @@ def findowners(scriptlist):
 
         # strip leading slash
         scriptpath = out.lstrip("/")
-        for pkg in Namcap.package.get_installed_packages():
-            pkg_files = [fname for fname, fsize, fmode in pkg.files]
-            if scriptpath in pkg_files:
-                pkglist.setdefault(pkg.name, set()).add(s)
-                scriptfound.add(s)
+        for pkgname in Namcap.package.get_file_owners(scriptpath):
+            pkglist.setdefault(pkgname, set()).add(s)
+            scriptfound.add(s)
 
     orphans = list(set(scriptlist) - scriptfound)
     return pkglist, orphans
@@ -60,6 +58,7 @@ def findowners(scriptlist):
 class ShebangDependsRule(TarballRule):
     name = "shebangdepends"
     description = "Checks dependencies semi-smartly."
+    member_kinds = frozenset({"script"})
 
     def analyze(self, pkginfo, tar):
         scriptlist: dict[str, set[str]] = {}
@@ -81,9 +80,10 @@ class ShebangDependsRule(TarballRule):
             reasons.append(("programs-needed %s %s", (str(list(progs)), str(list(needing)))))
 
         # Do the script handling stuff
-        for i, v in scriptlist.items():
-            files = list(v)
-            self.infos.append(("script-link-detected %s in %s", (i, str(files))))
+        if self.report_infos:
+            for i, v in scriptlist.items():
+                files = list(v)
+                self.infos.append(("script-link-detected %s in %s", (i, str(files))))
 
         # Handle "no package associated" errors
         self.warnings.extend([("library-no-package-associated %s %s", (i, str(list(scriptlist[i])))) for i in orphans])
@@ -5,70 +5,45 @@
 
 import os
 import re
-import subprocess
 from collections import defaultdict
-from typing import Literal, TypeAlias
-
-from elftools.elf.dynamic import DynamicSection
-from elftools.elf.elffile import ELFFile
+from typing import TypeAlias
 
+import Namcap.facts
+import Namcap.ldso
 import Namcap.package
 from Namcap.ruleclass import TarballRule
-from Namcap.rules.rpath import get_rpaths
-from Namcap.rules.runpath import get_runpaths
-from Namcap.util import is_elf
-
-Architecture: TypeAlias = Literal["i686", "x86-64"]
-
-libcache: dict[Architecture, dict[str, str]] = {"i686": {}, "x86-64": {}}
 
 _DependsMap: TypeAlias = dict[str, str]
 _LibMap: TypeAlias = dict[str, set[str]]
 _ProvidesMap: TypeAlias = dict[str, set[str]]
 
 
-def scanlibs(fileobj, filename, custom_libs, liblist, libdepends, libprovides):
+def scanlibs(info, filename, search, liblist, libdepends, libprovides):
     """
-    Find shared libraries in a file-like binary object
+    Find shared libraries in the dynamic section of an ELF file
 
     If it depends on a library or provides one, store that library's path.
+    Libraries found in the package itself are not dependencies.
     """
 
-    if not is_elf(fileobj):
-        return {}
-
-    elffile = ELFFile(fileobj)
-    for section in elffile.iter_sections():
-        if not isinstance(section, DynamicSection):
+    bitsize = info.machine[1]
+    # DT_SONAME means it provides a library
+    if info.soname is not None and os.path.dirname(filename) in ["usr/lib", "usr/lib32"]:
+        soname = re.sub(r"\.so.*", ".so", info.soname)
+        soversion = re.sub(r"^.*\.so\.", "", info.soname)
+        libprovides[soname + "=" + soversion + "-" + str(bitsize)].add(filename)
+    # DT_NEEDED means shared library
+    origin = "/" + os.path.dirname(filename)
+    for libname in info.needed:
+        soname = re.sub(r"\.so.*", ".so", libname)
+        soversion = re.sub(r"^.*\.so\.", "", libname)
+        found = search.find(libname, info, origin)
+        if found is not None and found.in_package:
             continue
-        for tag in section.iter_tags():
-            bitsize = elffile.elfclass
-            match bitsize:
-                case 32:
-                    architecture: Architecture = "i686"
-                case 64:
-                    architecture = "x86-64"
-            # DT_SONAME means it provides a library
-            if tag.entry.d_tag == "DT_SONAME" and os.path.dirname(filename) in ["usr/lib", "usr/lib32"]:
-                soname = re.sub(r"\.so.*", ".so", tag.soname)
-                soversion = re.sub(r"^.*\.so\.", "", tag.soname)
-                libprovides[soname + "=" + soversion + "-" + str(bitsize)].add(filename)
-            # DT_NEEDED means shared library
-            if tag.entry.d_tag != "DT_NEEDED":
-                continue
-            libname = tag.needed
-            soname = re.sub(r"\.so.*", ".so", libname)
-            soversion = re.sub(r"^.*\.so\.", "", libname)
-            if libname in custom_libs:
-                libpath = custom_libs[libname][1:]
-                continue
-            try:
-                libpath = os.path.abspath(libcache[architecture][libname])[1:]
-            except KeyError:
-                # We didn't know about the library, so add it for fail later
-                libpath = libname
-            libdepends[soname + "=" + soversion + "-" + str(bitsize)] = libpath
-            liblist[libpath].add(filename)
+        # We didn't know about the library, so add it for fail later
+        libpath = libname if found is None else found.path[1:]
+        libdepends[soname + "=" + soversion + "-" + str(bitsize)] = libpath
+        liblist[libpath].add(filename)
 
 
 def finddepends(libdepends):
@@ -121,21 +96,6 @@ def finddepends(libdepends):
     return dependlist, libdependlist, orphans, missing_provides
 
 
-def filllibcache() -> None:
-    var = subprocess.Popen(
-        "ldconfig -p", env={"LANG": "C"}, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE
-    ).communicate()
-    libline = re.compile(r"\s*(.*) \((.*)\) => (.*)")
-    for j in var[0].decode("ascii").splitlines():
-        g = libline.match(j)
-        if g is not None:
-            if g.group(2).startswith("libc6,x86-64"):
-                libcache["x86-64"][g.group(1)] = g.group(3)
-            else:
-                # TODO: This is bogus; what do non x86-architectures print?
-                libcache["i686"][g.group(1)] = g.group(3)
-
-
 class SharedLibsRule(TarballRule):
     name = "sodepends"
     description = "Checks dependencies caused by linked shared libraries"
@@ -147,26 +107,15 @@ class SharedLibsRule(TarballRule):
         dependlist = {}
         libdependlist = {}
         missing_provides = {}
-        filllibcache()
         os.environ["LC_ALL"] = "C"
-        pkg_so_files = ["/" + n for n in tar.getnames() if ".so" in n]
+        search = Namcap.ldso.LibrarySearch(tar.getnames())
 
         for entry in tar:
             if not entry.isfile():
                 continue
-            f = tar.extractfile(entry)
-            # find anything that could be rpath related
-            rpath_files = {}
-            if is_elf(f):
-                rpaths = list(get_rpaths(f)) + list(get_runpaths(f))
-                f.seek(0)
-                for n in pkg_so_files:
-                    for rp in rpaths:
-                        rp = os.path.normpath(rp.replace("$ORIGIN", "/" + os.path.dirname(entry.path)))
-                        if os.path.dirname(n) == rp:
-                            rpath_files[os.path.basename(n)] = n
-            scanlibs(f, entry.name, rpath_files, liblist, libdepends, libprovides)
-            f.close()
+            facts = Namcap.facts.elf_facts(tar, entry)
+            if facts is not None:
+                scanlibs(facts.dynamic, entry.name, search, liblist, libdepends, libprovides)
 
         # Ldd all the files and find all the link and script dependencies
         dependlist, libdependlist, orphans, missing_provides = finddepends(libdepends)
@@ -184,12 +133,16 @@ class SharedLibsRule(TarballRule):
         )
 
         # Handle when a required soname does not provided by the associated package yet
-        self.infos.extend(
-            [
-                ("libdepends-missing-provides %s %s (%s)", (i, missing_provides[i], str(list(liblist[libdepends[i]]))))
-                for i in missing_provides
-            ]
-        )
+        if self.report_infos:
+            self.infos.extend(
+                [
+                    (
+                        "libdepends-missing-provides %s %s (%s)",
+                        (i, missing_provides[i], str(list(liblist[libdepends[i]]))),
+                    )
+                    for i in missing_provides
+                ]
+            )
 
         # Print link-level deps
         for pkg, libraries in dependlist.items():
@@ -198,32 +151,34 @@ class SharedLibsRule(TarballRule):
                 needing = set().union(*[liblist[lib] for lib in libraries])
                 reasons = pkginfo.detected_deps.setdefault(pkg, [])
                 reasons.append(("libraries-needed %s %s", (str(files), str(list(needing)))))
-                self.infos.append(("link-level-dependence %s in %s", (pkg, str(files))))
+                if self.report_infos:
+                    self.infos.append(("link-level-dependence %s in %s", (pkg, str(files))))
 
         # Check for soname dependencies
-        for i in libdependlist:
-            if i in pkginfo["depends"]:
-                self.infos.append(
-                    (
-                        "libdepends-detected-satisfied %s %s (%s)",
-                        (i, libdependlist[i], str(list(liblist[libdepends[i]]))),
+        if self.report_infos:
+            for i in libdependlist:
+                if i in pkginfo["depends"]:
+                    self.infos.append(
+                        (
+                            "libdepends-detected-satisfied %s %s (%s)",
+                            (i, libdependlist[i], str(list(liblist[libdepends[i]]))),
+                        )
                     )
-                )
-                continue
-            if i in pkginfo["optdepends"]:
+                    continue
+                if i in pkginfo["optdepends"]:
+                    self.infos.append(
+                        (
+                            "libdepends-detected-but-optional %s %s (%s)",
+                            (i, libdependlist[i], str(list(liblist[libdepends[i]]))),
+                        )
+                    )
+                    continue
                 self.infos.append(
                     (
-                        "libdepends-detected-but-optional %s %s (%s)",
+                        "libdepends-detected-not-included %s %s (%s)",
                         (i, libdependlist[i], str(list(liblist[libdepends[i]]))),
                     )
                 )
-                continue
-            self.infos.append(
-                (
-                    "libdepends-detected-not-included %s %s (%s)",
-                    (i, libdependlist[i], str(list(liblist[libdepends[i]]))),
-                )
-            )
 
         for i in pkginfo["depends"]:
             if ".so" in i and i not in libdependlist:
@@ -231,19 +186,21 @@ class SharedLibsRule(TarballRule):
             if i.endswith(".so"):
                 self.errors.append(("libdepends-without-version %s", (i,)))
 
-        self.infos.append(
-            (
-                "libdepends-by-namcap-sight depends=(%s)",
-                (" ".join(sorted(set(libdependlist) | set(missing_provides.values()))),),
+        if self.report_infos:
+            self.infos.append(
+                (
+                    "libdepends-by-namcap-sight depends=(%s)",
+                    (" ".join(sorted(set(libdependlist) | set(missing_provides.values()))),),
+                )
             )
-        )
 
         # Check provided libraries
-        for i in libprovides:
-            if i in pkginfo["provides"]:
-                self.infos.append(("libprovides-satisfied %s %s", (i, str(list(libprovides[i])))))
-                continue
-            self.infos.append(("libprovides-unsatisfied %s %s", (i, str(list(libprovides[i])))))
+        if self.report_infos:
+            for i in libprovides:
+                if i in pkginfo["provides"]:
+                    self.infos.append(("libprovides-satisfied %s %s", (i, str(list(libprovides[i])))))
+                    continue
+                self.infos.append(("libprovides-unsatisfied %s %s", (i, str(list(libprovides[i])))))
 
         for i in pkginfo["provides"]:
             if ".so" in i and i not in libprovides:
@@ -251,7 +208,8 @@ class SharedLibsRule(TarballRule):
             if i.endswith(".so"):
                 self.errors.append(("libprovides-without-version %s", (i,)))
 
-        self.infos.append(("libprovides-by-namcap-sight provides=(%s)", (" ".join(libprovides),)))
+        if self.report_infos:
+            self.infos.append(("libprovides-by-namcap-sight provides=(%s)", (" ".join(libprovides),)))
 
         # Check for packages in testing
         for i in dependlist.keys():
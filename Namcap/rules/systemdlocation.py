@@ -1,8 +1,7 @@
 # Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
 # SPDX-License-Identifier: GPL-2.0-or-later
 
-import os
-
+from Namcap.pathpolicy import path_matches
 from Namcap.ruleclass import TarballRule
 
 
@@ -19,13 +18,11 @@ class systemdlocationRule(TarballRule):
         if "provides" in pkginfo:
             if "systemd" in pkginfo["provides"]:
                 return
-        for entry in tar:
+        matches = path_matches(tar)
+        for index in matches.with_label("systemd-location"):
             # ignore the actual directory, as that's handled by emptydirs
-            if entry.isdir():
+            if matches.table.isdir(index):
                 continue
 
-            name = os.path.normpath(entry.name)
-
             # check for files in /etc/systemd/system/
-            if name.startswith("etc/systemd/system/"):
-                self.warnings.append(("systemd-location %s", name))
+            self.warnings.append(("systemd-location %s", (matches.names[index],)))
@@ -2,61 +2,73 @@
 # SPDX-License-Identifier: GPL-2.0-or-later
 
 import os
-import re
-import subprocess
-import tempfile
 
-from Namcap.ruleclass import TarballRule
-from Namcap.util import is_elf
+from elftools.common.exceptions import ELFError
 
-libre = re.compile(r"^\t(/.*)")
-lddfail = re.compile(r"^\tnot a dynamic executable")
+import Namcap.facts
+import Namcap.ldso
+import Namcap.symbols
+from Namcap.ruleclass import TarballRule
 
 
-def get_unused_sodepends(filename):
-    p = subprocess.Popen(
-        ["ldd", "-r", "-u", filename], env={"LANG": "C"}, stdout=subprocess.PIPE, stderr=subprocess.PIPE
-    )
-    var = p.communicate()
-    if p.returncode == 0:
-        return
-    for j in var[0].decode("ascii").splitlines():
-        # Don't raise an error, as the executable might be a valid ELF file,
-        # just not a dynamically linked one
-        n = lddfail.search(j)
-        if n is not None:
-            return
+def get_unused_sodepends(symbols, libraries):
+    """
+    Finds the needed libraries no undefined symbol of an object binds to, like ldd -u
 
-        n = libre.search(j)
-        if n is not None:
-            yield n.group(1)
+    symbols   -- the DynamicSymbols of the object
+    libraries -- [(soname, path, exported symbols)] of its needed libraries, in DT_NEEDED order
+    """
+    used = set()
+    # symbols bind to the object itself first, then to the first needed library defining them
+    for symbol in symbols.undefined - symbols.exported:
+        for soname, path, exported in libraries:
+            if symbol in exported:
+                used.add(path)
+                break
+    for soname, path, exported in libraries:
+        if path not in used and soname not in symbols.verneed:
+            yield path
 
 
 class package(TarballRule):
     name = "unusedsodepends"
     description = "Checks for unused dependencies caused by linked shared libraries"
+    member_kinds = frozenset({"elf"})
 
     def analyze(self, pkginfo, tar):
+        search = Namcap.ldso.LibrarySearch(tar.getnames())
+
+        def get_exports(found):
+            if not found.in_package:
+                return Namcap.symbols.get_exports(found.path, search.root)
+            facts = Namcap.facts.elf_facts(tar, tar.getmember(found.path[1:]))
+            if facts is None:
+                raise ELFError("%s is not an ELF file" % found.path)
+            return facts.symbols.exported
+
         for entry in tar:
             if not entry.isfile():
                 continue
 
             # is it an ELF file ?
-            f = tar.extractfile(entry)
-            if not is_elf(f):
-                f.close()
+            facts = Namcap.facts.elf_facts(tar, entry)
+            if facts is None or not facts.dynamic.needed:
                 continue
-            elf = f.read()
-            f.close()
-
-            # write it to a temporary file
-            f = tempfile.NamedTemporaryFile(delete=False)
-            f.write(elf)
-            f.close()
+            info, symbols = facts
 
-            os.chmod(f.name, 0o755)
+            # libraries which can not be found or read are left out, they might be used
+            libraries = []
+            origin = "/" + entry.name.rpartition("/")[0]
+            for soname in info.needed:
+                found = search.find(soname, info, origin)
+                if found is None:
+                    continue
+                # reported by the name it is needed as, like ldd does
+                path = os.path.join(os.path.dirname(found.path), os.path.basename(soname))
+                try:
+                    libraries.append((soname, path, get_exports(found)))
+                except (OSError, ELFError, KeyError):
+                    continue
 
-            for lib in get_unused_sodepends(f.name):
+            for lib in get_unused_sodepends(symbols, libraries):
                 self.warnings.append(("unused-sodepend %s %s", (lib, entry.name)))
-
-            os.unlink(f.name)
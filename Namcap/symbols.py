@@ -0,0 +1,147 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+The dynamic symbols of ELF files, and a persistent database of the symbols
+exported by installed libraries.
+
+The exports of a library are stored in the persistent cache as a sorted
+table, keyed by the path, size and modification time of the library, and
+looked up in place from a memory map of the cached file rather than read
+back in full:
+
+    magic (16 bytes) | count (uint32) | count string offsets (uint32) | NUL terminated names
+"""
+
+import mmap
+import os
+import struct
+from collections.abc import Iterable, Iterator
+from typing import IO, NamedTuple
+
+from elftools.elf.elffile import ELFFile
+from elftools.elf.gnuversions import GNUVerNeedSection
+from elftools.elf.sections import SymbolTableSection
+
+import Namcap.cache
+
+MAGIC = b"namcap-symbols1\0"
+HEADER = struct.Struct("<16sI")
+OFFSET = struct.Struct("<I")
+
+_exports: dict[str, "SymbolTable"] = {}
+
+
+class DynamicSymbols(NamedTuple):
+    """
+    The dynamic symbols of an ELF file
+
+    exported   -- names of the global symbols it defines
+    undefined  -- names of the global symbols it needs to be defined elsewhere
+    verneed    -- names of the libraries it needs symbol versions from
+    """
+
+    exported: set[str]
+    undefined: set[str]
+    verneed: set[str]
+
+
+def read_dynamic_symbols(fileobj: IO[bytes]) -> DynamicSymbols:
+    "Reads the .dynsym table and version needs of an ELF file"
+    elffile = ELFFile(fileobj)
+    symbols = DynamicSymbols(set(), set(), set())
+    for section in elffile.iter_sections():
+        if isinstance(section, GNUVerNeedSection):
+            symbols.verneed.update(verneed.name for verneed, _ in section.iter_versions() if verneed.name)
+        if not isinstance(section, SymbolTableSection) or section["sh_type"] != "SHT_DYNSYM":
+            continue
+        for symbol in section.iter_symbols():
+            if not symbol.name or symbol["st_info"]["bind"] not in ("STB_GLOBAL", "STB_WEAK"):
+                continue
+            if symbol["st_shndx"] == "SHN_UNDEF":
+                # weak references may stay undefined
+                if symbol["st_info"]["bind"] == "STB_GLOBAL":
+                    symbols.undefined.add(symbol.name)
+            elif symbol["st_other"]["visibility"] in ("STV_DEFAULT", "STV_PROTECTED"):
+                symbols.exported.add(symbol.name)
+    return symbols
+
+
+def pack_symbols(names: Iterable[str]) -> bytes:
+    "Packs symbol names into the table format"
+    encoded = sorted({name.encode("utf-8", "surrogateescape") for name in names})
+    offsets = []
+    position = 0
+    for name in encoded:
+        offsets.append(OFFSET.pack(position))
+        position += len(name) + 1
+    return HEADER.pack(MAGIC, len(encoded)) + b"".join(offsets) + b"".join(name + b"\0" for name in encoded)
+
+
+class SymbolTable:
+    "A table of symbol names, looked up by binary search in a buffer in the table format"
+
+    def __init__(self, buffer: bytes | mmap.mmap) -> None:
+        try:
+            magic, count = HEADER.unpack_from(buffer)
+        except struct.error:
+            raise ValueError("Not a symbol table") from None
+        if magic != MAGIC:
+            raise ValueError("Not a symbol table")
+        self.buffer = buffer
+        self.count: int = count
+        self.strings = HEADER.size + OFFSET.size * self.count
+        # lookups would read past the end of a truncated table
+        if len(buffer) < self.strings or (self.count and buffer[-1] != 0):
+            raise ValueError("Truncated symbol table")
+
+    def name(self, index: int) -> bytes:
+        (offset,) = OFFSET.unpack_from(self.buffer, HEADER.size + OFFSET.size * index)
+        start = self.strings + offset
+        return bytes(self.buffer[start : self.buffer.find(b"\0", start)])
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(self.count):
+            yield self.name(index).decode("utf-8", "surrogateescape")
+
+    def __contains__(self, name: object) -> bool:
+        if not isinstance(name, str):
+            return False
+        key = name.encode("utf-8", "surrogateescape")
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            current = self.name(middle)
+            if current == key:
+                return True
+            if current < key:
+                low = middle + 1
+            else:
+                high = middle
+        return False
+
+
+def get_exports(path: str, root: str = "/") -> SymbolTable:
+    "The symbols exported by the library installed at path in root, through the persistent cache"
+    fullpath = os.path.join(root, path.lstrip("/"))
+    if fullpath in _exports:
+        return _exports[fullpath]
+    st = os.stat(fullpath)
+    key = Namcap.cache.make_key(os.path.abspath(fullpath), str(st.st_size), str(st.st_mtime_ns))
+    table = None
+    if (buffer := Namcap.cache.load_mmap("symbols", key)) is not None:
+        try:
+            table = SymbolTable(buffer)
+        except ValueError:
+            # a truncated or foreign entry, built again
+            buffer.close()
+    if table is None:
+        with open(fullpath, "rb") as f:
+            data = pack_symbols(read_dynamic_symbols(f).exported)
+        Namcap.cache.store("symbols", key, data)
+        table = SymbolTable(data)
+    _exports[fullpath] = table
+    return table
@@ -2,6 +2,10 @@
 # SPDX-License-Identifier: GPL-2.0-or-later
 
 import os
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .types import Diagnostic
 
 tags: dict[str, str] = {}
 
@@ -30,12 +34,18 @@ def load_tags(filename: str | None = None, machine: bool = False) -> None:
             tags[machinetag] = humantag
 
 
-def format_message(msg: tuple[str, str]) -> str:
+def format_message(msg: "Diagnostic") -> str:
     """
-    Formats a tuple (tag, data)
+    Formats a tuple (tag, data). Lists in data are diagnostics nested in the
+    message, such as the reasons of a detected dependency, formatted in turn.
     """
     tag, data = msg
-    return tags[tag] % data
+    return tags[tag] % tuple(format_messages(arg) if isinstance(arg, list) else arg for arg in data)
+
+
+def format_messages(msgs: list["Diagnostic"]) -> str:
+    "Formats a list of diagnostics into one string"
+    return ", ".join(format_message(msg) for msg in msgs)
 
 
 # Try to load tags by default
@@ -0,0 +1,10 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    "Every test starts with an empty persistent cache, instead of the one of the user running them"
+    monkeypatch.setenv("NAMCAP_CACHE_DIR", str(tmp_path / "cache"))
@@ -9,6 +9,7 @@ import tarfile
 import tempfile
 import unittest
 
+import Namcap.members
 import Namcap.package
 
 makepkg_conf = """
@@ -64,7 +65,7 @@ class MakepkgTest(unittest.TestCase):
         # process PKGINFO
         pkg = Namcap.package.load_from_tarball(filename + ".xz")
 
-        tar = tarfile.open(filename + ".xz")
+        tar = Namcap.members.PackageArchive(tarfile.open(filename + ".xz"))
         r = rule()
         r.analyze(pkg, tar)
         tar.close()
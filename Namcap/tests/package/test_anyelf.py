@@ -83,7 +83,7 @@ package() {
             f.write(self.pkgbuild_elf)
         self.run_makepkg()
         pkg, r = self.run_rule_on_tarball(os.path.join(self.tmpdir, pkgfile), Namcap.rules.anyelf.package)
-        self.assertEqual(r.errors, [("elffile-in-any-package %s", "usr/bin/ls")])
+        self.assertEqual(r.errors, [("elffile-in-any-package %s", ("usr/bin/ls",))])
         self.assertEqual(r.warnings, [])
         self.assertEqual(r.infos, [])
 
@@ -93,6 +93,6 @@ package() {
             f.write(self.pkgbuild_static)
         self.run_makepkg()
         pkg, r = self.run_rule_on_tarball(os.path.join(self.tmpdir, pkgfile), Namcap.rules.anyelf.package)
-        self.assertEqual(r.errors, [("elffile-in-any-package %s", "usr/lib/library.a")])
+        self.assertEqual(r.errors, [("elffile-in-any-package %s", ("usr/lib/library.a",))])
         self.assertEqual(r.warnings, [])
         self.assertEqual(r.infos, [])
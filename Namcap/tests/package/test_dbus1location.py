@@ -35,5 +35,5 @@ package() {
             os.path.join(self.tmpdir, pkgfile), Namcap.rules.dbus1location.dbus1locationRule
         )
         self.assertEqual(r.errors, [])
-        self.assertEqual(r.warnings, [("dbus-1-location %s", "etc/dbus-1/system.d/foo.conf")])
+        self.assertEqual(r.warnings, [("dbus-1-location %s", ("etc/dbus-1/system.d/foo.conf",))])
         self.assertEqual(r.infos, [])
@@ -34,5 +34,5 @@ package() {
         self.run_makepkg()
         pkg, r = self.run_rule_on_tarball(os.path.join(self.tmpdir, pkgfile), Namcap.rules.emptydir.package)
         self.assertEqual(r.errors, [])
-        self.assertEqual(r.warnings, [("empty-directory %s", "usr/share/directory")])
+        self.assertEqual(r.warnings, [("empty-directory %s", ("usr/share/directory",))])
         self.assertEqual(r.infos, [])
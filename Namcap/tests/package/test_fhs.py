@@ -38,16 +38,16 @@ package() {
             f.write(self.pkgbuild)
         self.run_makepkg()
         pkg, r = self.run_rule_on_tarball(os.path.join(self.tmpdir, pkgfile), fhs.FHSRule)
-        self.assertEqual(set(r.errors), set([("file-in-temporary-dir %s", "run/program.pid")]))
+        self.assertEqual(set(r.errors), set([("file-in-temporary-dir %s", ("run/program.pid",))]))
         self.assertEqual(
             set(r.warnings),
             set(
                 [
-                    ("file-in-non-standard-dir %s", "srv/"),
-                    ("file-in-non-standard-dir %s", "srv/index.html"),
-                    ("file-in-non-standard-dir %s", "weird/"),
-                    ("file-in-non-standard-dir %s", "weird/directory/"),
-                    ("file-in-non-standard-dir %s", "weird/directory/file"),
+                    ("file-in-non-standard-dir %s", ("srv/",)),
+                    ("file-in-non-standard-dir %s", ("srv/index.html",)),
+                    ("file-in-non-standard-dir %s", ("weird/",)),
+                    ("file-in-non-standard-dir %s", ("weird/directory/",)),
+                    ("file-in-non-standard-dir %s", ("weird/directory/file",)),
                 ]
             ),
         )
@@ -79,7 +79,7 @@ package() {
             f.write(self.pkgbuild_man)
         self.run_makepkg()
         pkg, r = self.run_rule_on_tarball(os.path.join(self.tmpdir, pkgfile), fhs.FHSManpagesRule)
-        self.assertEqual(r.errors, [("non-fhs-man-page %s", "usr/man/something.1.gz")])
+        self.assertEqual(r.errors, [("non-fhs-man-page %s", ("usr/man/something.1.gz",))])
         self.assertEqual(r.warnings, [])
         self.assertEqual(r.infos, [])
 
@@ -109,6 +109,6 @@ package() {
             f.write(self.pkgbuild_info)
         self.run_makepkg()
         pkg, r = self.run_rule_on_tarball(os.path.join(self.tmpdir, pkgfile), fhs.FHSInfoPagesRule)
-        self.assertEqual(r.errors, [("non-fhs-info-page %s", "usr/info/something.gz")])
+        self.assertEqual(r.errors, [("non-fhs-info-page %s", ("usr/info/something.gz",))])
         self.assertEqual(r.warnings, [])
         self.assertEqual(r.infos, [])
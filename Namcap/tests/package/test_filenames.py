@@ -35,8 +35,8 @@ package() {
         self.run_makepkg()
         pkg, r = self.run_rule_on_tarball(os.path.join(self.tmpdir, pkgfile), Namcap.rules.filenames.package)
         self.assertEqual(r.errors, [])
-        tag, value1 = r.warnings[0]
-        tag, value2 = r.warnings[1]
+        tag, (value1,) = r.warnings[0]
+        tag, (value2,) = r.warnings[1]
         self.assertEqual(tag, "invalid-filename")
         self.assertEqual(
             set((value1.encode(errors="surrogateescape"), value2.encode(errors="surrogateescape"))),
@@ -34,6 +34,6 @@ package() {
             f.write(self.pkgbuild)
         self.run_makepkg()
         pkg, r = self.run_rule_on_tarball(os.path.join(self.tmpdir, pkgfile), Namcap.rules.gnomemime.package)
-        self.assertEqual(r.errors, [("gnome-mime-file %s", "usr/share/applications/mimeinfo.cache")])
+        self.assertEqual(r.errors, [("gnome-mime-file %s", ("usr/share/applications/mimeinfo.cache",))])
         self.assertEqual(r.warnings, [])
         self.assertEqual(r.infos, [])
@@ -42,7 +42,7 @@ package() {
                 [
                     (
                         "dependency-detected-not-included %s (%s)",
-                        ("hicolor-icon-theme", "needed for hicolor theme hierarchy"),
+                        ("hicolor-icon-theme", [("hicolor-icon-theme-needed-for-hicolor-dir", ())]),
                     ),
                 ]
             ),
@@ -82,7 +82,10 @@ package() {
         self.assertEqual(
             r.infos + i,
             [
-                ("dependency-detected-satisfied %s (%s)", ("hicolor-icon-theme", "needed for hicolor theme hierarchy")),
+                (
+                    "dependency-detected-satisfied %s (%s)",
+                    ("hicolor-icon-theme", [("hicolor-icon-theme-needed-for-hicolor-dir", ())]),
+                ),
                 ("depends-by-namcap-sight depends=(%s)", ("hicolor-icon-theme",)),
             ],
         )
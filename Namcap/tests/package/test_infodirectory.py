@@ -35,6 +35,6 @@ package() {
             f.write(self.pkgbuild)
         self.run_makepkg()
         pkg, r = self.run_rule_on_tarball(os.path.join(self.tmpdir, pkgfile), Namcap.rules.infodirectory.InfodirRule)
-        self.assertEqual(r.errors, [("info-dir-file-present %s", "usr/share/info/dir")])
+        self.assertEqual(r.errors, [("info-dir-file-present %s", ("usr/share/info/dir",))])
         self.assertEqual(r.warnings, [])
         self.assertEqual(r.infos, [])
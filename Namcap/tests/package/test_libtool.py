@@ -35,5 +35,5 @@ package() {
         self.run_makepkg()
         pkg, r = self.run_rule_on_tarball(os.path.join(self.tmpdir, pkgfile), Namcap.rules.libtool.package)
         self.assertEqual(r.errors, [])
-        self.assertEqual(r.warnings, [("libtool-file-present %s", "usr/lib/libsomething.la")])
+        self.assertEqual(r.warnings, [("libtool-file-present %s", ("usr/lib/libsomething.la",))])
         self.assertEqual(r.infos, [])
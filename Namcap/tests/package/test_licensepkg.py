@@ -7,9 +7,10 @@ from contextlib import nullcontext as does_not_raise
 from pathlib import Path
 from tarfile import TarInfo
 from typing import Any, ContextManager
+from unittest.mock import patch
 
 from license_expression import BaseSymbol, LicenseSymbol, LicenseWithExceptionSymbol
-from pytest import mark, raises
+from pytest import MonkeyPatch, mark, raises
 
 import Namcap.rules.licensepkg
 from Namcap.rules import licensepkg
@@ -217,6 +218,26 @@ def test_package_license_files(
         assert result == len(licensepkg.package_license_files(tar, "test")[0])
 
 
+def test_package_license_files_symlink_chain(tmp_path: Path) -> None:
+    def add_symlink(tar: tarfile.TarFile, name: str, linkname: str) -> None:
+        member = TarInfo(name)
+        member.type = tarfile.SYMTYPE
+        member.linkname = linkname
+        tar.addfile(member)
+
+    with tarfile.open(tmp_path / "test.tar", "w") as tar:
+        tar.addfile(TarInfo("usr/share/foo/LICENSE"))
+        add_symlink(tar, "usr/share/licenses/test/LICENSE", "/usr/share/bar/LICENSE")
+        add_symlink(tar, "usr/share/bar/LICENSE", "../foo/LICENSE")
+        add_symlink(tar, "usr/share/licenses/test/COPYING", "/usr/share/doc/other/COPYING")
+        add_symlink(tar, "usr/share/licenses/test/LOOP", "LOOP")
+
+        assert licensepkg.package_license_files(tar, "test") == (
+            {"usr/share/foo/LICENSE": True, "usr/share/doc/other/COPYING": False},
+            None,
+        )
+
+
 @mark.parametrize(
     "name, linkname, result, expectation",
     [
@@ -233,6 +254,52 @@ def test_get_symlink_target(name: str, linkname: str, result: str, expectation:
         assert result == licensepkg.get_symlink_target(tarinfo)
 
 
+def test_license_knowledge_base(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setenv("NAMCAP_CACHE_DIR", str(tmp_path / "cache"))
+    (tmp_path / "spdx" / "exceptions").mkdir(parents=True)
+    (tmp_path / "known_licenses.txt").write_text("MIT\nFoo\n")
+    (tmp_path / "known_exceptions.txt").write_text("Bar-exception\n")
+    (tmp_path / "spdx" / "MIT.txt").write_text("")
+    monkeypatch.setattr(licensepkg, "KNOWN_LICENSES_FILE", str(tmp_path / "known_licenses.txt"))
+    monkeypatch.setattr(licensepkg, "KNOWN_EXCEPTIONS_FILE", str(tmp_path / "known_exceptions.txt"))
+    monkeypatch.setattr(licensepkg, "COMMON_LICENSES_DIR", str(tmp_path / "spdx"))
+    monkeypatch.setattr(licensepkg, "COMMON_EXCEPTIONS_DIR", str(tmp_path / "spdx" / "exceptions"))
+    monkeypatch.setattr(licensepkg, "_knowledge_bases", {})
+
+    knowledge_base = licensepkg.get_license_knowledge_base()
+    assert knowledge_base.known_licenses == {LicenseSymbol("MIT"), LicenseSymbol("Foo")}
+    assert knowledge_base.known_exceptions == {LicenseSymbol("Bar-exception", is_exception=True)}
+    assert knowledge_base.common_licenses == {LicenseSymbol("MIT")}
+    assert knowledge_base.common_exceptions == set()
+
+    # a new process loads it from the disk cache
+    licensepkg._knowledge_bases.clear()
+    with patch.object(licensepkg, "get_known_spdx_license_identifiers") as get_known:
+        assert licensepkg.get_license_knowledge_base() == knowledge_base
+        get_known.assert_not_called()
+
+    # adding a common license file invalidates it
+    (tmp_path / "spdx" / "Foo.txt").write_text("")
+    os.utime(tmp_path / "spdx", ns=(0, 0))
+    assert licensepkg.get_license_knowledge_base().common_licenses == {LicenseSymbol("MIT"), LicenseSymbol("Foo")}
+
+
+def test_parse_license_is_cached(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setenv("NAMCAP_CACHE_DIR", str(tmp_path))
+    licensepkg.parse_license.cache_clear()
+    assert licensepkg.get_license_symbols("MIT WITH Bootloader-exception OR Apache-2.0+") == {
+        LicenseWithExceptionSymbol(LicenseSymbol("MIT"), LicenseSymbol("Bootloader-exception", is_exception=True)),
+        LicenseSymbol("Apache-2.0"),
+    }
+    licensepkg.parse_license.cache_clear()
+    with patch.object(licensepkg, "spdx_licensing") as licensing:
+        assert licensepkg.get_license_canonicalized("MIT WITH Bootloader-exception OR Apache-2.0+") == (
+            "MIT WITH Bootloader-exception OR Apache-2.0+"
+        )
+        licensing.assert_not_called()
+    licensepkg.parse_license.cache_clear()
+
+
 class LicenseFileTest(MakepkgTest):
     def test_common_license_requires_no_file(self):
         pkgbuild = """
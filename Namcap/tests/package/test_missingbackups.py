@@ -35,6 +35,6 @@ package() {
             f.write(self.pkgbuild)
         self.run_makepkg()
         pkg, r = self.run_rule_on_tarball(os.path.join(self.tmpdir, pkgfile), Namcap.rules.missingbackups.package)
-        self.assertEqual(r.errors, [("missing-backup-file %s", "etc/imaginary_file.conf")])
+        self.assertEqual(r.errors, [("missing-backup-file %s", ("etc/imaginary_file.conf",))])
         self.assertEqual(r.warnings, [])
         self.assertEqual(r.infos, [])
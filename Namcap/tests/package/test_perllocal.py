@@ -34,6 +34,8 @@ package() {
             f.write(self.pkgbuild)
         self.run_makepkg()
         pkg, r = self.run_rule_on_tarball(os.path.join(self.tmpdir, pkgfile), Namcap.rules.perllocal.package)
-        self.assertEqual(r.errors, [("perllocal-pod-present %s", "usr/lib/perl/5.12/site-local/libmine/perllocal.pod")])
+        self.assertEqual(
+            r.errors, [("perllocal-pod-present %s", ("usr/lib/perl/5.12/site-local/libmine/perllocal.pod",))]
+        )
         self.assertEqual(r.warnings, [])
         self.assertEqual(r.infos, [])
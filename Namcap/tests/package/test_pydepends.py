@@ -3,6 +3,7 @@
 
 import os
 
+import Namcap.depends
 import Namcap.rules.pydepends
 from Namcap.tests.makepkg import MakepkgTest
 
@@ -47,7 +48,7 @@ package() {
             [
                 (
                     "dependency-detected-not-included %s (%s)",
-                    ("pyalpm", "python modules ['pyalpm'] needed in files ['usr/bin/main.py']"),
+                    ("pyalpm", [("python-modules-needed %s %s", ("['pyalpm']", "['usr/bin/main.py']"))]),
                 )
             ],
         )
@@ -5,7 +5,7 @@ import os
 from unittest.mock import patch
 
 import Namcap.rules.qmldepends
-from Namcap.package import pyalpm_handle
+from Namcap.package import get_alpm_handle
 from Namcap.tests.makepkg import MakepkgTest
 
 
@@ -15,7 +15,7 @@ class _DbWithout:
 
     def __init__(self, pkgname):
         self.pkgcache = [
-            alpmPackage for alpmPackage in pyalpm_handle.get_localdb().pkgcache if alpmPackage.name != pkgname
+            alpmPackage for alpmPackage in get_alpm_handle().get_localdb().pkgcache if alpmPackage.name != pkgname
         ]
 
 
@@ -24,7 +24,7 @@ class _AlpmWithout:
     package is not installed locally, even if it really is."""
 
     def __init__(self, pkgname):
-        self.load_pkg = pyalpm_handle.load_pkg
+        self.load_pkg = get_alpm_handle().load_pkg
         self.localdb = _DbWithout(pkgname)
 
     def get_localdb(self):
@@ -51,17 +51,19 @@ package() {
 }
 """
 
-    # This test assumes that the `qt6-declarative` package is not installed.
-    # Temporarily stub the local package database to ensure that condition
-    # even if the host system really has the package installed.
-    @patch.object(Namcap.package, "pyalpm_handle", _AlpmWithout("qt6-declarative"))
     def test_qmldepends(self):
         "Package with missing pacman dependency"
         pkgfile = "__namcap_test_qmldepends-1.0-1-any.pkg.tar"
         with open(os.path.join(self.tmpdir, "PKGBUILD"), "w") as f:
             f.write(self.pkgbuild)
         self.run_makepkg()
-        pkg, r = self.run_rule_on_tarball(os.path.join(self.tmpdir, pkgfile), Namcap.rules.qmldepends.QmlDependencyRule)
+        # This test assumes that the `qt6-declarative` package is not installed.
+        # Temporarily stub the local package database to ensure that condition
+        # even if the host system really has the package installed.
+        with patch.object(Namcap.package, "pyalpm_handle", _AlpmWithout("qt6-declarative")):
+            pkg, r = self.run_rule_on_tarball(
+                os.path.join(self.tmpdir, pkgfile), Namcap.rules.qmldepends.QmlDependencyRule
+            )
         self.assertEqual(
             r.warnings,
             [("qml-module-no-package-associated %s %s", ("QtQuick.Window", "['usr/bin/main.qml']"))],
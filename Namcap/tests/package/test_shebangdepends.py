@@ -3,6 +3,7 @@
 
 import os
 
+import Namcap.depends
 import Namcap.rules.shebangdepends
 from Namcap.tests.makepkg import MakepkgTest
 
@@ -45,7 +46,7 @@ package() {
             [
                 (
                     "dependency-detected-not-included %s (%s)",
-                    ("python", "programs ['python'] needed in scripts ['usr/bin/python_sample']"),
+                    ("python", [("programs-needed %s %s", ("['python']", "['usr/bin/python_sample']"))]),
                 )
             ],
         )
@@ -6,6 +6,7 @@ import os
 from elftools.elf.dynamic import DynamicSection
 from elftools.elf.elffile import ELFFile
 
+import Namcap.depends
 import Namcap.rules.sodepends
 from Namcap.tests.makepkg import MakepkgTest
 
@@ -59,7 +60,7 @@ package() {
             [
                 (
                     "dependency-detected-not-included %s (%s)",
-                    ("pacman", "libraries ['%s'] needed in files ['usr/bin/main']" % alpm_filename),
+                    ("pacman", [("libraries-needed %s %s", ("['%s']" % alpm_filename, "['usr/bin/main']"))]),
                 )
             ],
         )
@@ -60,5 +60,5 @@ package() {
             os.path.join(self.tmpdir, pkgfile), Namcap.rules.systemdlocation.systemdlocationRule
         )
         self.assertEqual(r.errors, [])
-        self.assertEqual(r.warnings, [("systemd-location %s", "etc/systemd/system/systemdsomething")])
+        self.assertEqual(r.warnings, [("systemd-location %s", ("etc/systemd/system/systemdsomething",))])
         self.assertEqual(r.infos, [])
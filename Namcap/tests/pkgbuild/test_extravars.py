@@ -98,7 +98,7 @@ package() {
             set(r.warnings),
             set(
                 [
-                    ("extra-var-begins-without-underscore %s", "mycustomvar"),
+                    ("extra-var-begins-without-underscore %s", ("mycustomvar",)),
                 ]
             ),
         )
@@ -180,7 +180,7 @@ package() {
     def test_example1(self):
         r = self.run_on_pkg(self.pkgbuild1)
         self.assertEqual(r.errors, [])
-        self.assertEqual(r.warnings, [("non-unique-source-name %s", ("v1.0.tar.gz"))])
+        self.assertEqual(r.warnings, [("non-unique-source-name %s", ("v1.0.tar.gz",))])
         self.assertEqual(r.infos, [])
 
         r = self.run_on_pkg(self.pkgbuild2)
@@ -0,0 +1,93 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from Namcap.batch import Batch, find_packages
+from Namcap.package import PacmanPackage
+
+
+def make_pkginfo(name, version, base=None, provides=(), depends=(), arch="x86_64"):
+    return PacmanPackage(
+        data={
+            "name": name,
+            "base": base or name,
+            "version": version,
+            "arch": [arch],
+            "provides": provides,
+            "depends": depends,
+        }
+    )
+
+
+# what load_from_db finds, by name or provision
+installed = {"libc.so=6-64": make_pkginfo("glibc", "2.39-1", provides=["libc.so=6-64"])}
+
+
+@patch("Namcap.package.load_from_db", installed.get)
+class BatchTests(unittest.TestCase):
+    def test_find_packages(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name in ["b-1-1-x86_64.pkg.tar.zst", "b-1-1-x86_64.pkg.tar.zst.sig", "a-1-1-any.pkg.tar.xz", "core.db"]:
+                open(os.path.join(tmpdir, name), "w").close()
+            self.assertEqual(
+                find_packages(tmpdir),
+                [os.path.join(tmpdir, "a-1-1-any.pkg.tar.xz"), os.path.join(tmpdir, "b-1-1-x86_64.pkg.tar.zst")],
+            )
+
+    def test_split_packages(self):
+        batch = Batch()
+        batch.add(make_pkginfo("foo", "1.0-2"))
+        batch.add(make_pkginfo("foo-docs", "1.0-1", base="foo"))
+        batch.add(make_pkginfo("bar", "2.0-1"))
+        self.assertEqual(
+            list(batch.check()),
+            [
+                ("foo", "E", ("split-package-version-mismatch %s %s %s", ("foo", "1.0-2", "1.0-1"))),
+                ("foo-docs", "E", ("split-package-version-mismatch %s %s %s", ("foo", "1.0-1", "1.0-2"))),
+            ],
+        )
+
+    def test_sonames(self):
+        batch = Batch()
+        batch.add(make_pkginfo("libfoo", "1-1", provides=["libfoo.so=1-64"]))
+        batch.add(make_pkginfo("libfoo-compat", "1-1", provides=["libfoo.so=1-64"]))
+        batch.add(make_pkginfo("app", "1-1", depends=["libfoo.so=1-64", "libc.so=6-64", "libbar.so=2-64", "bash"]))
+        self.assertEqual(
+            list(batch.check()),
+            [
+                ("libfoo", "W", ("soname-provided-twice %s %s", ("libfoo.so=1-64", "['libfoo-compat']"))),
+                ("libfoo-compat", "W", ("soname-provided-twice %s %s", ("libfoo.so=1-64", "['libfoo']"))),
+                ("app", "W", ("soname-dependency-not-provided %s", ("libbar.so=2-64",))),
+            ],
+        )
+
+    def test_older_builds(self):
+        batch = Batch()
+        batch.add(make_pkginfo("foo", "1.0-1"))
+        batch.add(make_pkginfo("foo", "1.0-2"))
+        batch.add(make_pkginfo("foo-docs", "1.0-2", base="foo", arch="any"))
+        batch.add(make_pkginfo("libfoo", "1-1", provides=["libfoo.so=1-64"]))
+        batch.add(make_pkginfo("libfoo", "1-2", provides=["libfoo.so=1-64"]))
+        self.assertEqual(list(batch.check()), [])
+
+    def test_arches(self):
+        batch = Batch()
+        for arch in ["x86_64", "aarch64"]:
+            batch.add(make_pkginfo("foo", "1.0-1", arch=arch, provides=["libfoo.so=1-64"]))
+            batch.add(make_pkginfo("app", "1-1", arch=arch, depends=["libfoo.so=1-64"]))
+        batch.add(make_pkginfo("foo-docs", "1.0-2", base="foo", arch="any"))
+        batch.add(make_pkginfo("bar", "1-1", arch="aarch64", provides=["libbar.so=1-64"]))
+        batch.add(make_pkginfo("baz", "1-1", depends=["libbar.so=1-64"]))
+        self.assertEqual(
+            list(batch.check()),
+            [
+                ("foo", "E", ("split-package-version-mismatch %s %s %s", ("foo", "1.0-1", "1.0-2"))),
+                ("foo", "E", ("split-package-version-mismatch %s %s %s", ("foo", "1.0-1", "1.0-2"))),
+                ("foo-docs", "E", ("split-package-version-mismatch %s %s %s", ("foo", "1.0-2", "1.0-1"))),
+                ("baz", "W", ("soname-dependency-not-provided %s", ("libbar.so=1-64",))),
+            ],
+        )
@@ -0,0 +1,70 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import io
+import lzma
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import Namcap.decompress
+
+
+def make_tar(files):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w") as tar:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buf.getvalue()
+
+
+class DecompressTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        # the temporary archives are created there too
+        patcher = patch("tempfile.tempdir", self.tmpdir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.path = os.path.join(self.tmpdir.name, "foo-1-1-any.pkg.tar.xz")
+        with open(self.path, "wb") as f:
+            f.write(lzma.compress(make_tar({".PKGINFO": b"pkgname = foo\n", "usr/bin/foo": b"#!/bin/sh\n"})))
+
+    def test_compression(self):
+        self.assertEqual(Namcap.decompress.compression(self.path), "xz")
+        zst = os.path.join(self.tmpdir.name, "foo.pkg.tar.zst")
+        with open(zst, "wb") as f:
+            f.write(b"\x28\xb5\x2f\xfd\x00\x58")
+        self.assertEqual(Namcap.decompress.compression(zst), "zstd")
+        self.assertTrue(Namcap.decompress.is_tarball(zst))
+        self.assertIsNone(Namcap.decompress.compression(os.path.join(self.tmpdir.name, "missing")))
+        self.assertFalse(Namcap.decompress.is_tarball(self.tmpdir.name))
+
+    @unittest.skipUnless(shutil.which("xz"), "xz is not installed")
+    def test_open_tarball(self):
+        with Namcap.decompress.open_tarball(self.path) as tar:
+            self.assertEqual(tar.getnames(), [".PKGINFO", "usr/bin/foo"])
+            f = tar.extractfile("usr/bin/foo")
+            assert f is not None
+            self.assertEqual(f.read(), b"#!/bin/sh\n")
+            # the decompressed archive is not left behind
+            self.assertEqual(os.listdir(self.tmpdir.name), ["foo-1-1-any.pkg.tar.xz"])
+
+    @unittest.skipUnless(shutil.which("xz"), "xz is not installed")
+    def test_corrupt(self):
+        with open(self.path, "r+b") as f:
+            f.truncate(40)
+        with self.assertRaises(tarfile.ReadError):
+            Namcap.decompress.open_tarball(self.path)
+        self.assertEqual(os.listdir(self.tmpdir.name), ["foo-1-1-any.pkg.tar.xz"])
+
+    def test_without_tool(self):
+        with patch("shutil.which", return_value=None):
+            self.assertIsNone(Namcap.decompress.decompressor("xz"))
+            with Namcap.decompress.open_tarball(self.path) as tar:
+                self.assertEqual(tar.getnames(), [".PKGINFO", "usr/bin/foo"])
@@ -14,8 +14,7 @@ class DependsTests(unittest.TestCase):
     def test_missing(self):
         self.pkginfo.detected_deps = {"pkg1": []}
         e, w, i = Namcap.depends.analyze_depends(self.pkginfo)
-        expected_e = [("dependency-detected-not-included %s (%s)", ("pkg1", ""))]
-        self.assertEqual(e, expected_e)
+        self.assertEqual(e, [("dependency-detected-not-included %s (%s)", ("pkg1", []))])
         self.assertEqual(w, [])
         self.assertEqual(i, [("depends-by-namcap-sight depends=(%s)", ("pkg1",))])
 
@@ -32,9 +31,8 @@ class DependsTests(unittest.TestCase):
         self.pkginfo["depends"] = {"readline": []}
         self.pkginfo.detected_deps = {"glibc": [], "readline": []}
         e, w, i = Namcap.depends.analyze_depends(self.pkginfo)
-        expected_w = [("dependency-implicitly-satisfied %s (%s)", ("glibc", ""))]
         self.assertEqual(e, [])
-        self.assertEqual(w, expected_w)
+        self.assertEqual(w, [("dependency-implicitly-satisfied %s (%s)", ("glibc", []))])
         # info is verbose and beyond scope, skip it
 
     def test_satisfied2(self):
@@ -45,3 +43,11 @@ class DependsTests(unittest.TestCase):
         self.assertEqual(e, [])
         self.assertEqual(w, [])
         # info is verbose and beyond scope, skip it
+
+    def test_no_infos(self):
+        self.pkginfo["depends"] = {"pkg1": []}
+        self.pkginfo.detected_deps = {"pkg1": [("unknown-tag", ())], "pkg2": []}
+        e, w, i = Namcap.depends.analyze_depends(self.pkginfo, report_infos=False)
+        self.assertEqual(e, [("dependency-detected-not-included %s (%s)", ("pkg2", []))])
+        self.assertEqual(w, [])
+        self.assertEqual(i, [])
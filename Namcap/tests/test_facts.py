@@ -0,0 +1,102 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import gzip
+import hashlib
+import io
+import os
+import sys
+import tarfile
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import Namcap.cache
+import Namcap.facts
+
+with open(os.path.realpath(sys.executable), "rb") as f:
+    ELF = f.read()
+
+
+def make_package(files, recorded=None):
+    "A package holding files { name => data }, with a .MTREE recording their digests (or those of recorded)"
+    mtree = "#mtree\n/set type=file uid=0 gid=0 mode=644\n" + "".join(
+        "./%s size=%d sha256digest=%s\n" % (name, len(data), hashlib.sha256(data).hexdigest())
+        for name, data in (recorded or files).items()
+    )
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w") as tar:
+        for name, data in {".MTREE": gzip.compress(mtree.encode()), **files}.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    buf.seek(0)
+    return tarfile.open(fileobj=buf, mode="r")
+
+
+class FactsTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        patcher = patch.dict(os.environ, {"NAMCAP_CACHE_DIR": self.tmpdir.name})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_digests(self):
+        tar = make_package({"usr/bin/prog": b"#!/bin/sh\n"})
+        self.assertEqual(
+            Namcap.facts.member_digests(tar), {"usr/bin/prog": (10, hashlib.sha256(b"#!/bin/sh\n").hexdigest())}
+        )
+
+    def test_facts(self):
+        old = make_package({"usr/bin/prog": ELF, "usr/share/doc/README": b"v1"})
+        facts = Namcap.facts.elf_facts(old, old.getmember("usr/bin/prog"))
+        assert facts is not None
+        self.assertEqual(facts, Namcap.facts.read_elf_facts(old, old.getmember("usr/bin/prog")))
+        self.assertIsNone(Namcap.facts.elf_facts(old, old.getmember("usr/share/doc/README")))
+        # only ELF files have a cache entry
+        self.assertEqual(len(os.listdir(os.path.join(self.tmpdir.name, "facts"))), 1)
+
+        # the next release has its ELF files looked up instead of read
+        new = make_package({"usr/bin/prog": ELF, "usr/share/doc/README": b"v2"})
+        with patch("Namcap.facts.read_facts", wraps=Namcap.facts.read_facts) as read:
+            self.assertEqual(Namcap.facts.elf_facts(new, new.getmember("usr/bin/prog")), facts)
+            self.assertIsNone(Namcap.facts.elf_facts(new, new.getmember("usr/share/doc/README")))
+            read.assert_not_called()
+
+    def test_mtree_mismatch(self):
+        tar = make_package({"usr/bin/prog": ELF})
+        Namcap.facts.elf_facts(tar, tar.getmember("usr/bin/prog"))
+        # a .MTREE recording another file under the same name
+        other = make_package({"usr/bin/prog": b"#!/bin/sh\n"}, recorded={"usr/bin/prog": ELF})
+        self.assertIsNone(Namcap.facts.elf_facts(other, other.getmember("usr/bin/prog")))
+
+    def test_forged_digest(self):
+        # an ELF file of the same size as another, which the .MTREE claims it is
+        forged = ELF[:-1] + bytes([ELF[-1] ^ 1])
+        tar = make_package({"usr/bin/prog": forged}, recorded={"usr/bin/prog": ELF})
+        self.assertIsNotNone(Namcap.facts.elf_facts(tar, tar.getmember("usr/bin/prog")))
+        self.assertFalse(os.path.exists(os.path.join(self.tmpdir.name, "facts")))
+
+    def test_unreadable_entry(self):
+        tar = make_package({"usr/bin/prog": ELF})
+        key = Namcap.facts.facts_key(tar, tar.getmember("usr/bin/prog"))
+        assert key is not None
+        for data in [b"{", b'{"dynamic": []}', b"[1, 2]"]:
+            Namcap.cache.store("facts", key, data)
+            tar = make_package({"usr/bin/prog": ELF})
+            facts = Namcap.facts.elf_facts(tar, tar.getmember("usr/bin/prog"))
+            self.assertEqual(facts, Namcap.facts.read_elf_facts(tar, tar.getmember("usr/bin/prog")))
+            # and stored again
+            self.assertEqual(Namcap.facts.decode(Namcap.cache.load("facts", key) or b""), facts)
+
+    def test_without_mtree(self):
+        buf = io.BytesIO()
+        with tarfile.open(fileobj=buf, mode="w") as tar:
+            info = tarfile.TarInfo("usr/bin/prog")
+            info.size = len(ELF)
+            tar.addfile(info, io.BytesIO(ELF))
+        buf.seek(0)
+        tar = tarfile.open(fileobj=buf, mode="r")
+        self.assertIsNotNone(Namcap.facts.elf_facts(tar, tar.getmember("usr/bin/prog")))
+        self.assertEqual(os.listdir(self.tmpdir.name), [])
@@ -0,0 +1,67 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import io
+import tarfile
+import unittest
+from unittest.mock import patch
+
+import Namcap.package
+from Namcap.fileindex import FileIndex
+from Namcap.package import PacmanPackage
+
+
+def make_tar(files, symlinks):
+    tar = tarfile.open(fileobj=io.BytesIO(), mode="w")
+    for name in files:
+        tar.addfile(tarfile.TarInfo(name))
+    for name, linkname in symlinks.items():
+        member = tarfile.TarInfo(name)
+        member.type = tarfile.SYMTYPE
+        member.linkname = linkname
+        tar.addfile(member)
+    return tar
+
+
+class FileIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.tar = make_tar(
+            ["usr/lib/libfoo.so.1"],
+            {
+                "usr/lib64": "lib",
+                "usr/lib/libfoo.so": "libfoo.so.1",
+                "usr/bin/foo": "../lib64/libfoo.so",
+                "usr/bin/loop": "loop2",
+                "usr/bin/loop2": "loop",
+            },
+        )
+        self.index = FileIndex(self.tar, ["glibc", "missing"])
+
+    def tearDown(self):
+        self.tar.close()
+
+    def test_resolve(self):
+        self.assertEqual(self.index.resolve("usr/bin/../lib64/libfoo.so"), "usr/lib/libfoo.so.1")
+        self.assertEqual(self.index.resolve("//usr/lib64/nothing"), "usr/lib/nothing")
+        self.assertEqual(self.index.resolve("usr/lib/../../../etc"), "etc")
+        self.assertIsNone(self.index.resolve("usr/bin/loop"))
+
+    @patch.dict(Namcap.package.loaded_packages, clear=True)
+    @patch.object(Namcap.package, "lookup_db")
+    def test_contains(self, lookup_db):
+        lookup_db.side_effect = lambda name, dbname: (
+            PacmanPackage(data={"files": [("usr/include/", 0, 0), ("usr/include/math.h", 0, 0)]})
+            if name == "glibc"
+            else None
+        )
+        self.assertIn("usr/lib/libfoo.so.1", self.index)
+        self.assertIn("usr/include", self.index)
+        self.assertIn("usr/include/math.h", self.index)
+        self.assertNotIn("usr/include/foo.h", self.index)
+        self.assertNotIn("usr/include/bar.h", self.index)
+        # the file lists are only loaded once
+        self.assertEqual(lookup_db.call_count, 2)
+        # and again from other databases
+        Namcap.package.configure_refdb([])
+        self.assertIn("usr/include/math.h", self.index)
+        self.assertEqual(lookup_db.call_count, 3)
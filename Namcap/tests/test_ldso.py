@@ -0,0 +1,76 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from Namcap.ldso import DynamicInfo, LibrarySearch, Resolution, expand
+from Namcap.tests.test_libcache import elf_header
+
+RISCV64 = ("EM_RISCV", 64)
+
+
+class LdsoTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        patcher = patch.dict(os.environ, {"NAMCAP_CACHE_DIR": os.path.join(self.tmpdir.name, "cache")})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.root = os.path.join(self.tmpdir.name, "root")
+        for directory in ("usr/lib", "opt/bar/lib"):
+            os.makedirs(os.path.join(self.root, directory))
+        for path in ("usr/lib/libc.so", "usr/lib/libfoo.so.1", "opt/bar/lib/libbar.so.1"):
+            with open(os.path.join(self.root, path), "wb") as f:
+                f.write(elf_header(243))
+        self.search = LibrarySearch(
+            [
+                "usr/",
+                "usr/bin/",
+                "usr/bin/foo",
+                "usr/lib/",
+                "usr/lib/foo/",
+                "usr/lib/foo/libfoo.so.1",
+                "usr/lib/libz.so.1",
+            ],
+            self.root,
+        )
+
+    def info(self, rpath=(), runpath=()):
+        return DynamicInfo(RISCV64, None, [], list(rpath), list(runpath))
+
+    def test_expand(self):
+        self.assertEqual(expand("$ORIGIN/../lib/foo", "/usr/bin", 64), "/usr/lib/foo")
+        self.assertEqual(expand("${ORIGIN}", "/usr/bin", 64), "/usr/bin")
+        self.assertEqual(expand("/usr/$LIB/foo", "/usr/bin", 32), "/usr/lib32/foo")
+        self.assertIsNone(expand("/usr/lib/$PLATFORM", "/usr/bin", 64))
+        self.assertIsNone(expand("lib", "/usr/bin", 64))
+
+    def test_runpath_overrides_rpath(self):
+        info = self.info(rpath=["$ORIGIN/../lib/foo"], runpath=["/opt/bar/lib"])
+        self.assertEqual(self.search.search_path(info, "/usr/bin"), ["/opt/bar/lib"])
+        self.assertEqual(self.search.find("libfoo.so.1", info, "/usr/bin"), Resolution("/usr/lib/libfoo.so.1", False))
+
+    def test_rpath_in_package(self):
+        info = self.info(rpath=["$ORIGIN/../lib/foo"])
+        self.assertEqual(
+            self.search.find("libfoo.so.1", info, "/usr/bin"), Resolution("/usr/lib/foo/libfoo.so.1", True)
+        )
+
+    def test_rpath_in_root(self):
+        info = self.info(rpath=["/opt/bar/lib"])
+        self.assertEqual(
+            self.search.find("libbar.so.1", info, "/usr/bin"), Resolution("/opt/bar/lib/libbar.so.1", False)
+        )
+        # not searched without the rpath
+        self.assertIsNone(self.search.find("libbar.so.1", self.info(), "/usr/bin"))
+
+    def test_system(self):
+        # the libraries of the package come first
+        self.assertEqual(self.search.find("libz.so.1", self.info(), "/usr/bin"), Resolution("/usr/lib/libz.so.1", True))
+        self.assertEqual(self.search.find("libc.so", self.info(), "/usr/bin"), Resolution("/usr/lib/libc.so", False))
+        # only libraries of the same machine
+        info = DynamicInfo(("EM_X86_64", 64), None, [], [], [])
+        self.assertIsNone(self.search.find("libc.so", info, "/usr/bin"))
@@ -0,0 +1,74 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import os
+import struct
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from Namcap.libcache import elf_machine, find_library, library_dirs, load_libraries, resolve
+
+
+def elf_header(machine: int, elfclass: int = 64, data: int = 1) -> bytes:
+    ident = b"\x7fELF" + bytes([elfclass // 32, data, 1]) + bytes(9)
+    return ident + struct.pack("<HH" if data == 1 else ">HH", 3, machine)
+
+
+class LibcacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        patcher = patch.dict(os.environ, {"NAMCAP_CACHE_DIR": os.path.join(self.tmpdir.name, "cache")})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.root = os.path.join(self.tmpdir.name, "root")
+        for directory in ("etc", "usr/lib", "opt/foo/lib"):
+            os.makedirs(os.path.join(self.root, directory))
+        # a riscv64 musl root, where /lib is an absolute link to /usr/lib
+        os.symlink("/usr/lib", os.path.join(self.root, "lib"))
+        with open(os.path.join(self.root, "etc/ld-musl-riscv64.path"), "w") as f:
+            f.write("/opt/foo/lib:/lib\n")
+        self.write("usr/lib/libz.so.1.3", elf_header(243))
+        os.symlink("/usr/lib/libz.so.1.3", os.path.join(self.root, "usr/lib/libz.so.1"))
+        self.write("usr/lib/libfoo.so.2", elf_header(243))
+        self.write("opt/foo/lib/libfoo.so.2", elf_header(243))
+        self.write("usr/lib/libbar.so.1", elf_header(3, elfclass=32))
+        self.write("usr/lib/libnotelf.so", b"INPUT(-lz)\n")
+
+    def write(self, path, data):
+        with open(os.path.join(self.root, path), "wb") as f:
+            f.write(data)
+
+    def test_elf_machine(self):
+        self.assertEqual(elf_machine(elf_header(62)), ("EM_X86_64", 64))
+        self.assertEqual(elf_machine(elf_header(183, data=2)), ("EM_AARCH64", 64))
+        self.assertEqual(elf_machine(elf_header(3, elfclass=32)), ("EM_386", 32))
+        self.assertIsNone(elf_machine(b"#!/bin/sh\n"))
+
+    def test_resolve(self):
+        self.assertEqual(resolve(self.root, "/lib/libz.so.1"), "/usr/lib/libz.so.1.3")
+        self.assertEqual(resolve(self.root, "/usr/lib/libfoo.so.2"), "/usr/lib/libfoo.so.2")
+
+    def test_library_dirs(self):
+        self.assertEqual(library_dirs(self.root), ["/opt/foo/lib", "/usr/lib"])
+
+    def test_libraries(self):
+        for _ in range(2):
+            # the second time around, from the persistent cache
+            libraries = load_libraries(self.root)
+            self.assertEqual(
+                libraries,
+                {
+                    ("EM_RISCV", 64): {
+                        "libfoo.so.2": "/opt/foo/lib/libfoo.so.2",
+                        "libz.so.1": "/usr/lib/libz.so.1.3",
+                        "libz.so.1.3": "/usr/lib/libz.so.1.3",
+                    },
+                    ("EM_386", 32): {"libbar.so.1": "/usr/lib/libbar.so.1"},
+                },
+            )
+
+    def test_find_library(self):
+        self.assertEqual(find_library(("EM_RISCV", 64), "libz.so.1", self.root), "/usr/lib/libz.so.1.3")
+        self.assertIsNone(find_library(("EM_X86_64", 64), "libz.so.1", self.root))
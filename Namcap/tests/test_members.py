@@ -0,0 +1,112 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+
+from Namcap.members import DIRTYPE, LNKTYPE, REGTYPE, SYMTYPE, PackageArchive, has_member_kind, member_table
+
+
+def add_member(tar, name, type=tarfile.REGTYPE, mode=0o644, linkname="", uname="root", gname="root", data=b""):
+    member = tarfile.TarInfo(name)
+    member.type = type
+    member.mode = mode
+    member.linkname = linkname
+    member.uname = uname
+    member.gname = gname
+    member.size = len(data)
+    tar.addfile(member, io.BytesIO(data) if data else None)
+
+
+class MemberKindsTests(unittest.TestCase):
+    def setUp(self):
+        data = io.BytesIO()
+        with tarfile.open(fileobj=data, mode="w") as tar:
+            add_member(tar, "usr/lib/python3/foo.py", data=b"import os\n")
+            add_member(tar, "usr/bin/foo", data=b"#!/bin/sh\n")
+            add_member(tar, "usr/share/foo.qml", tarfile.DIRTYPE)
+        data.seek(0)
+        self.tar = tarfile.open(fileobj=data)
+
+    def tearDown(self):
+        self.tar.close()
+
+    def test_kinds(self):
+        self.assertTrue(has_member_kind(self.tar, {"py"}))
+        self.assertTrue(has_member_kind(self.tar, {"elf", "script"}))
+        self.assertFalse(has_member_kind(self.tar, {"elf"}))
+        # only regular files count
+        self.assertFalse(has_member_kind(self.tar, {"qml", "jar"}))
+
+
+class MemberTableTests(unittest.TestCase):
+    def setUp(self):
+        data = io.BytesIO()
+        with tarfile.open(fileobj=data, mode="w") as tar:
+            add_member(tar, "usr", tarfile.DIRTYPE, mode=0o755)
+            add_member(tar, "usr/bin/foo", mode=0o4755, uname="", data=b"#!/bin/sh\n")
+            add_member(tar, "usr/bin/bar", tarfile.LNKTYPE, linkname="usr/bin/foo")
+            add_member(tar, "usr/bin/baz", tarfile.SYMTYPE, linkname="foo", gname="wheel")
+        data.seek(0)
+        self.tar = tarfile.open(fileobj=data)
+        self.archive = PackageArchive(self.tar)
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.archive.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_columns(self):
+        table = member_table(self.archive)
+        self.assertEqual(len(table), 4)
+        self.assertEqual(table.names, ["usr", "usr/bin/foo", "usr/bin/bar", "usr/bin/baz"])
+        self.assertEqual(list(table.types), [DIRTYPE, REGTYPE, LNKTYPE, SYMTYPE])
+        self.assertEqual(list(table.modes), [0o755, 0o4755, 0o644, 0o644])
+        self.assertEqual(list(table.sizes), [0, 10, 0, 0])
+        self.assertEqual(table.linknames, {2: "usr/bin/foo", 3: "foo"})
+        self.assertEqual(table.unames, {1: ""})
+        self.assertEqual(table.gnames, {3: "wheel"})
+        self.assertTrue(table.isdir(0))
+        self.assertTrue(table.isfile(1))
+        self.assertTrue(table.islink(2))
+        self.assertFalse(table.islink(1))
+
+    def test_members_released(self):
+        # tarfile keeps none of the TarInfo read into the table
+        self.assertEqual(self.tar.members, [])  # type: ignore[attr-defined]
+        self.assertEqual(self.archive.getnames(), ["usr", "usr/bin/foo", "usr/bin/bar", "usr/bin/baz"])
+
+    def test_tarinfo(self):
+        member = self.archive.getmember("usr/bin/baz")
+        self.assertTrue(member.issym())
+        self.assertEqual((member.linkname, member.uname, member.gname), ("foo", "root", "wheel"))
+        self.assertEqual([m.name for m in self.archive if m.isfile()], ["usr/bin/foo"])
+        with self.assertRaises(KeyError):
+            self.archive.getmember("usr/bin/qux")
+
+    def test_extractfile(self):
+        for name in ("usr/bin/foo", "usr/bin/bar", "usr/bin/baz"):
+            f = self.archive.extractfile(name)
+            assert f is not None
+            self.assertEqual(f.read(), b"#!/bin/sh\n")
+        self.assertIsNone(self.archive.extractfile("usr"))
+        self.assertTrue(has_member_kind(self.archive, {"script"}))
+
+    def test_extract(self):
+        self.archive.extract("usr/bin/bar", self.tmpdir)
+        with open(os.path.join(self.tmpdir, "usr/bin/bar"), "rb") as f:
+            self.assertEqual(f.read(), b"#!/bin/sh\n")
+
+    def test_plain_tarfile(self):
+        data = io.BytesIO()
+        with tarfile.open(fileobj=data, mode="w") as tar:
+            add_member(tar, "usr", tarfile.DIRTYPE, mode=0o755)
+        data.seek(0)
+        with tarfile.open(fileobj=data) as tar:
+            # built once from the members of packages not read through a PackageArchive
+            self.assertIs(member_table(tar), member_table(tar))
+            self.assertEqual(member_table(tar).names, ["usr"])
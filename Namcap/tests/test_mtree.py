@@ -0,0 +1,76 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import gzip
+import io
+import tarfile
+import unittest
+
+from Namcap.mtree import parse_mtree, unescape
+from Namcap.package import load_mtree
+
+mtree = r"""#mtree
+/set type=file uid=0 gid=0 mode=644
+./.BUILDINFO time=1700000000.0 size=5000 sha256digest=abcd
+./usr time=1700000000.5 mode=755 type=dir
+/set mode=755
+./usr/bin/hello\040world time=1700000001.0 size=42
+./usr/share/caf\303\251 time=1700000002.0 size=0
+/unset mode
+./usr/lib/back\\slash time=1700000003.0
+"""
+
+
+class MtreeTests(unittest.TestCase):
+    def test_unescape(self):
+        self.assertEqual(unescape("./usr/plain"), "./usr/plain")
+        self.assertEqual(unescape(r"./a\040b"), "./a b")
+        self.assertEqual(unescape(r"./caf\303\251"), "./café")
+        self.assertEqual(unescape(r"./a\\b"), "./a\\b")
+
+    def test_parse_mtree(self):
+        entries = list(parse_mtree(iter(mtree.splitlines())))
+        self.assertEqual(
+            [e.path for e in entries],
+            ["./.BUILDINFO", "./usr", "./usr/bin/hello world", "./usr/share/café", "./usr/lib/back\\slash"],
+        )
+        buildinfo, usr, hello, cafe, backslash = entries
+        self.assertEqual(buildinfo.sha256digest, "abcd")
+        self.assertEqual(buildinfo.size, 5000)
+        self.assertEqual(buildinfo.mode, 0o644)
+        self.assertEqual(buildinfo.type, "file")
+        self.assertEqual(usr.type, "dir")
+        self.assertEqual(usr.mode, 0o755)
+        self.assertEqual(usr.time, 1700000000.5)
+        self.assertEqual(hello.mode, 0o755)
+        self.assertIsNone(hello.sha256digest)
+        self.assertEqual(cafe.size, 0)
+        self.assertIsNone(backslash.mode)
+        self.assertNotIn("mode", backslash)
+        self.assertEqual(
+            dict(hello), {"time": "1700000001.0", "size": "42", "type": "file", "uid": "0", "gid": "0", "mode": "755"}
+        )
+        self.assertEqual(len(hello), 6)
+        # entries before a /set keep the defaults they were written under
+        self.assertEqual(buildinfo["mode"], "644")
+
+    def test_load_mtree(self):
+        data = io.BytesIO()
+        with tarfile.open(fileobj=data, mode="w") as tar:
+            compressed = gzip.compress(mtree.encode("utf-8"))
+            info = tarfile.TarInfo(".MTREE")
+            info.size = len(compressed)
+            tar.addfile(info, io.BytesIO(compressed))
+        data.seek(0)
+        with tarfile.open(fileobj=data) as tar:
+            times = dict((h, a["time"]) for h, a in load_mtree(tar) if "time" in a)
+        self.assertEqual(times["./usr/bin/hello world"], "1700000001.0")
+        self.assertEqual(len(times), 5)
+
+    def test_load_mtree_missing(self):
+        data = io.BytesIO()
+        with tarfile.open(fileobj=data, mode="w"):
+            pass
+        data.seek(0)
+        with tarfile.open(fileobj=data) as tar:
+            self.assertEqual(list(load_mtree(tar)), [])
@@ -0,0 +1,94 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import io
+import json
+import unittest
+from unittest.mock import patch
+
+from Namcap.output import JsonLinesSink, Result, SarifSink, TextSink
+
+tags = {
+    "dangling-symlink": "Symlink (%s) points to non-existing %s",
+    "missing-license": "Missing license",
+}
+
+results = [
+    Result("foo", "symlink", "E", ("dangling-symlink %s points to %s", ("usr/bin/a", "b"))),
+    Result("foo", "license", "W", ("missing-license", ())),
+]
+
+
+@patch.dict("Namcap.tags.tags", tags)
+class OutputTests(unittest.TestCase):
+    def write(self, sink_class):
+        stream = io.StringIO()
+        sink = sink_class(stream)
+        for result in results:
+            sink.add(result)
+        # nothing is written before the package is done
+        self.assertNotIn("symlink", stream.getvalue())
+        sink.flush("foo-1-1-any.pkg.tar.zst")
+        sink.close()
+        return stream.getvalue()
+
+    def test_text(self):
+        self.assertEqual(
+            self.write(TextSink),
+            "foo E: Symlink (usr/bin/a) points to non-existing b\nfoo W: Missing license\n",
+        )
+
+    def test_jsonl(self):
+        records = [json.loads(line) for line in self.write(JsonLinesSink).splitlines()]
+        self.assertEqual(
+            records[0],
+            {
+                "package": "foo",
+                "file": "foo-1-1-any.pkg.tar.zst",
+                "rule": "symlink",
+                "severity": "error",
+                "tag": "dangling-symlink",
+                "args": ["usr/bin/a", "b"],
+                "message": "Symlink (usr/bin/a) points to non-existing b",
+            },
+        )
+        self.assertEqual(records[1]["args"], [])
+
+    def test_sarif(self):
+        log = json.loads(self.write(SarifSink))
+        self.assertEqual(log["version"], "2.1.0")
+        [run] = log["runs"]
+        self.assertEqual(run["tool"]["driver"]["name"], "namcap")
+        self.assertEqual([r["ruleId"] for r in run["results"]], ["symlink", "license"])
+        self.assertEqual([r["level"] for r in run["results"]], ["error", "warning"])
+        self.assertEqual(run["results"][1]["message"]["text"], "Missing license")
+        self.assertEqual(
+            run["results"][0]["locations"][0]["physicalLocation"]["artifactLocation"]["uri"], "foo-1-1-any.pkg.tar.zst"
+        )
+
+    def test_sarif_empty(self):
+        stream = io.StringIO()
+        SarifSink(stream).close()
+        self.assertEqual(json.loads(stream.getvalue())["runs"][0]["results"], [])
+
+    def test_nested_diagnostics(self):
+        result = Result(
+            "foo",
+            "depends",
+            "E",
+            (
+                "dependency-detected-not-included %s (%s)",
+                ("glibc", [("libraries-needed %s %s", ("['a.so']", "['b']"))]),
+            ),
+        )
+        human = {
+            "dependency-detected-not-included %s (%s)": "Dependency %s detected and not included (%s)",
+            "libraries-needed %s %s": "libraries %s needed in files %s",
+        }
+        # the reasons are formatted with the tags in use when shown, machine-readable or not
+        with patch.dict("Namcap.tags.tags", human):
+            self.assertEqual(
+                result.message, "Dependency glibc detected and not included (libraries ['a.so'] needed in files ['b'])"
+            )
+        with patch.dict("Namcap.tags.tags", {tag: tag for tag in human}):
+            self.assertEqual(result.message, "dependency-detected-not-included glibc (libraries-needed ['a.so'] ['b'])")
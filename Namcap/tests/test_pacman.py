@@ -1,10 +1,13 @@
 # Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
 # SPDX-License-Identifier: GPL-2.0-or-later
 
+import contextlib
+import io
 import os
 import shutil
 import tempfile
 import unittest
+from unittest.mock import patch
 
 import Namcap.package
 
@@ -75,3 +78,187 @@ class PkgbuildLoaderTests(unittest.TestCase):
     def test_provides(self):
         self.assertEqual(self.pkginfo["provides"], ["yourpackage"])
         self.assertEqual(self.pkginfo["orig_provides"], ["yourpackage=0.9"])
+
+
+srcinfo = """
+pkgbase = mypackage
+	pkgdesc = A package from .SRCINFO
+	pkgver = 1.0
+	pkgrel = 1
+	url = http://www.example.com/
+	arch = i686
+	arch = x86_64
+	license = GPL-3.0-or-later
+	depends = glibc
+	depends = foobar
+	depends_x86_64 = lib64
+	optdepends = libabc: provides the abc feature
+	provides = yourpackage=0.9
+	options = !libtool
+	source = ftp://ftp.example.com/pub/mypackage-0.1.tar.gz
+	md5sums = abcdefabcdef12345678901234567890
+
+pkgname = mypackage
+"""
+
+split_srcinfo = """
+pkgbase = mysplitpackage
+	pkgver = 1.0
+	pkgrel = 1
+	arch = x86_64
+	license = GPL-3.0-or-later
+	makedepends = python
+	depends = zlib
+
+pkgname = mypackage1
+	pkgdesc = Package 1
+	depends =
+
+pkgname = mypackage2
+	pkgdesc = Package 2
+"""
+
+
+class SrcinfoLoaderTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.pkgbuild = os.path.join(self.tmpdir, "PKGBUILD")
+        with open(self.pkgbuild, "w") as f:
+            f.write(pkgbuild)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write_srcinfo(self, text, age=0):
+        srcinfo_path = os.path.join(self.tmpdir, ".SRCINFO")
+        with open(srcinfo_path, "w") as f:
+            f.write(text)
+        mtime = os.stat(self.pkgbuild).st_mtime_ns + age * 10**9
+        os.utime(srcinfo_path, ns=(mtime, mtime))
+        return srcinfo_path
+
+    def test_fresh_srcinfo(self):
+        self.write_srcinfo(srcinfo)
+        pkginfo = Namcap.package.load_from_pkgbuild(self.pkgbuild)
+        self.assertEqual(pkginfo["name"], "mypackage")
+        self.assertEqual(pkginfo["version"], "1.0-1")
+        self.assertEqual(pkginfo["desc"], "A package from .SRCINFO")
+        self.assertEqual(pkginfo["depends"], ["glibc", "foobar"])
+        self.assertEqual(pkginfo["depends_x86_64"], ["lib64"])
+        self.assertEqual(pkginfo["optdepends"], ["libabc"])
+        self.assertEqual(pkginfo["provides"], ["yourpackage"])
+        self.assertEqual(pkginfo.pkgbuild, pkgbuild.splitlines())
+        # not part of .SRCINFO, loaded from the PKGBUILD on demand
+        self.assertIn("pkgname", pkginfo["setvars"])
+
+    def test_invalid_pkgbuild(self):
+        self.write_srcinfo(srcinfo)
+        pkginfo = Namcap.package.load_from_pkgbuild(self.pkgbuild)
+        with patch.object(Namcap.package, "cached_parsepkgbuild", return_value=None):
+            self.assertEqual(pkginfo["setvars"], [])
+        self.assertEqual(pkginfo["pkgfunction"], "function")
+        self.assertTrue(pkginfo.unparsable)
+
+    def test_stale_srcinfo(self):
+        self.write_srcinfo(srcinfo, age=-10)
+        pkginfo = Namcap.package.load_from_pkgbuild(self.pkgbuild)
+        self.assertEqual(pkginfo["desc"], "A package")
+
+    def test_split_srcinfo(self):
+        pkginfo = Namcap.package.load_from_srcinfo(self.write_srcinfo(split_srcinfo))
+        assert pkginfo is not None
+        self.assertTrue(pkginfo.is_split)
+        self.assertEqual(pkginfo["base"], "mysplitpackage")
+        self.assertEqual(pkginfo["names"], ["mypackage1", "mypackage2"])
+        self.assertNotIn("version", pkginfo)
+        self.assertEqual([p["name"] for p in pkginfo.subpackages], ["mypackage1", "mypackage2"])
+        self.assertEqual([p["version"] for p in pkginfo.subpackages], ["1.0-1", "1.0-1"])
+        self.assertNotIn("depends", pkginfo.subpackages[0])
+        self.assertEqual(pkginfo.subpackages[1]["depends"], ["zlib"])
+        self.assertEqual(pkginfo.subpackages[1]["makedepends"], ["python"])
+
+
+class ParsepkgbuildCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.pkgbuild = os.path.join(self.tmpdir, "PKGBUILD")
+        with open(self.pkgbuild, "w") as f:
+            f.write(pkgbuild + "source helpers.sh\n")
+        with open(os.path.join(self.tmpdir, "helpers.sh"), "w") as f:
+            f.write("_helper=1\n")
+        self.environ = patch.dict(os.environ, {"NAMCAP_CACHE_DIR": os.path.join(self.tmpdir, "cache")})
+        self.environ.start()
+
+    def tearDown(self):
+        self.environ.stop()
+        shutil.rmtree(self.tmpdir)
+
+    def test_cache_hit(self):
+        first = Namcap.package.load_from_pkgbuild(self.pkgbuild)
+        with patch.object(Namcap.package, "run_parsepkgbuild") as run:
+            second = Namcap.package.load_from_pkgbuild(self.pkgbuild)
+            run.assert_not_called()
+        self.assertEqual(dict(first), dict(second))
+        self.assertEqual(first.pkgbuild, second.pkgbuild)
+
+    def test_sourced_file_changed(self):
+        with open(self.pkgbuild, "rb") as f:
+            content = f.read()
+        key1 = Namcap.package.parsepkgbuild_cache_key(self.pkgbuild, content)
+        self.assertEqual(Namcap.package.parsepkgbuild_cache_key(self.pkgbuild, content), key1)
+        with open(os.path.join(self.tmpdir, "helpers.sh"), "w") as f:
+            f.write("_helper=2\n")
+        key2 = Namcap.package.parsepkgbuild_cache_key(self.pkgbuild, content)
+        self.assertNotEqual(key1, key2)
+
+    def test_makepkg_configuration(self):
+        key = Namcap.package.parsepkgbuild_cache_key(self.pkgbuild, b"")
+        config_home = os.path.join(self.tmpdir, "config")
+        with patch.dict(os.environ, {"CARCH": "riscv64"}):
+            self.assertNotEqual(Namcap.package.parsepkgbuild_cache_key(self.pkgbuild, b""), key)
+        with patch.dict(os.environ, {"XDG_CONFIG_HOME": config_home}):
+            os.makedirs(os.path.join(config_home, "pacman"))
+            self.assertEqual(Namcap.package.user_makepkg_conf(), os.path.expanduser("~/.makepkg.conf"))
+            with open(os.path.join(config_home, "pacman", "makepkg.conf"), "w") as f:
+                f.write("CARCH=riscv64\n")
+            self.assertEqual(Namcap.package.user_makepkg_conf(), os.path.join(config_home, "pacman", "makepkg.conf"))
+            self.assertNotEqual(Namcap.package.parsepkgbuild_cache_key(self.pkgbuild, b""), key)
+
+    def test_parsepkgbuild_errors(self):
+        bindir = os.path.join(self.tmpdir, "bin")
+        os.mkdir(bindir)
+        with open(os.path.join(bindir, "parsepkgbuild"), "w") as f:
+            f.write("#!/bin/sh\necho 'line 1: syntax error' >&2\nexit 1\n")
+        os.chmod(os.path.join(bindir, "parsepkgbuild"), 0o755)
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with patch.dict(os.environ, {"PATH": bindir + os.pathsep + os.environ["PATH"]}):
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                self.assertIsNone(Namcap.package.run_parsepkgbuild(self.pkgbuild))
+        # stdout only carries results
+        self.assertEqual(stdout.getvalue(), "")
+        self.assertIn("line 1: syntax error", stderr.getvalue())
+
+
+class AlpmHandleTests(unittest.TestCase):
+    def tearDown(self):
+        Namcap.package.configure_alpm()
+
+    @patch("pycman.config.PacmanConfig")
+    def test_lazy_handle(self, config):
+        config.return_value.options = {"RootDir": "/", "DBPath": "/var/lib/pacman/"}
+        Namcap.package.configure_alpm(root="/srv/chroot", config="/srv/chroot/etc/pacman.conf")
+        config.assert_not_called()
+        handle = Namcap.package.get_alpm_handle()
+        self.assertIs(Namcap.package.get_alpm_handle(), handle)
+        config.assert_called_once_with(conf="/srv/chroot/etc/pacman.conf")
+        self.assertEqual(
+            config.return_value.options, {"RootDir": "/srv/chroot", "DBPath": "/srv/chroot/var/lib/pacman/"}
+        )
+
+    @patch("pycman.config.PacmanConfig")
+    def test_dbpath(self, config):
+        config.return_value.options = {"RootDir": "/", "DBPath": "/var/lib/pacman/"}
+        Namcap.package.configure_alpm(dbpath="/tmp/db")
+        Namcap.package.get_alpm_handle()
+        config.assert_called_once_with(conf=Namcap.package.PACMAN_CONF)
+        self.assertEqual(config.return_value.options, {"RootDir": "/", "DBPath": "/tmp/db"})
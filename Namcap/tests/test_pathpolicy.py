@@ -0,0 +1,61 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import io
+import tarfile
+import unittest
+
+from Namcap.pathpolicy import PathClassifier, PathPolicy, path_matches, policies
+
+
+class PathClassifierTests(unittest.TestCase):
+    def setUp(self):
+        self.classifier = PathClassifier(policies)
+
+    def test_prefixes(self):
+        self.assertEqual(self.classifier.classify("usr/bin/foo", False), {"fhs-valid", "elf-valid"})
+        self.assertEqual(self.classifier.classify("usr/man/man1/foo.1", False), {"man-non-fhs", "man-component"})
+        self.assertEqual(self.classifier.classify("var/tmp", True), {"fhs-forbidden"})
+        self.assertEqual(self.classifier.classify("var/tmp", False), set())
+        self.assertEqual(self.classifier.classify("srv/foo", False), set())
+
+    def test_ancestors(self):
+        self.assertEqual(self.classifier.classify("usr", True), {"fhs-valid", "fhs-valid-mingw"})
+        self.assertEqual(self.classifier.classify("lib", True), {"fhs-valid", "elf-valid"})
+        self.assertEqual(self.classifier.classify("usr/x86_64-w64-mingw32", True), {"fhs-valid-mingw"})
+
+    def test_patterns(self):
+        self.assertEqual(
+            self.classifier.classify("usr/share/glib-2.0/schemas", True), {"fhs-valid", "pathdepends:dconf"}
+        )
+        self.assertEqual(self.classifier.classify("var/lib/scrollkeeper", True), {"fhs-valid", "scrollkeeper"})
+        self.assertEqual(
+            self.classifier.classify("usr/share/info/foo.info", False), {"fhs-valid", "info-fhs", "info-component"}
+        )
+        self.assertEqual(self.classifier.classify("opt/foo/information", False), {"fhs-valid", "elf-questionable"})
+
+    def test_overlapping_policies(self):
+        classifier = PathClassifier(
+            [
+                PathPolicy("a", prefix="usr/"),
+                PathPolicy("b", prefix="usr/lib"),
+                PathPolicy("c", pattern=r"\.so$"),
+                PathPolicy("d", pattern=r"^usr/lib/lib"),
+            ]
+        )
+        self.assertEqual(classifier.classify("usr/lib/libfoo.so", False), {"a", "b", "c", "d"})
+        self.assertEqual(classifier.classify("opt/libfoo.so", False), {"c"})
+
+
+class PathMatchesTests(unittest.TestCase):
+    def test_shared_per_tar(self):
+        tar = tarfile.open(fileobj=io.BytesIO(), mode="w")
+        for name in ["./etc/dbus-1/system.d/foo.conf", "etc/systemd/system/foo.service"]:
+            tar.addfile(tarfile.TarInfo(name))
+        matches = path_matches(tar)
+        self.assertIs(path_matches(tar), matches)
+        self.assertEqual(matches.with_label("dbus-1-location"), [0])
+        self.assertEqual(matches.names[0], "etc/dbus-1/system.d/foo.conf")
+        self.assertEqual(matches.with_label("systemd-location"), [1])
+        self.assertEqual(matches.with_label("scrollkeeper"), [])
+        tar.close()
@@ -0,0 +1,60 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import unittest
+
+from Namcap.pkgbuild import PkgbuildModel, split_comment
+
+pkgbuild = r"""
+# Maintainer: Arch Linux <arch@example.com>
+pkgname=mypackage
+arch=('i686' 'x86_64') # supported
+depends+=('glibc')
+
+build() {
+  cd "${srcdir}"/$pkgname-$pkgver
+  ./configure --prefix=/usr --host=$CARCH-pc-linux-gnu
+}
+
+package() { make DESTDIR="$startdir/pkg" install; }
+
+_helper()
+{
+  if [ "$CARCH" = x86_64 ]; then
+    echo "#not a comment" ${x#y}
+  fi
+}
+""".splitlines()
+
+
+class PkgbuildModelTests(unittest.TestCase):
+    def setUp(self):
+        self.model = PkgbuildModel(pkgbuild)
+
+    def test_split_comment(self):
+        self.assertEqual(split_comment("a=1 # c"), ("a=1 ", " c"))
+        self.assertEqual(split_comment("echo '#' \"#\" \\# x#y"), ("echo '#' \"#\" \\# x#y", None))
+        self.assertEqual(split_comment("#c"), ("", "c"))
+
+    def test_assignments(self):
+        self.assertEqual(
+            [(name, value) for _, name, value in self.model.assignments],
+            [("pkgname", "mypackage"), ("arch", "('i686' 'x86_64') "), ("depends", "('glibc')")],
+        )
+
+    def test_comments(self):
+        self.assertEqual(self.model.comments, [" Maintainer: Arch Linux <arch@example.com>"])
+
+    def test_functions(self):
+        self.assertEqual(
+            self.model.functions, {"build": range(6, 10), "package": range(11, 12), "_helper": range(13, 19)}
+        )
+        self.assertEqual(self.model.lines[15].function, "_helper")
+        self.assertIsNone(self.model.lines[12].function)
+
+    def test_references(self):
+        self.assertEqual(len(self.model.references("CARCH")), 2)
+        [(line, end)] = self.model.references("startdir")
+        self.assertTrue(line.code[end:].startswith("/pkg"))
+        self.assertTrue(self.model.lines[7].references_variable("srcdir"))
+        self.assertFalse(self.model.lines[7].references_variable("src"))
@@ -0,0 +1,67 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from Namcap.prefetch import Prefetcher, readahead
+
+
+class PrefetchTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.paths = []
+        for i in range(6):
+            path = os.path.join(self.tmpdir.name, "p%d-1-1-any.pkg.tar" % i)
+            with open(path, "wb") as f:
+                f.write(b"\0" * 1000)
+            self.paths.append(path)
+
+    def test_readahead(self):
+        readahead(self.paths[0])
+        readahead(os.path.join(self.tmpdir.name, "missing"))
+
+    def run_prefetcher(self, prefetcher):
+        "Iterates over prefetcher, returning the paths and (index, current) for each file read ahead"
+        reads = []
+
+        def record(path, stop):
+            with prefetcher.condition:
+                reads.append((self.paths.index(path), prefetcher.current))
+                prefetcher.condition.notify_all()
+
+        def caught_up():
+            following = len(reads) + 1
+            return following >= len(self.paths) or not prefetcher.may_read(following)
+
+        with patch("Namcap.prefetch.readahead", record):
+            paths = []
+            for path in prefetcher:
+                # let the reader catch up before going on
+                with prefetcher.condition:
+                    prefetcher.condition.wait_for(caught_up, timeout=5)
+                paths.append(path)
+        return paths, reads
+
+    def test_depth(self):
+        paths, reads = self.run_prefetcher(Prefetcher(self.paths, depth=2))
+        self.assertEqual(paths, self.paths)
+        self.assertEqual([index for index, _ in reads], [1, 2, 3, 4, 5])
+        for index, current in reads:
+            self.assertTrue(current < index <= current + 2)
+
+    def test_budget(self):
+        # only one file fits the budget at a time
+        paths, reads = self.run_prefetcher(Prefetcher(self.paths, depth=3, budget=1500))
+        self.assertEqual(paths, self.paths)
+        for index, current in reads:
+            self.assertEqual(index, current + 1)
+
+    def test_not_files(self):
+        paths = [self.tmpdir.name, os.path.join(self.tmpdir.name, "missing"), *self.paths[:2]]
+        prefetcher = Prefetcher(paths, depth=4)
+        self.assertEqual(prefetcher.sizes, [0, 0, 1000, 1000])
+        self.assertEqual(list(prefetcher), paths)
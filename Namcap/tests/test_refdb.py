@@ -0,0 +1,80 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import io
+import os
+import tarfile
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import Namcap.package
+from Namcap.refdb import find_sync_dbs, load_reference_db, parse_desc
+
+entries = {
+    "pacman-6.1.0-3": {
+        "desc": "%NAME%\npacman\n\n%VERSION%\n6.1.0-3\n\n%DESC%\nA library-based package manager\n\n"
+        "%DEPENDS%\nbash\nlibarchive.so=13-64\n\n%PROVIDES%\nlibalpm.so=14-64\n\n",
+        "files": "%FILES%\nusr/\nusr/bin/\nusr/bin/pacman\nusr/lib/libalpm.so.14\n\n",
+    },
+    "bash-5.2.026-2": {
+        "desc": "%NAME%\nbash\n\n%VERSION%\n5.2.026-2\n\n%PROVIDES%\nsh\n\n",
+        "files": "%FILES%\nusr/\nusr/bin/\nusr/bin/bash\nusr/bin/sh\n\n",
+    },
+}
+
+
+def write_db(path, entries, kinds=("desc", "files")):
+    with tarfile.open(path, "w:gz") as tar:
+        for dirname, files in entries.items():
+            for kind in kinds:
+                data = files[kind].encode()
+                info = tarfile.TarInfo(dirname + "/" + kind)
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+
+
+class RefdbTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        patcher = patch.dict(os.environ, {"NAMCAP_CACHE_DIR": os.path.join(self.tmpdir.name, "cache")})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.repo = os.path.join(self.tmpdir.name, "repo")
+        os.mkdir(self.repo)
+        write_db(os.path.join(self.repo, "core.db"), entries, kinds=("desc",))
+        write_db(os.path.join(self.repo, "core.files"), entries)
+        self.addCleanup(Namcap.package.configure_refdb, [])
+
+    def test_parse_desc(self):
+        self.assertEqual(
+            parse_desc("%NAME%\nfoo\n\n%DEPENDS%\nbar\nbaz>=1\n\n"), {"NAME": ["foo"], "DEPENDS": ["bar", "baz>=1"]}
+        )
+
+    def test_find_sync_dbs(self):
+        self.assertEqual(find_sync_dbs(self.repo), [os.path.join(self.repo, "core.files")])
+
+    def test_indexes(self):
+        for _ in range(2):
+            # the second time around, from the persistent cache
+            refdb = load_reference_db([self.repo])
+            self.assertEqual(sorted(refdb.packages), ["bash", "pacman"])
+            self.assertEqual(refdb.owners["usr/bin/sh"], ["bash"])
+            self.assertEqual(sorted(refdb.owners["usr/bin/"]), ["bash", "pacman"])
+            self.assertIs(refdb.find_provider("sh"), refdb.packages["bash"])
+            self.assertEqual(refdb.packages["pacman"].depends, ["bash", "libarchive.so=13-64"])
+
+    def test_without_file_lists(self):
+        refdb = load_reference_db([os.path.join(self.repo, "core.db")])
+        self.assertEqual(refdb.packages["bash"].files, [])
+
+    def test_resolve_against_refdb(self):
+        Namcap.package.configure_refdb([self.repo])
+        pkg = Namcap.package.load_from_db("sh")
+        self.assertEqual(pkg["name"], "bash")
+        self.assertEqual(pkg["version"], "5.2.026-2")
+        self.assertIn(("usr/bin/sh", 0, 0), pkg["files"])
+        self.assertIsNone(Namcap.package.load_from_db("glibc"))
+        self.assertEqual(sorted(p.name for p in Namcap.package.get_installed_packages()), ["bash", "pacman"])
+        self.assertEqual(Namcap.package.get_file_owners("usr/bin/pacman"), ["pacman"])
@@ -0,0 +1,60 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import Namcap.results
+from Namcap.output import Result
+
+
+@patch("Namcap.package.database_fingerprint", lambda: ["local:0:1"])
+class ResultsTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        patcher = patch.dict(os.environ, {"NAMCAP_CACHE_DIR": os.path.join(self.tmpdir.name, "cache")})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.package = os.path.join(self.tmpdir.name, "foo-1-1-any.pkg.tar.zst")
+        with open(self.package, "wb") as f:
+            f.write(b"package")
+
+    def test_roundtrip(self):
+        results = [
+            Result("foo", "symlink", "E", ("dangling-symlink %s points to %s", ("usr/bin/a", "b"))),
+            Result("foo", "license", "W", ("missing-license", ())),
+            Result("foo", "depends", "I", ("messages-omitted %i %s", (3, "dependency-detected-not-included"))),
+            Result(
+                "foo",
+                "depends",
+                "E",
+                ("dependency-detected-not-included %s (%s)", ("glibc", [("libraries-needed %s %s", ("a", "b"))])),
+            ),
+        ]
+        key = Namcap.results.make_key(self.package, ["symlink", "licensepkg"], "False", "None")
+        assert key is not None
+        self.assertIsNone(Namcap.results.load(key))
+        Namcap.results.store(key, results)
+        self.assertEqual(Namcap.results.load(key), results)
+
+    def test_key(self):
+        key = Namcap.results.make_key(self.package, ["symlink"], "False")
+        self.assertEqual(key, Namcap.results.make_key(self.package, ["symlink"], "False"))
+        self.assertNotEqual(key, Namcap.results.make_key(self.package, ["symlink", "licensepkg"], "False"))
+        self.assertNotEqual(key, Namcap.results.make_key(self.package, ["symlink"], "True"))
+        with patch("Namcap.package.database_fingerprint", lambda: ["local:0:2"]):
+            self.assertNotEqual(key, Namcap.results.make_key(self.package, ["symlink"], "False"))
+        # any module may change the results, not only those of the rules
+        with patch("Namcap.cache.code_digest", lambda: "0" * 64):
+            self.assertNotEqual(key, Namcap.results.make_key(self.package, ["symlink"], "False"))
+        with open(self.package, "ab") as f:
+            f.write(b"rebuilt")
+        self.assertNotEqual(key, Namcap.results.make_key(self.package, ["symlink"], "False"))
+
+    def test_disabled(self):
+        with patch("Namcap.cache.enabled", False):
+            self.assertIsNone(Namcap.results.make_key(self.package, ["symlink"]))
+        self.assertIsNone(Namcap.results.make_key(os.path.join(self.tmpdir.name, "missing.pkg.tar"), ["symlink"]))
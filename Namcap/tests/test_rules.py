@@ -1,10 +1,74 @@
 # Copyright (C) 2024 Namcap contributors, see AUTHORS for details.
 # SPDX-License-Identifier: GPL-2.0-or-later
 
+import importlib
+import pkgutil
+import io
+import tarfile
 import unittest
 import Namcap.rules
+import Namcap.ruleclass
+from Namcap.package import PacmanPackage
 
 
 class RulesTests(unittest.TestCase):
     def test_all_rules_dict(self):
         self.assertNotEqual(Namcap.rules.all_rules, {})
+
+    def test_rule_metadata(self):
+        """Test that the registry agrees with the rule classes."""
+        for name, meta in Namcap.rules.rule_metadata.items():
+            rule = Namcap.rules.all_rules[name]
+            self.assertEqual(getattr(rule, "name", None), name)
+            self.assertEqual(getattr(rule, "description", None), meta.description)
+            self.assertEqual(rule.enable, meta.enable)
+            self.assertTrue(issubclass(rule, getattr(Namcap.ruleclass, meta.kind)))
+
+    def test_all_rules_registered(self):
+        """Test that every rule class defined in Namcap.rules is registered."""
+        for module_info in pkgutil.iter_modules(Namcap.rules.__path__):
+            module = importlib.import_module("Namcap.rules." + module_info.name)
+            for value in module.__dict__.values():
+                if (
+                    isinstance(value, type)
+                    and issubclass(value, Namcap.ruleclass.AbstractRule)
+                    and hasattr(value, "name")
+                    and value.__module__ == module.__name__
+                ):
+                    self.assertIn(value.name, Namcap.rules.rule_metadata)
+
+    def test_applies(self):
+        """Test that rules are only run when the inputs they declare are there."""
+        pkg = PacmanPackage({"name": "foo", "desc": "Detached debugging symbols for foo"})
+        self.assertFalse(Namcap.rules.load_rule("license").applies(pkg))
+        self.assertFalse(Namcap.rules.load_rule("missingbackups").applies(pkg))
+        pkg = PacmanPackage({"name": "foo", "desc": "Foo", "backup": ["etc/foo.conf"]})
+        self.assertTrue(Namcap.rules.load_rule("license").applies(pkg))
+        self.assertTrue(Namcap.rules.load_rule("missingbackups").applies(pkg))
+
+        data = io.BytesIO()
+        with tarfile.open(fileobj=data, mode="w") as tar:
+            tar.addfile(tarfile.TarInfo("usr/lib/pkgconfig/foo.pc"))
+        data.seek(0)
+        with tarfile.open(fileobj=data) as tar:
+            self.assertTrue(Namcap.rules.load_rule("pcdepends").applies(pkg, tar))
+            self.assertFalse(Namcap.rules.load_rule("rpath").applies(pkg, tar))
+            self.assertFalse(Namcap.rules.load_rule("infodirectory").applies(pkg, tar))
+            # members are only looked at for packages
+            self.assertTrue(Namcap.rules.load_rule("rpath").applies(pkg))
+
+    def test_diagnostic_list(self):
+        """Test that a limit keeps the first diagnostics of each tag and counts the others."""
+        diagnostics = Namcap.ruleclass.DiagnosticList(2)
+        diagnostics.extend(("empty-directory %s", (str(i),)) for i in range(5))
+        diagnostics += [("missing-license", ())]
+        diagnostics.append(("empty-directory %s", ("5",)))
+        self.assertEqual(
+            diagnostics,
+            [("empty-directory %s", ("0",)), ("empty-directory %s", ("1",)), ("missing-license", ())],
+        )
+        self.assertEqual(diagnostics.omitted, {"empty-directory %s": 4})
+        unlimited = Namcap.ruleclass.DiagnosticList()
+        unlimited.extend(diagnostics * 3)
+        self.assertEqual(len(unlimited), 9)
+        self.assertEqual(unlimited.omitted, {})
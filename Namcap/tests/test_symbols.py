@@ -0,0 +1,79 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import mmap
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import Namcap.symbols
+from Namcap.rules.unusedsodepends import get_unused_sodepends
+from Namcap.symbols import DynamicSymbols, SymbolTable, get_exports, pack_symbols, read_dynamic_symbols
+
+
+class SymbolsTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        patcher = patch.dict(os.environ, {"NAMCAP_CACHE_DIR": self.tmpdir.name})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.dict(Namcap.symbols._exports, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_table(self):
+        names = ["memcpy", "g_free", "_ZN3foo3barEv", "zlibVersion", "été"]
+        table = SymbolTable(pack_symbols(names + ["memcpy"]))
+        self.assertEqual(len(table), 5)
+        self.assertEqual(list(table), sorted(names, key=lambda name: name.encode()))
+        for name in names:
+            self.assertIn(name, table)
+        for name in ["", "g_fre", "g_free2", "zzz", "A"]:
+            self.assertNotIn(name, table)
+        self.assertNotIn("memcpy", SymbolTable(pack_symbols([])))
+        with self.assertRaises(ValueError):
+            SymbolTable(b"\0" * 32)
+        for truncated in [b"", pack_symbols(names)[:10], pack_symbols(names)[:-3]]:
+            with self.assertRaises(ValueError):
+                SymbolTable(truncated)
+
+    def test_exports(self):
+        path = os.path.realpath(sys.executable)
+        with open(path, "rb") as f:
+            exported = read_dynamic_symbols(f).exported
+        table = get_exports(path)
+        self.assertEqual(set(table), exported)
+        # the second time around, mapped from the persistent cache
+        Namcap.symbols._exports.clear()
+        cached = get_exports(path)
+        self.assertIsInstance(cached.buffer, mmap.mmap)
+        self.assertEqual(set(cached), exported)
+
+    def test_unreadable_cache_entry(self):
+        path = os.path.realpath(sys.executable)
+        exported = set(get_exports(path))
+        Namcap.symbols._exports.clear()
+        (entry,) = [os.path.join(d, name) for d, _, names in os.walk(self.tmpdir.name) for name in names]
+        with open(entry, "r+b") as f:
+            f.truncate(os.path.getsize(entry) // 2)
+        self.assertEqual(set(get_exports(path)), exported)
+        # and stored again
+        Namcap.symbols._exports.clear()
+        self.assertIsInstance(get_exports(path).buffer, mmap.mmap)
+
+    def test_unused(self):
+        symbols = DynamicSymbols({"main", "helper"}, {"printf", "sin", "helper", "deflate"}, {"libc.so.6"})
+        libraries = [
+            ("libc.so.6", "/usr/lib/libc.so.6", {"printf", "sin"}),
+            ("libm.so.6", "/usr/lib/libm.so.6", {"sin", "cos"}),
+            ("libfoo.so.1", "/usr/lib/libfoo.so.1", {"helper"}),
+            ("libz.so.1", "/usr/lib/libz.so.1", {"deflate"}),
+        ]
+        # sin binds to libc, which comes first, and the program defines helper itself
+        self.assertEqual(list(get_unused_sodepends(symbols, libraries)), ["/usr/lib/libm.so.6", "/usr/lib/libfoo.so.1"])
+        # symbol versions needed from a library make it used
+        symbols.verneed.add("libm.so.6")
+        self.assertEqual(list(get_unused_sodepends(symbols, libraries)), ["/usr/lib/libfoo.so.1"])
@@ -0,0 +1,138 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import io
+import os
+import sys
+import tarfile
+import tempfile
+import unittest
+
+from Namcap.facts import read_elf_facts
+from Namcap.tree import DirectoryTree, TreePackage, is_package_tree
+
+PKGINFO = """# Generated by makepkg
+pkgname = foo
+pkgbase = foo-base
+pkgver = 1.0-1
+pkgdesc = A package
+url = https://example.org
+builddate = 1700000000
+packager = Someone <someone@example.org>
+size = 4096
+arch = x86_64
+license = GPL-2.0-or-later
+depend = glibc
+depend = libfoo.so=1-64
+optdepend = python: for the scripts
+backup = etc/foo.conf
+"""
+
+with open(os.path.realpath(sys.executable), "rb") as f:
+    ELF = f.read()
+
+
+class DirectoryTreeTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.pkgdir = os.path.join(self.tmpdir.name, "pkg")
+        files = {
+            ".PKGINFO": PKGINFO.encode(),
+            "etc/foo.conf": b"",
+            "usr/bin/foo": b"#!/usr/bin/python\nimport sys\n",
+            "usr/bin/foo-2": b"",
+            "usr/lib/libfoo.so.1": ELF,
+        }
+        for name, data in files.items():
+            path = os.path.join(self.pkgdir, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(data)
+        os.makedirs(os.path.join(self.pkgdir, "usr/share/empty"))
+        os.symlink("libfoo.so.1", os.path.join(self.pkgdir, "usr/lib/libfoo.so"))
+        os.link(os.path.join(self.pkgdir, "usr/bin/foo"), os.path.join(self.pkgdir, "usr/bin/foo-link"))
+        os.chmod(os.path.join(self.pkgdir, "usr/bin/foo"), 0o755)
+
+    def archive(self):
+        "Archives the tree, the way makepkg does"
+        buf = io.BytesIO()
+        names = sorted(
+            os.path.relpath(os.path.join(d, n), self.pkgdir) for d, ds, fs in os.walk(self.pkgdir) for n in ds + fs
+        )
+        with tarfile.open(fileobj=buf, mode="w") as tar:
+            for name in names:
+                tar.add(os.path.join(self.pkgdir, name), arcname=name, recursive=False)
+        buf.seek(0)
+        return tarfile.open(fileobj=buf, mode="r")
+
+    def test_is_package_tree(self):
+        self.assertTrue(is_package_tree(self.pkgdir))
+        self.assertFalse(is_package_tree(os.path.join(self.pkgdir, "usr")))
+        self.assertFalse(is_package_tree(os.path.join(self.pkgdir, ".PKGINFO")))
+
+    def test_members(self):
+        tree = DirectoryTree(self.pkgdir)
+        tar = self.archive()
+        self.assertEqual(tree.getnames(), tar.getnames())
+        for member, expected in zip(tree, tar):
+            self.assertEqual(
+                (member.name, member.type, member.mode, member.size, member.linkname, member.mtime),
+                (expected.name, expected.type, expected.mode, expected.size, expected.linkname, int(expected.mtime)),
+            )
+            self.assertEqual((member.uid, member.gid, member.uname, member.gname), (0, 0, "root", "root"))
+        self.assertTrue(tree.getmember("usr/bin/foo-link").islnk())
+        self.assertEqual(tree.getmember("usr/share/empty/").name, "usr/share/empty")
+        with self.assertRaises(KeyError):
+            tree.getmember("usr/bin/bar")
+
+    def test_extractfile(self):
+        tree = DirectoryTree(self.pkgdir)
+        f = tree.extractfile("usr/bin/foo")
+        assert f is not None
+        self.assertEqual(f.readline(), b"#!/usr/bin/python\n")
+        self.assertEqual(f.read(6), b"import")
+        f.seek(0)
+        self.assertEqual(f.read(), b"#!/usr/bin/python\nimport sys\n")
+        f.close()
+        # links are followed, like TarFile does
+        for name in ["usr/bin/foo-link", "usr/lib/libfoo.so"]:
+            f = tree.extractfile(name)
+            assert f is not None
+            self.assertEqual(f.read(2), b"#!" if name.startswith("usr/bin") else b"\x7fE")
+            f.close()
+        f = tree.extractfile("usr/bin/foo-2")
+        assert f is not None
+        self.assertEqual(f.read(), b"")
+        self.assertIsNone(tree.extractfile("usr/share/empty"))
+        # ELF files are parsed from the mapped file
+        lib = read_elf_facts(tree, tree.getmember("usr/lib/libfoo.so.1"))  # type: ignore[arg-type]
+        self.assertEqual(lib, read_elf_facts(self.archive(), self.archive().getmember("usr/lib/libfoo.so.1")))
+
+    def test_extract(self):
+        tree = DirectoryTree(self.pkgdir)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tree.extract("usr/bin/foo", tmpdir)
+            tree.extract("usr/lib/libfoo.so", tmpdir)
+            with open(os.path.join(tmpdir, "usr/bin/foo"), "rb") as f:
+                self.assertEqual(f.read(), b"#!/usr/bin/python\nimport sys\n")
+            self.assertEqual(os.readlink(os.path.join(tmpdir, "usr/lib/libfoo.so")), "libfoo.so.1")
+
+    def test_package(self):
+        pkg = TreePackage(DirectoryTree(self.pkgdir))
+        self.assertEqual((pkg.name, pkg.base, pkg.version, pkg.arch), ("foo", "foo-base", "1.0-1", "x86_64"))
+        self.assertEqual((pkg.builddate, pkg.size), (1700000000, 4096))
+        self.assertEqual(pkg.depends, ["glibc", "libfoo.so=1-64"])
+        self.assertEqual(pkg.optdepends, ["python: for the scripts"])
+        self.assertEqual(pkg.licenses, ["GPL-2.0-or-later"])
+        self.assertEqual(pkg.backup, [("etc/foo.conf", "")])
+        self.assertFalse(pkg.has_scriptlet)
+        self.assertIn(("usr/share/empty/", 0, 0o755), pkg.files)
+        self.assertIn(("usr/bin/foo", 29, 0o755), pkg.files)
+        self.assertNotIn(".PKGINFO", [name for name, _, _ in pkg.files])
+
+    def test_malformed_pkginfo(self):
+        with open(os.path.join(self.pkgdir, ".PKGINFO"), "w") as f:
+            f.write(PKGINFO.replace("builddate = 1700000000", "builddate = yesterday").replace("4096", "4 KiB"))
+        pkg = TreePackage(DirectoryTree(self.pkgdir))
+        self.assertEqual((pkg.name, pkg.builddate, pkg.size), ("foo", 0, 0))
@@ -0,0 +1,254 @@
+# Copyright (C) 2003-2023 Namcap contributors, see AUTHORS for details.
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+Unpacked packages, such as the $pkgdir of makepkg.
+
+A directory holding a .PKGINFO is checked like the package it would be
+archived into, without compressing it and decompressing it again: its
+files are listed with os.scandir and presented to the rules as the
+TarInfo members of a TarFile would be, and their contents are read from
+memory maps. makepkg archives $pkgdir under fakeroot, so the files of the
+user running namcap are seen as owned by root, as they would be in the
+package.
+"""
+
+import grp
+import io
+import mmap
+import os
+import posixpath
+import pwd
+import shutil
+import stat
+import tarfile
+from collections.abc import Iterator
+from tarfile import TarInfo
+
+FILE_TYPES = {
+    stat.S_IFREG: tarfile.REGTYPE,
+    stat.S_IFDIR: tarfile.DIRTYPE,
+    stat.S_IFLNK: tarfile.SYMTYPE,
+    stat.S_IFCHR: tarfile.CHRTYPE,
+    stat.S_IFBLK: tarfile.BLKTYPE,
+    stat.S_IFIFO: tarfile.FIFOTYPE,
+}
+
+
+def is_package_tree(path: str) -> bool:
+    "Whether path is an unpacked package"
+    return os.path.isdir(path) and os.path.isfile(os.path.join(path, ".PKGINFO"))
+
+
+def user_name(uid: int) -> str:
+    try:
+        return pwd.getpwuid(uid).pw_name
+    except KeyError:
+        return ""
+
+
+def group_name(gid: int) -> str:
+    try:
+        return grp.getgrgid(gid).gr_name
+    except KeyError:
+        return ""
+
+
+class MappedFile(io.BufferedIOBase):
+    "A read-only file mapped in memory, read like the file objects of TarFile.extractfile"
+
+    def __init__(self, path: str) -> None:
+        super().__init__()
+        with open(path, "rb") as f:
+            # empty files can not be mapped
+            size = os.fstat(f.fileno()).st_size
+            self.map: mmap.mmap | io.BytesIO = (
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else io.BytesIO()
+            )
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def read(self, size: int | None = -1) -> bytes:
+        return self.map.read(None if size is None or size < 0 else size)
+
+    read1 = read
+
+    def readline(self, size: int | None = -1) -> bytes:
+        line = self.map.readline()
+        if size is not None and 0 <= size < len(line):
+            self.map.seek(size - len(line), os.SEEK_CUR)
+            line = line[:size]
+        return line
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        self.map.seek(offset, whence)  # type: ignore[arg-type]
+        return self.map.tell()
+
+    def tell(self) -> int:
+        return self.map.tell()
+
+    def close(self) -> None:
+        if not self.closed:
+            self.map.close()
+        super().close()
+
+
+class DirectoryTree:
+    """
+    An unpacked package, offering the part of the TarFile interface used by
+    the rules (iteration, getmembers, getnames, getmember, extractfile, extract)
+    """
+
+    def __init__(self, path: str) -> None:
+        self.name = os.path.abspath(path)
+        self.members = self.scan()
+        self.index = {member.name: member for member in self.members}
+
+    def tarinfo(self, name: str, st: os.stat_result) -> TarInfo:
+        "The member an archive of the tree would have for a file"
+        info = TarInfo(name)
+        info.type = FILE_TYPES.get(stat.S_IFMT(st.st_mode), tarfile.REGTYPE)
+        info.mode = stat.S_IMODE(st.st_mode)
+        info.uid = 0 if st.st_uid == os.getuid() else st.st_uid
+        info.gid = 0 if st.st_gid == os.getgid() else st.st_gid
+        info.uname = user_name(info.uid)
+        info.gname = group_name(info.gid)
+        info.mtime = int(st.st_mtime)
+        if info.isreg():
+            info.size = st.st_size
+        elif info.issym():
+            info.linkname = os.readlink(os.path.join(self.name, name))
+        elif info.ischr() or info.isblk():
+            info.devmajor = os.major(st.st_rdev)
+            info.devminor = os.minor(st.st_rdev)
+        return info
+
+    def walk(self, directory: str = "") -> Iterator[tuple[str, os.stat_result]]:
+        with os.scandir(os.path.join(self.name, directory)) as entries:
+            for entry in entries:
+                name = posixpath.join(directory, entry.name)
+                yield name, entry.stat(follow_symlinks=False)
+                if entry.is_dir(follow_symlinks=False):
+                    yield from self.walk(name)
+
+    def scan(self) -> list[TarInfo]:
+        "The members of the tree, in the order makepkg archives them, hard links after their first name"
+        members = []
+        first_names: dict[tuple[int, int], str] = {}
+        for name, st in sorted(self.walk(), key=lambda item: os.fsencode(item[0])):
+            info = self.tarinfo(name, st)
+            if info.isreg() and st.st_nlink > 1:
+                if (first := first_names.setdefault((st.st_dev, st.st_ino), name)) != name:
+                    info.type = tarfile.LNKTYPE
+                    info.linkname = first
+                    info.size = 0
+            members.append(info)
+        return members
+
+    def __iter__(self) -> Iterator[TarInfo]:
+        return iter(self.members)
+
+    def getmembers(self) -> list[TarInfo]:
+        return self.members
+
+    def getnames(self) -> list[str]:
+        return [member.name for member in self.members]
+
+    def getmember(self, name: str) -> TarInfo:
+        try:
+            return self.index[name.rstrip("/")]
+        except KeyError:
+            raise KeyError("filename %r not found" % name) from None
+
+    def link_target(self, member: TarInfo) -> TarInfo:
+        "The member a hard or symbolic link points to, like TarFile does"
+        if member.issym():
+            linkname = posixpath.normpath(posixpath.join(posixpath.dirname(member.name), member.linkname))
+        else:
+            linkname = member.linkname
+        if (target := self.index.get(linkname)) is None:
+            raise KeyError("linkname %r not found" % linkname)
+        return target
+
+    def extractfile(self, member: str | TarInfo) -> MappedFile | None:
+        if isinstance(member, str):
+            member = self.getmember(member)
+        if member.islnk() or member.issym():
+            return self.extractfile(self.link_target(member))
+        if not member.isreg():
+            return None
+        return MappedFile(os.path.join(self.name, member.name))
+
+    def extract(self, member: str | TarInfo, path: str = "") -> None:
+        "Copies a member below path"
+        if isinstance(member, str):
+            member = self.getmember(member)
+        target = os.path.join(path, member.name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if member.isdir():
+            os.makedirs(target, exist_ok=True)
+        elif member.issym():
+            os.symlink(member.linkname, target)
+        elif member.isreg() or member.islnk():
+            shutil.copyfile(os.path.join(self.name, member.name), target)
+
+    def close(self) -> None:
+        pass
+
+
+class TreePackage:
+    "The package of an unpacked package, with the attributes of pyalpm.Package used by namcap"
+
+    def __init__(self, tree: DirectoryTree) -> None:
+        fields: dict[str, list[str]] = {}
+        f = tree.extractfile(".PKGINFO")
+        if f is not None:
+            for line in f.read().decode("utf-8", "replace").splitlines():
+                key, sep, value = line.partition(" = ")
+                if sep and not key.startswith("#") and value:
+                    fields.setdefault(key, []).append(value)
+            f.close()
+
+        def first(field: str, default: str = "") -> str:
+            return fields.get(field, [default])[0]
+
+        def number(field: str) -> int:
+            # makepkg writes integers, a malformed value is taken as missing
+            try:
+                return int(first(field, "0"))
+            except ValueError:
+                return 0
+
+        self.name = first("pkgname")
+        self.base = first("pkgbase", self.name)
+        self.version = first("pkgver")
+        self.desc = first("pkgdesc")
+        self.url = first("url")
+        self.arch = first("arch")
+        self.packager = first("packager")
+        self.builddate = number("builddate")
+        self.size = number("size")
+        self.groups = fields.get("group", [])
+        self.licenses = fields.get("license", [])
+        self.replaces = fields.get("replaces", [])
+        self.conflicts = fields.get("conflict", [])
+        self.provides = fields.get("provides", [])
+        self.depends = fields.get("depend", [])
+        self.optdepends = fields.get("optdepend", [])
+        self.makedepends = fields.get("makedepend", [])
+        self.checkdepends = fields.get("checkdepend", [])
+        # the .PKGINFO does not record the checksums of backup files
+        self.backup = [(path, "") for path in fields.get("backup", [])]
+        self.has_scriptlet = ".INSTALL" in tree.index
+        self.files = [
+            (member.name + "/" if member.isdir() else member.name, member.size, member.mode)
+            for member in tree
+            if not member.name.startswith(".")
+        ]
+
+    def __repr__(self) -> str:
+        return "TreePackage(%s %s)" % (self.name, self.version)
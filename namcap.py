@@ -3,71 +3,96 @@
 # SPDX-License-Identifier: GPL-2.0-or-later
 
 import argparse
+import importlib
 import os
 import sys
 import tarfile
 
+import Namcap.batch
+import Namcap.cache
+import Namcap.decompress
 import Namcap.depends
+import Namcap.members
+import Namcap.output
+import Namcap.prefetch
 from Namcap.package import load_from_tarball, PacmanPackage
 import Namcap.rules
+import Namcap.ruleclass
 import Namcap.tags
+import Namcap.tree
 import Namcap.version
 
 
 # Functions
 def get_modules():
-    """Return all possible modules (rules)"""
-    return Namcap.rules.all_rules
+    """Return the metadata of all possible modules (rules)"""
+    return Namcap.rules.rule_metadata
 
 
 def get_enabled_modules():
-    """Return modules (rules) that should be used by default"""
+    """Return the metadata of modules (rules) that should be used by default"""
     return dict(filter(lambda x: x[1].enable, get_modules().items()))
 
 
+def get_rules(modules, kinds):
+    """Return the selected rules of the given kinds, importing only those"""
+    return [(i, Namcap.rules.load_rule(i)) for i, meta in modules.items() if meta.kind in kinds]
+
+
+def positive_int(value):
+    """Parse a command line value which must be a positive integer"""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError("%r is not a positive integer" % value)
+    return number
+
+
+def non_negative_int(value):
+    """Parse a command line value which must be a positive integer or zero"""
+    try:
+        number = int(value)
+    except ValueError:
+        number = -1
+    if number < 0:
+        raise argparse.ArgumentTypeError("%r is not a non-negative integer" % value)
+    return number
+
+
 def open_package(filename):
+    tar = None
     try:
-        tar = tarfile.open(filename, "r")
-        if ".PKGINFO" not in tar.getnames():
+        tar = Namcap.decompress.open_tarball(filename)
+        # the rules read the members from a table, tarfile's own list is released
+        archive = Namcap.members.PackageArchive(tar)
+        if ".PKGINFO" not in archive.index:
             tar.close()
             return None
-    except OSError:
+    except (OSError, tarfile.TarError):
         if tar:
             tar.close()
         return None
-    return tar
+    return archive
 
 
-def show_messages(name, key, messages):
-    colored_key = {
-        "E": "\033[91mE\033[00m",
-        "W": "\033[93mW\033[00m",
-        "I": "\033[92mI\033[00m",
-    }
+def show_messages(name, rule, key, messages):
     for msg in messages:
-        if sys.stdout.isatty():
-            print("%s %s: %s" % (name, colored_key[key], Namcap.tags.format_message(msg)))
-        else:
-            print("%s %s: %s" % (name, key, Namcap.tags.format_message(msg)))
-
-
-def process_realpackage(package, modules):
-    """Runs namcap checks over a package tarball"""
-    pkgtar = open_package(package)
-
-    if not pkgtar:
-        print("Error: %s is empty or is not a valid package" % package)
-        return 1
+        sink.add(Namcap.output.Result(name, rule, key, msg))
+    if isinstance(messages, Namcap.ruleclass.DiagnosticList):
+        for tag, count in messages.omitted.items():
+            sink.add(Namcap.output.Result(name, rule, key, ("messages-omitted %i %s", (count, tag.split(" ", 1)[0]))))
 
-    pkginfo: PacmanPackage | None = load_from_tarball(package)
-    if pkginfo is None:
-        print(f"Error: Loading package from {package} failed")
-        pkgtar.close()
-        return 1
 
+def apply_package_rules(pkginfo, pkgtar, modules):
+    """Runs the rules checking built packages, then the dependency analysis"""
     # Loop through each one, load them apply if possible
-    for i in modules:
-        rule = get_modules()[i]()
+    for i, rule_class in get_rules(modules, ("PkgInfoRule", "TarballRule")):
+        # skip rules which would find nothing to check
+        if not rule_class.applies(pkginfo, pkgtar):
+            continue
+        rule = rule_class(report_infos=info_reporting, limit=aggregate)
 
         if isinstance(rule, Namcap.ruleclass.PkgInfoRule):
             rule.analyze(pkginfo, None)
@@ -76,28 +101,77 @@ def process_realpackage(package, modules):
         elif isinstance(rule, Namcap.ruleclass.TarballRule):
             rule.analyze(pkginfo, pkgtar)
         else:
-            show_messages(pkginfo["name"], "E", [("error-running-rule %s", i)])
+            show_messages(pkginfo["name"], i, "E", [("error-running-rule %s", (i,))])
 
         # Output the three types of messages
-        show_messages(pkginfo["name"], "E", rule.errors)
-        show_messages(pkginfo["name"], "W", rule.warnings)
+        show_messages(pkginfo["name"], i, "E", rule.errors)
+        show_messages(pkginfo["name"], i, "W", rule.warnings)
         if info_reporting:
-            show_messages(pkginfo["name"], "I", rule.infos)
+            show_messages(pkginfo["name"], i, "I", rule.infos)
 
     # dependency analysis
-    errs, warns, infos = Namcap.depends.analyze_depends(pkginfo)
-    show_messages(pkginfo["name"], "E", errs)
-    show_messages(pkginfo["name"], "W", warns)
+    errs, warns, infos = Namcap.depends.analyze_depends(pkginfo, report_infos=info_reporting)
+    show_messages(pkginfo["name"], "depends", "E", errs)
+    show_messages(pkginfo["name"], "depends", "W", warns)
     if info_reporting:
-        show_messages(pkginfo["name"], "I", infos)
+        show_messages(pkginfo["name"], "depends", "I", infos)
+
+
+def process_realpackage(package, modules):
+    """Runs namcap checks over a package tarball"""
+    # the same file, checked the same way against the same system, gives the same results
+    key = None
+    if Namcap.cache.enabled:
+        # imported only then, it needs the library directories read through pyelftools
+        cached_results = importlib.import_module("Namcap.results")
+        key = cached_results.make_key(package, modules, str(info_reporting), str(aggregate))
+    if key is not None and (results := cached_results.load(key)) is not None:
+        for result in results:
+            sink.add(result)
+        # only the metadata is needed for the checks across packages
+        if batch is not None and (metadata := load_from_tarball(package)) is not None:
+            batch.add(metadata)
+        return
+
+    pkgtar = open_package(package)
+
+    if not pkgtar:
+        sink.error("Error: %s is empty or is not a valid package" % package)
+        return 1
 
+    pkginfo: PacmanPackage | None = load_from_tarball(package)
+    if pkginfo is None:
+        sink.error(f"Error: Loading package from {package} failed")
+        pkgtar.close()
+        return 1
+
+    apply_package_rules(pkginfo, pkgtar, modules)
     pkgtar.close()
+    if key is not None:
+        cached_results.store(key, sink.pending)
+    if batch is not None:
+        batch.add(pkginfo)
+
+
+def process_tree(package, modules):
+    """Runs namcap checks over an unpacked package, such as the $pkgdir of makepkg"""
+    try:
+        pkgtree = Namcap.tree.DirectoryTree(package)
+        pkginfo = Namcap.package.load_from_tree(pkgtree)
+    except (OSError, ValueError) as e:
+        sink.error(f"Error: Loading package from {package} failed: {e}")
+        return 1
+    apply_package_rules(pkginfo, pkgtree, modules)
+    if batch is not None:
+        batch.add(pkginfo)
 
 
 def process_pkginfo(pkginfo, modules):
     """Runs namcap checks of a single, non-split PacmanPackage object"""
-    for i in modules:
-        rule = get_modules()[i]()
+    for i, rule_class in get_rules(modules, ("PkgInfoRule",)):
+        if not rule_class.applies(pkginfo):
+            continue
+        rule = rule_class(report_infos=info_reporting, limit=aggregate)
         if isinstance(rule, Namcap.ruleclass.PkgInfoRule):
             rule.analyze(pkginfo, None)
 
@@ -106,10 +180,10 @@ def process_pkginfo(pkginfo, modules):
             name = "PKGBUILD (" + pkginfo["base"] + ")"
         else:
             name = "PKGBUILD (" + pkginfo["name"] + ")"
-        show_messages(name, "E", rule.errors)
-        show_messages(name, "W", rule.warnings)
+        show_messages(name, i, "E", rule.errors)
+        show_messages(name, i, "W", rule.warnings)
         if info_reporting:
-            show_messages(name, "I", rule.infos)
+            show_messages(name, i, "I", rule.infos)
 
 
 def process_pkgbuild(package, modules):
@@ -119,12 +193,14 @@ def process_pkgbuild(package, modules):
     pkginfo = Namcap.package.load_from_pkgbuild(package)
 
     if pkginfo is None:
-        print("Error: %s is not a valid PKGBUILD" % package)
+        sink.error("Error: %s is not a valid PKGBUILD" % package)
         return 1
 
     # apply global PKGBUILD rules
-    for i in modules:
-        rule = get_modules()[i]()
+    for i, rule_class in get_rules(modules, ("PkgbuildRule",)):
+        if not rule_class.applies(pkginfo):
+            continue
+        rule = rule_class(report_infos=info_reporting, limit=aggregate)
         if isinstance(rule, Namcap.ruleclass.PkgbuildRule):
             rule.analyze(pkginfo, package)
         # Output the messages
@@ -132,14 +208,19 @@ def process_pkgbuild(package, modules):
             name = "PKGBUILD (" + pkginfo["base"] + ")"
         else:
             name = "PKGBUILD (" + pkginfo["name"] + ")"
-        show_messages(name, "E", rule.errors)
-        show_messages(name, "W", rule.warnings)
+        show_messages(name, i, "E", rule.errors)
+        show_messages(name, i, "W", rule.warnings)
         if info_reporting:
-            show_messages(name, "I", rule.infos)
+            show_messages(name, i, "I", rule.infos)
     # apply per pkginfo rule
     for subpkg in pkginfo.subpackages if pkginfo.is_split else [pkginfo]:
         process_pkginfo(subpkg, modules)
 
+    # the metadata came from a .SRCINFO, the rules reading bash variables found out
+    if pkginfo.unparsable:
+        sink.error("Error: %s is not a valid PKGBUILD" % package)
+        return 1
+
 
 # Main
 modules = get_modules()
@@ -153,6 +234,46 @@ parser.add_argument(
     "-m", "--machine-readable", action="store_true", help="Makes the output parseable (machine-readable)"
 )
 parser.add_argument("-t", "--tags", action="store", help="Use a custom tag file")
+parser.add_argument(
+    "--format",
+    choices=sorted(Namcap.output.sinks),
+    default="text",
+    help="Output format: text (default), jsonl (one JSON object per message) or sarif",
+)
+parser.add_argument(
+    "--aggregate",
+    action="store",
+    type=positive_int,
+    metavar="N",
+    help="Only show the first N messages of each tag from each rule, and how many more there were",
+)
+parser.add_argument("--no-cache", action="store_true", help="Do not use or update the persistent cache")
+parser.add_argument(
+    "--root", action="store", metavar="PATH", help="Check against the packages and libraries installed in PATH"
+)
+parser.add_argument("--dbpath", action="store", metavar="PATH", help="Use the pacman database in PATH")
+parser.add_argument("--config", action="store", metavar="FILE", help="Use FILE instead of /etc/pacman.conf")
+parser.add_argument(
+    "--refdb",
+    action="append",
+    metavar="DB",
+    help="Check against the packages of the repository database DB (a .db or .files file, or a directory of them) "
+    "instead of the installed packages, may be repeated",
+)
+parser.add_argument(
+    "--repo",
+    action="store",
+    metavar="DIR",
+    help="Check all the packages in DIR, then check them together (split packages, sonames)",
+)
+parser.add_argument(
+    "--prefetch",
+    action="store",
+    type=non_negative_int,
+    default=0,
+    metavar="N",
+    help="Read the next N package files ahead while checking one, for packages on slow or networked storage",
+)
 parser.add_argument("packages", nargs="*")
 pargroup = parser.add_mutually_exclusive_group()
 pargroup.add_argument(
@@ -174,19 +295,26 @@ args = parser.parse_args()
 
 if args.list:
     print("-" * 20 + " Namcap rule list " + "-" * 20)
-    print(modules)
     for j in sorted(modules):
         print("%-20s: %s" % (j, modules[j].description))
     parser.exit(0)
 
-if len(args.packages) == 0:
+if len(args.packages) == 0 and not args.repo:
     print("Missing required argument packages", file=sys.stderr)
     parser.exit(2)
 
 info_reporting = args.info
+aggregate = args.aggregate
+Namcap.cache.enabled = not args.no_cache
+Namcap.package.configure_alpm(root=args.root, dbpath=args.dbpath, config=args.config)
+Namcap.package.configure_refdb(args.refdb or [])
 machine_readable = args.machine_readable
 filename = args.tags
 packages = args.packages
+batch = None
+if args.repo:
+    packages = packages + Namcap.batch.find_packages(args.repo)
+    batch = Namcap.batch.Batch()
 
 active_modules = {}
 
@@ -208,20 +336,34 @@ if args.exclude:
             parser.exit(2)
 
 Namcap.tags.load_tags(filename=filename, machine=machine_readable)
+sink = Namcap.output.sinks[args.format](sys.stdout)
 
 # No rules selected?  Then use default selection
 if len(active_modules) == 0:
     active_modules = get_enabled_modules()
 
+if args.prefetch:
+    packages = Namcap.prefetch.Prefetcher(packages, depth=args.prefetch)
+
 # Go through each package, get the info, and apply the rules
 for package in packages:
     if not os.access(package, os.R_OK):
-        print("Error: Problem reading %s" % package)
+        sink.error("Error: Problem reading %s" % package)
         parser.print_usage()
 
-    if os.path.isfile(package) and tarfile.is_tarfile(package):
+    if Namcap.decompress.is_tarball(package):
         process_realpackage(package, active_modules)
+    elif Namcap.tree.is_package_tree(package):
+        process_tree(package, active_modules)
     elif "PKGBUILD" in package:
         process_pkgbuild(package, active_modules)
     else:
-        print("Error: %s not package or PKGBUILD" % package)
+        sink.error("Error: %s not package or PKGBUILD" % package)
+    sink.flush(package)
+
+if batch is not None:
+    for name, severity, diagnostic in batch.check():
+        sink.add(Namcap.output.Result(name, "batch", severity, diagnostic))
+    sink.flush(args.repo)
+
+sink.close()